@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端吞吐基准测试
+
+启动本地模拟服务器(mock_server.py)，将站点地址指向它后运行完整的签到会话
+(登录、获取连接信息、浏览主题、再次获取连接信息、通知)，报告:
+- 登录耗时: 从会话开始到登录完成(包含启动浏览器)
+- 主题吞吐: 每分钟浏览的主题数量
+- 每个主题的CDP调用次数、往返耗时和返回字节数(core/cdp_stats.py)
+- 浏览器下载的总字节数和各阶段的字节数(core/network_stats.py)
+- 浏览器进程树RSS峰值、标签页JS堆峰值和Python进程RSS峰值
+
+需要安装DrissionPage和Chrome/Chromium
+
+用法:
+    python benchmarks/e2e.py [--topics 5] [--posts 40] [--dwell-scale 0.1]
+                             [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mock_server import MockDiscourseServer  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def peak_python_rss() -> Optional[int]:
+    """
+    获取当前Python进程的RSS峰值
+
+    Returns:
+        Optional[int]: RSS峰值(字节)，当前平台不支持时为None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位为KB，macOS上为字节
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_benchmark(
+    args: argparse.Namespace, server: MockDiscourseServer
+) -> Dict[str, Any]:
+    """
+    运行一次完整的签到会话并收集指标
+
+    Args:
+        args: 命令行参数
+        server: 已启动的模拟服务器
+
+    Returns:
+        Dict[str, Any]: 基准测试结果
+    """
+    # 站点地址在导入config时确定，必须在导入核心模块之前设置
+    os.environ["LINUXDO_BASE_URL"] = server.url
+    os.environ["LINUXDO_CONNECT_URL"] = server.connect_url
+
+    from core.browser import BrowserManager
+    from core.session import Session
+    from core.accounts import find_free_port
+    from utils.notification import NotificationManager
+
+    browser = BrowserManager(args.browser_address)
+    profile_dir = tempfile.mkdtemp(prefix="linuxdo-e2e-")
+    if args.browser_address is None:
+        browser.configure_launch(profile_dir, find_free_port())
+
+    config = {
+        "username": "benchmark",
+        "password": "benchmark",
+        "browse_enabled": True,
+        "max_topics": args.topics,
+        "cdp_stats": True,
+    }
+    session = Session(
+        config,
+        browser,
+        NotificationManager(),
+        manage_notifications=False,
+        checkpoint_window=0,
+    )
+    # 缩短滚动等待时间，只测量流程本身的开销
+    session.topic_browser.dwell_scale = args.dwell_scale
+
+    try:
+        report = session.run()
+    finally:
+        browser.close_all_pages()
+
+    login_end = report.tasks.get("login", (None, None))[1]
+    browse_start, browse_end = report.tasks.get("browse", (None, None))
+    browse_seconds = (
+        browse_end - browse_start if browse_start is not None and browse_end else 0.0
+    )
+    python_rss = peak_python_rss()
+    cdp = report.cdp
+    topics = cdp.get("topics", [])
+
+    def per_topic(field: str, digits: int) -> Optional[float]:
+        if not topics:
+            return None
+        return round(sum(topic[field] for topic in topics) / len(topics), digits)
+
+    return {
+        "success": report.success,
+        "error": report.error,
+        "duration": round(report.duration, 3),
+        "time_to_login": round(login_end, 3) if login_end is not None else None,
+        "visited_topics": report.visited_topics,
+        "browse_seconds": round(browse_seconds, 3),
+        "topics_per_minute": (
+            round(report.visited_topics / browse_seconds * 60, 2)
+            if browse_seconds
+            else None
+        ),
+        "cdp_calls": cdp["total"]["calls"] if cdp else None,
+        "cdp_calls_per_topic": per_topic("calls", 1),
+        "cdp_seconds_per_topic": per_topic("seconds", 3),
+        "cdp_kb_per_topic": (
+            round(per_topic("bytes", 0) / 1024, 1) if topics else None
+        ),
+        "cdp_callers": cdp.get("callers", []),
+        "network_kb": (
+            round(report.network["bytes"] / 1024, 1) if report.network else None
+        ),
+        "network_phases": report.network.get("phases", {}),
+        "critical_path": report.critical_path,
+        "peak_browser_rss_mb": round(session.governor.peak_rss / MB, 1) or None,
+        "peak_heap_mb": round(session.governor.peak_heap / MB, 1) or None,
+        "peak_python_rss_mb": round(python_rss / MB, 1) if python_rss else None,
+        "server": server.snapshot(),
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    """
+    输出基准测试结果
+
+    Args:
+        result: 基准测试结果
+    """
+
+    def show(value: Any, unit: str = "") -> str:
+        return "n/a" if value is None else f"{value}{unit}"
+
+    status = "成功" if result["success"] else f"失败: {result['error']}"
+    print(f"运行结果: {status}，总耗时 {result['duration']} s")
+    print(f"登录耗时:           {show(result['time_to_login'], ' s')}")
+    print(
+        f"主题吞吐:           {show(result['topics_per_minute'], ' 个/分钟')} "
+        f"({result['visited_topics']} 个主题，{result['browse_seconds']} s)"
+    )
+    print(
+        f"每个主题CDP调用:    {show(result['cdp_calls_per_topic'])} 次，"
+        f"{show(result['cdp_seconds_per_topic'], ' s')}，"
+        f"{show(result['cdp_kb_per_topic'], ' KB')}"
+    )
+    print(f"CDP调用总数:        {show(result['cdp_calls'])}")
+    print(f"网络流量:           {show(result['network_kb'], ' KB')}")
+    for phase, row in result["network_phases"].items():
+        print(f"  {phase}: {row['bytes'] / 1024:.1f} KB，{row['requests']} 个请求")
+    print(f"浏览器RSS峰值:      {show(result['peak_browser_rss_mb'], ' MB')}")
+    print(f"JS堆峰值:           {show(result['peak_heap_mb'], ' MB')}")
+    print(f"Python进程RSS峰值:  {show(result['peak_python_rss_mb'], ' MB')}")
+    print(f"关键路径:           {' → '.join(result['critical_path'])}")
+    for row in result["cdp_callers"][:5]:
+        print(
+            f"  CDP调用方:        {row['phase']} {row['caller']} "
+            f"{row['calls']} 次 {row['seconds']} s"
+        )
+    print(f"服务器统计:         {result['server']}")
+
+
+def main() -> int:
+    """
+    运行基准测试
+
+    Returns:
+        int: 退出码，会话失败时为1
+    """
+    parser = argparse.ArgumentParser(description="端到端吞吐基准测试")
+    parser.add_argument("--topics", type=int, default=5, help="浏览的主题数量")
+    parser.add_argument("--posts", type=int, default=40, help="每个主题的帖子数量")
+    parser.add_argument("--chunk", type=int, default=20, help="每次加载的帖子数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟网络延迟(秒)")
+    parser.add_argument(
+        "--dwell-scale",
+        type=float,
+        default=0.1,
+        help="滚动等待时间的缩放比例，1表示与实际运行相同",
+    )
+    parser.add_argument(
+        "--browser-address",
+        metavar="HOST:PORT",
+        help="附加到已运行的浏览器(例如无头浏览器)，默认自行启动",
+    )
+    parser.add_argument("--json", help="将结果写入JSON文件，便于长期对比")
+    args = parser.parse_args()
+
+    server = MockDiscourseServer(
+        topics=max(args.topics, 1) * 2,
+        posts=args.posts,
+        chunk=args.chunk,
+        latency=args.latency,
+    )
+    server.start()
+    try:
+        result = run_benchmark(args, server)
+    finally:
+        server.stop()
+
+    print_result(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                dict(result, generated_at=time.strftime("%Y-%m-%dT%H:%M:%S%z")),
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+    return 0 if result["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
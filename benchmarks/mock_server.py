@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟Discourse和Connect服务器
+
+在本地提供与linux.do结构一致的页面，使整个签到流程可以不访问真实站点运行:
+- /login: 登录表单，提交后设置会话Cookie并跳转首页
+- /: 首页，已登录时包含#current-user
+- /new、/new.json: 最新主题列表(HTML表格和Discourse风格的JSON)
+- /t/<slug>/<id>: 主题页面，帖子数量可配置，滚动到底部时懒加载后续帖子，每个帖子都有点赞按钮
+- /t/<id>/posts.json: 懒加载帖子的接口
+- /post_actions: 点赞接口
+- /connect/: connect.linux.do风格的信任等级表格，数值随浏览和点赞变化
+- /__stats: 服务器统计数据
+
+使用时设置LINUXDO_BASE_URL和LINUXDO_CONNECT_URL环境变量指向本服务器
+
+用法:
+    python benchmarks/mock_server.py [--port 8000] [--topics 30] [--posts 40]
+    LINUXDO_BASE_URL=http://127.0.0.1:8000 \\
+    LINUXDO_CONNECT_URL=http://127.0.0.1:8000/connect python main.py
+"""
+
+import sys
+import json
+import html
+import time
+import secrets
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# 会话Cookie名称，与Discourse一致
+SESSION_COOKIE = "_t"
+
+# 帖子正文，重复若干次使页面有足够的高度可供滚动
+POST_TEXT = (
+    "这是一个用于本地基准测试的模拟帖子。"
+    "页面结构与Discourse保持一致，滚动到底部时会继续加载后续帖子。"
+)
+
+PAGE_STYLE = """
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 960px; }
+.topic-post { min-height: 360px; border-bottom: 1px solid #ddd; padding: 16px 0; }
+.like { cursor: pointer; }
+</style>
+"""
+
+TOPIC_SCRIPT = """
+<script>
+(function () {
+  var topicId = %(topic_id)d, total = %(total)d, offset = %(offset)d, loading = false;
+  window.like = function (button) {
+    fetch("/post_actions", {
+      method: "POST",
+      headers: {"Content-Type": "application/x-www-form-urlencoded"},
+      body: "post_id=" + button.dataset.postId
+    }).then(function () { button.title = "取消点赞"; button.classList.add("liked"); });
+  };
+  window.addEventListener("scroll", function () {
+    if (loading || offset >= total) return;
+    if (window.scrollY + window.innerHeight < document.body.scrollHeight - 600) return;
+    loading = true;
+    fetch("/t/" + topicId + "/posts.json?offset=" + offset)
+      .then(function (r) { return r.json(); })
+      .then(function (data) {
+        var stream = document.getElementById("post-stream");
+        data.posts.forEach(function (post) {
+          stream.insertAdjacentHTML("beforeend", post.html);
+        });
+        offset += data.posts.length;
+        loading = false;
+      });
+  });
+})();
+</script>
+"""
+
+
+class MockDiscourseServer:
+    """模拟服务器，在后台线程中运行"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        topics: int = 30,
+        posts: int = 40,
+        chunk: int = 20,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        latency: float = 0.0,
+    ):
+        """
+        初始化模拟服务器
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动选择空闲端口
+            topics: 最新主题列表中的主题数量
+            posts: 每个主题的帖子数量
+            chunk: 首次加载和每次懒加载的帖子数量
+            username: 允许登录的用户名，None表示接受任意非空凭据
+            password: 允许登录的密码
+            latency: 每个请求的模拟网络延迟(秒)
+        """
+        self.host = host
+        self.port = port
+        self.topics = topics
+        self.posts = posts
+        self.chunk = max(1, chunk)
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.sessions: Dict[str, str] = {}  # 会话令牌 -> 用户名
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "logins": 0,
+            "failed_logins": 0,
+            "topic_views": 0,
+            "posts_loaded": 0,
+            "likes": 0,
+        }
+        self.lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务器地址，对应LINUXDO_BASE_URL"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def connect_url(self) -> str:
+        """连接信息页面地址，对应LINUXDO_CONNECT_URL"""
+        return f"{self.url}/connect"
+
+    def start(self) -> str:
+        """
+        启动服务器
+
+        Returns:
+            str: 服务器地址
+        """
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-server", daemon=True
+        )
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        """停止服务器"""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def count(self, key: str, amount: int = 1) -> None:
+        """
+        增加统计计数
+
+        Args:
+            key: 统计项
+            amount: 增加的数量
+        """
+        with self.lock:
+            self.stats[key] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        获取统计数据的副本
+
+        Returns:
+            Dict[str, int]: 统计数据
+        """
+        with self.lock:
+            return dict(self.stats)
+
+    def check_credentials(self, username: str, password: str) -> bool:
+        """
+        校验登录凭据
+
+        Args:
+            username: 用户名
+            password: 密码
+
+        Returns:
+            bool: 是否允许登录
+        """
+        if not username or not password:
+            return False
+        if self.username is None:
+            return True
+        return username == self.username and password == self.password
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """请求处理器，mock属性在MockDiscourseServer.start()中注入"""
+
+    mock: MockDiscourseServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """不输出访问日志"""
+
+    # ---------------- 工具方法 ----------------
+
+    def _user(self) -> Optional[str]:
+        """当前请求的登录用户"""
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        token = cookie.get(SESSION_COOKIE)
+        if token is None:
+            return None
+        with self.mock.lock:
+            return self.mock.sessions.get(token.value)
+
+    def _send(
+        self,
+        body: str,
+        status: int = 200,
+        content_type: str = "text/html; charset=utf-8",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """发送响应"""
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        """发送JSON响应"""
+        self._send(
+            json.dumps(payload, ensure_ascii=False),
+            status,
+            "application/json; charset=utf-8",
+        )
+
+    def _redirect(
+        self, location: str, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """发送303跳转"""
+        self._send("", 303, headers=dict(headers or {}, Location=location))
+
+    def _page(self, title: str, content: str) -> str:
+        """生成带页头的完整页面"""
+        user = self._user()
+        if user:
+            header = (
+                f'<div id="current-user"><a href="/u/{html.escape(user)}">'
+                f"{html.escape(user)}</a></div>"
+            )
+        else:
+            header = '<a class="login-button" href="/login">登录</a>'
+        return (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(title)}</title>{PAGE_STYLE}</head><body>"
+            f'<header><a href="/">首页</a> <a href="/new">最新</a> {header}</header>'
+            f"{content}</body></html>"
+        )
+
+    def _read_form(self) -> Dict[str, str]:
+        """读取urlencoded请求体"""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        return {key: values[0] for key, values in parse_qs(body).items()}
+
+    def _post_html(self, topic_id: int, number: int) -> str:
+        """生成单个帖子的HTML"""
+        post_id = topic_id * 1000 + number
+        return (
+            f'<article class="topic-post" id="post_{number}">'
+            f'<div class="cooked"><p>#{number} {POST_TEXT * 4}</p></div>'
+            f'<button class="like" title="点赞此帖子" data-post-id="{post_id}" '
+            f'onclick="like(this)">♥</button></article>'
+        )
+
+    # ---------------- 路由 ----------------
+
+    def do_GET(self) -> None:
+        """处理GET请求"""
+        self.mock.count("requests")
+        if self.mock.latency:
+            time.sleep(self.mock.latency)
+
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip("/") or "/"
+        parts = path.strip("/").split("/")
+
+        if path == "/":
+            self._send(self._page("模拟 Linux.Do", "<h1>模拟 Linux.Do</h1>"))
+        elif path == "/login":
+            self._login_page()
+        elif path == "/new":
+            self._topic_list()
+        elif path == "/new.json":
+            self._topic_list_json()
+        elif path == "/connect":
+            self._connect_page()
+        elif path == "/__stats":
+            self._send_json(self.mock.snapshot())
+        elif len(parts) == 3 and parts[0] == "t" and parts[2] == "posts.json":
+            self._posts_json(int(parts[1]), parse_qs(parsed.query))
+        elif len(parts) == 3 and parts[0] == "t" and parts[2].isdigit():
+            self._topic_page(int(parts[2]))
+        else:
+            self._send(self._page("未找到", "<h1>404</h1>"), 404)
+
+    def do_POST(self) -> None:
+        """处理POST请求"""
+        self.mock.count("requests")
+        if self.mock.latency:
+            time.sleep(self.mock.latency)
+
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/login":
+            self._login()
+        elif path == "/post_actions":
+            if self._user() is None:
+                self._send_json({"error": "未登录"}, 403)
+                return
+            self.mock.count("likes")
+            post_id = self._read_form().get("post_id")
+            self._send_json({"success": True, "post_id": post_id})
+        else:
+            self._send_json({"error": "未找到"}, 404)
+
+    def _login_page(self, error: str = "") -> None:
+        """登录页面"""
+        message = f'<div class="alert">{html.escape(error)}</div>' if error else ""
+        self._send(
+            self._page(
+                "登录",
+                f"{message}"
+                '<form id="login-form" method="post" action="/login">'
+                '<input id="login-account-name" name="login" type="text">'
+                '<input id="login-account-password" name="password" type="password">'
+                '<button id="login-button" type="submit">登录</button>'
+                "</form>",
+            )
+        )
+
+    def _login(self) -> None:
+        """提交登录表单"""
+        form = self._read_form()
+        username, password = form.get("login", ""), form.get("password", "")
+        if not self.mock.check_credentials(username, password):
+            self.mock.count("failed_logins")
+            self._login_page("用户名或密码错误")
+            return
+
+        token = secrets.token_hex(16)
+        with self.mock.lock:
+            self.mock.sessions[token] = username
+        self.mock.count("logins")
+        self._redirect(
+            "/", {"Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/; HttpOnly"}
+        )
+
+    def _topic_url(self, topic_id: int) -> str:
+        """主题的完整地址"""
+        return f"http://{self.headers.get('Host')}/t/topic-{topic_id}/{topic_id}"
+
+    def _topic_list(self) -> None:
+        """最新主题列表页面"""
+        rows = "".join(
+            f'<tr><td><span><a class="title raw-topic-link" data-topic-id="{i}" '
+            f'href="{self._topic_url(i)}">模拟主题 {i}</a></span></td>'
+            f"<td>{self.mock.posts}</td></tr>"
+            for i in range(1, self.mock.topics + 1)
+        )
+        self._send(
+            self._page(
+                "最新主题",
+                f'<div id="ember57"><table><tbody>{rows}</tbody></table></div>',
+            )
+        )
+
+    def _topic_list_json(self) -> None:
+        """最新主题列表JSON"""
+        topics = [
+            {
+                "id": i,
+                "title": f"模拟主题 {i}",
+                "slug": f"topic-{i}",
+                "posts_count": self.mock.posts,
+            }
+            for i in range(1, self.mock.topics + 1)
+        ]
+        self._send_json({"topic_list": {"topics": topics}})
+
+    def _topic_page(self, topic_id: int) -> None:
+        """主题页面，只包含第一批帖子，后续帖子滚动时懒加载"""
+        if not 1 <= topic_id <= self.mock.topics:
+            self._send(self._page("未找到", "<h1>404</h1>"), 404)
+            return
+
+        self.mock.count("topic_views")
+        initial = min(self.mock.chunk, self.mock.posts)
+        self.mock.count("posts_loaded", initial)
+        posts = "".join(self._post_html(topic_id, n) for n in range(1, initial + 1))
+        script = TOPIC_SCRIPT % {
+            "topic_id": topic_id,
+            "total": self.mock.posts,
+            "offset": initial,
+        }
+        self._send(
+            self._page(
+                f"模拟主题 {topic_id}",
+                f"<h1>模拟主题 {topic_id}</h1>"
+                f'<div id="post-stream">{posts}</div>{script}',
+            )
+        )
+
+    def _posts_json(self, topic_id: int, query: Dict[str, Any]) -> None:
+        """懒加载帖子"""
+        offset = int(query.get("offset", ["0"])[0])
+        end = min(offset + self.mock.chunk, self.mock.posts)
+        posts = [
+            {"post_number": n, "html": self._post_html(topic_id, n)}
+            for n in range(offset + 1, end + 1)
+        ]
+        self.mock.count("posts_loaded", len(posts))
+        self._send_json({"posts": posts})
+
+    def _connect_page(self) -> None:
+        """connect.linux.do风格的信任等级表格"""
+        stats = self.mock.snapshot()
+        rows = [
+            ("访问次数", stats["logins"], "50%"),
+            ("浏览的话题", stats["topic_views"], "500"),
+            ("已读帖子", stats["posts_loaded"], "20000"),
+            ("送出赞", stats["likes"], "30"),
+        ]
+        cells = "".join(
+            f"<tr><td>{name}</td><td>{value}</td><td>{requirement}</td></tr>"
+            for name, value, requirement in rows
+        )
+        self._send(
+            self._page(
+                "Linux.Do Connect",
+                f"<table><tr><th>项目</th><th>当前</th><th>要求</th></tr>{cells}</table>",
+            )
+        )
+
+
+def main() -> int:
+    """
+    以前台方式运行模拟服务器
+
+    Returns:
+        int: 退出码
+    """
+    parser = argparse.ArgumentParser(description="本地模拟Discourse和Connect服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument("--topics", type=int, default=30, help="主题数量")
+    parser.add_argument("--posts", type=int, default=40, help="每个主题的帖子数量")
+    parser.add_argument("--chunk", type=int, default=20, help="每次加载的帖子数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟网络延迟(秒)")
+    args = parser.parse_args()
+
+    server = MockDiscourseServer(
+        args.host, args.port, args.topics, args.posts, args.chunk, latency=args.latency
+    )
+    server.start()
+    print(f"模拟服务器已启动: {server.url}")
+    print(f"  LINUXDO_BASE_URL={server.url}")
+    print(f"  LINUXDO_CONNECT_URL={server.connect_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
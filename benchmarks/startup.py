@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+
+在全新的解释器中执行`import main`，通过`-X importtime`记录每个模块的导入耗时，
+并检查冷启动是否超出预算、是否提前导入了只应按需加载的重量级依赖
+
+用法:
+    python benchmarks/startup.py [--repeat 5] [--budget-ms 100] [--top 15] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+
+# 导入main时不应加载的模块，这些依赖应在对应功能真正运行时才导入
+LAZY_MODULES = ["DrissionPage", "rich", "requests", "yaml", "tabulate"]
+
+# 默认的冷启动预算(毫秒)，指import main的累计导入耗时
+DEFAULT_BUDGET_MS = 100
+
+
+def measure_once(target: str) -> Tuple[Dict[str, Tuple[int, int]], float]:
+    """
+    在子进程中导入目标模块一次
+
+    Args:
+        target: 要导入的模块名
+
+    Returns:
+        Tuple[Dict[str, Tuple[int, int]], float]:
+            模块名到(自身耗时, 累计耗时)微秒数的映射，以及子进程总耗时(秒)
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        tail = result.stderr.strip().splitlines()[-5:]
+        raise RuntimeError(f"导入 {target} 失败:\n" + "\n".join(tail))
+
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, self_us, cumulative_us, name = [
+                part.strip() for part in line.replace("import time:", "|").split("|")
+            ]
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules, elapsed
+
+
+def measure(target: str, repeat: int) -> Tuple[Dict[str, Tuple[int, int]], float]:
+    """
+    重复测量并取每个模块的最小值，降低噪声
+
+    Args:
+        target: 要导入的模块名
+        repeat: 重复次数
+
+    Returns:
+        Tuple[Dict[str, Tuple[int, int]], float]: 最小导入耗时和最小进程耗时
+    """
+    best: Dict[str, Tuple[int, int]] = {}
+    best_elapsed = float("inf")
+    for _ in range(repeat):
+        modules, elapsed = measure_once(target)
+        best_elapsed = min(best_elapsed, elapsed)
+        for name, (self_us, cumulative_us) in modules.items():
+            if name in best:
+                self_us = min(self_us, best[name][0])
+                cumulative_us = min(cumulative_us, best[name][1])
+            best[name] = (self_us, cumulative_us)
+    return best, best_elapsed
+
+
+def main() -> int:
+    """
+    运行基准测试
+
+    Returns:
+        int: 退出码，超出预算或提前导入了重量级依赖时为1
+    """
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--target", default="main", help="要导入的模块，默认为main")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="目标模块累计导入耗时预算(毫秒)",
+    )
+    parser.add_argument("--top", type=int, default=15, help="显示耗时最多的模块数量")
+    parser.add_argument("--json", help="将结果写入JSON文件，便于长期对比")
+    args = parser.parse_args()
+
+    modules, elapsed = measure(args.target, max(1, args.repeat))
+    total_ms = modules.get(args.target, (0, 0))[1] / 1000
+
+    print(f"进程总耗时(含解释器启动): {elapsed * 1000:.1f} ms")
+    print(f"import {args.target} 累计耗时: {total_ms:.1f} ms (预算 {args.budget_ms:.0f} ms)")
+    print()
+    print(f"{'模块':<50} {'自身(ms)':>10} {'累计(ms)':>10}")
+    ranked: List[Tuple[str, Tuple[int, int]]] = sorted(
+        modules.items(), key=lambda item: item[1][0], reverse=True
+    )
+    for name, (self_us, cumulative_us) in ranked[: args.top]:
+        print(f"{name:<50} {self_us / 1000:>10.2f} {cumulative_us / 1000:>10.2f}")
+
+    eager = [
+        name
+        for name in LAZY_MODULES
+        if any(module == name or module.startswith(f"{name}.") for module in modules)
+    ]
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "target": args.target,
+                    "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "process_ms": round(elapsed * 1000, 3),
+                    "import_ms": round(total_ms, 3),
+                    "budget_ms": args.budget_ms,
+                    "eager_heavy_modules": eager,
+                    "modules": {
+                        name: {"self_us": s, "cumulative_us": c}
+                        for name, (s, c) in modules.items()
+                    },
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    failed = False
+    if eager:
+        print(f"\n❌ 以下依赖应按需导入，但在启动时被加载: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\n❌ 启动耗时 {total_ms:.1f} ms 超出预算 {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ 启动耗时在预算内")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
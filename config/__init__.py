@@ -7,10 +7,21 @@
 """
 
 from .settings import *
-from .user_config import load_config, get_config, create_default_config, DEFAULT_CONFIG
+from .user_config import (
+    load_config,
+    get_config,
+    reload_config,
+    reload_config_if_changed,
+    on_config_change,
+    create_default_config,
+    ConfigError,
+    DEFAULT_CONFIG,
+)
 
 __all__ = [
     # 从settings.py导出
+    "BASE_URL",
+    "CONNECT_BASE_URL",
     "HOME_URL",
     "PAGE_URL",
     "LOGIN_URL",
@@ -29,9 +40,26 @@ __all__ = [
     "LIKE_PROBABILITY",
     "DEFAULT_RETRY_TIMES",
     "DEFAULT_RETRY_DELAY",
+    "DEFAULT_RETRY_BACKOFF",
+    "DEFAULT_RETRY_MAX_DELAY",
+    "DEFAULT_RETRY_JITTER",
+    "RUN_RETRY_BUDGET",
+    "RUN_RETRY_DEADLINE",
     "SERVER_PUSH_RETRY_TIMES",
     "SERVER_PUSH_RETRY_INTERVAL_MIN",
     "SERVER_PUSH_RETRY_INTERVAL_MAX",
+    "NOTIFICATION_CHANNEL_TIMEOUT",
+    "NOTIFICATION_TOTAL_TIMEOUT",
+    "NOTIFICATION_FLUSH_TIMEOUT",
+    "HTTP_POOL_MAXSIZE",
+    "HTTP_RETRY_TIMES",
+    "HTTP_RETRY_BACKOFF",
+    "OUTBOX_PATH",
+    "OUTBOX_RETRY_BASE",
+    "OUTBOX_RETRY_MAX",
+    "OUTBOX_MAX_AGE",
+    "OUTBOX_CLAIM_LEASE",
+    "OUTBOX_POLL_INTERVAL",
     "REGEX_TABLE",
     "REGEX_TR",
     "REGEX_TD_TH",
@@ -40,11 +68,68 @@ __all__ = [
     "REGEX_SC3_UID",
     "NOTIFICATION_TITLE",
     "NOTIFICATION_SUCCESS_PREFIX",
+    "NOTIFICATION_FAILURE_PREFIX",
+    "NOTIFICATION_DIGEST_PREFIX",
+    "BROWSER_ADDRESS",
+    "BROWSER_SERVER_PORT",
+    "BROWSER_PROFILE_DIR",
+    "BROWSER_HEALTH_INTERVAL",
+    "BROWSER_HEALTH_FAILURES",
+    "BROWSER_IDLE_RESTART",
+    "ACCOUNT_CONCURRENCY",
+    "ACCOUNT_TIMEOUT",
+    "ACCOUNT_PROFILE_DIR",
+    "MEMORY_RSS_LIMIT_MB",
+    "MEMORY_HEAP_LIMIT_MB",
+    "TASK_GRAPH_WORKERS",
+    "CHECKPOINT_DIR",
+    "CHECKPOINT_WINDOW",
+    "TIME_BUDGET_RESERVE",
+    "TIME_BUDGET_SHARES",
+    "TIME_BUDGET_TOPIC_ESTIMATE",
+    "TIME_BUDGET_MIN_DWELL_SCALE",
+    "FIXTURE_DIR",
+    "DAEMON_INTERVAL",
+    "DAEMON_JITTER",
+    "DAEMON_STATE_PATH",
+    "METRICS_DIR",
+    "TRACE_JSON_PATH",
+    "TRACE_PROM_PATH",
+    "TRACE_MAX_RECORDS",
+    "TRACE_HISTOGRAM_BUCKETS",
+    "METRICS_PROM_PATH",
+    "METRICS_STATE_PATH",
+    "METRICS_HOST",
+    "METRICS_PORT",
+    "CDP_STATS",
+    "CDP_STATS_TOP_N",
+    "NETWORK_STATS",
+    "NETWORK_STATS_TOP_N",
+    "LEAK_CHECK",
+    "LEAK_CHECK_FRAMES",
+    "LEAK_CHECK_TOP_N",
+    "LEAK_CHECK_MIN_CYCLES",
+    "PROFILE_DIR",
+    "PROFILE_INTERVAL",
+    "PROFILE_MAX_DEPTH",
+    "PROFILE_TOP_N",
+    "PROFILE_THREAD_PREFIXES",
     "LOG_LEVEL",
     "LOG_FORMAT",
+    "LOG_FILE",
+    "LOG_ROTATION",
+    "LOG_RETENTION",
+    "LOG_COMPRESSION",
+    "LOG_JSON",
+    "LOG_MODULE_LEVELS",
+    "LOG_SAMPLE_EVERY",
     # 从user_config.py导出
     "load_config",
     "get_config",
+    "reload_config",
+    "reload_config_if_changed",
+    "on_config_change",
     "create_default_config",
+    "ConfigError",
     "DEFAULT_CONFIG",
 ]
@@ -13,10 +13,16 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent.absolute()
 
 # ================ 网站URL配置 ================
-HOME_URL = "https://linux.do/"
-PAGE_URL = "https://linux.do/new"
-LOGIN_URL = "https://linux.do/login"
-CONNECT_URL = "https://connect.linux.do/"
+BASE_URL = os.environ.get(
+    "LINUXDO_BASE_URL", "https://linux.do"
+).rstrip("/")  # 论坛地址，可指向本地模拟服务器(benchmarks/mock_server.py)
+CONNECT_BASE_URL = os.environ.get(
+    "LINUXDO_CONNECT_URL", "https://connect.linux.do"
+).rstrip("/")  # 连接信息页面地址
+HOME_URL = f"{BASE_URL}/"
+PAGE_URL = f"{BASE_URL}/new"
+LOGIN_URL = f"{BASE_URL}/login"
+CONNECT_URL = f"{CONNECT_BASE_URL}/"
 
 # ================ 选择器配置 ================
 SELECTOR_CURRENT_USER = "#current-user"
@@ -37,9 +43,28 @@ LIKE_PROBABILITY = 0.3  # 点赞概率
 # ================ 重试参数配置 ================
 DEFAULT_RETRY_TIMES = 3  # 默认重试次数
 DEFAULT_RETRY_DELAY = 1  # 默认重试延迟(秒)
+DEFAULT_RETRY_BACKOFF = 2.0  # 重试延迟的指数退避倍数
+DEFAULT_RETRY_MAX_DELAY = 30  # 单次重试延迟上限(秒)
+DEFAULT_RETRY_JITTER = 0.2  # 重试延迟的随机抖动比例
+RUN_RETRY_BUDGET = 20  # 单次运行内所有嵌套重试共享的重试次数上限
+RUN_RETRY_DEADLINE = 1800  # 单次运行内允许重试的截止时间(秒)，超过后不再重试
 SERVER_PUSH_RETRY_TIMES = 5  # Server酱推送重试次数
 SERVER_PUSH_RETRY_INTERVAL_MIN = 180  # 最小重试间隔(秒)
 SERVER_PUSH_RETRY_INTERVAL_MAX = 360  # 最大重试间隔(秒)
+NOTIFICATION_CHANNEL_TIMEOUT = 30  # 单个通知渠道的最长等待时间(秒)
+NOTIFICATION_TOTAL_TIMEOUT = 60  # 所有通知渠道的总等待时间(秒)
+NOTIFICATION_FLUSH_TIMEOUT = 10  # 程序退出前等待发件箱投递的时间(秒)
+HTTP_POOL_MAXSIZE = 4  # 每个通知渠道HTTP连接池的最大连接数
+HTTP_RETRY_TIMES = 2  # 传输层重试次数(仅针对请求尚未发出的连接错误)
+HTTP_RETRY_BACKOFF = 0.5  # 传输层重试的退避系数(秒)
+
+# ================ 通知发件箱配置 ================
+OUTBOX_PATH = ROOT_DIR / "notification_outbox.db"  # 发件箱数据库路径
+OUTBOX_RETRY_BASE = 60  # 投递失败后的基础退避间隔(秒)
+OUTBOX_RETRY_MAX = 3600  # 投递失败后的最大退避间隔(秒)
+OUTBOX_MAX_AGE = 86400  # 消息最长保留时间(秒)，超过后丢弃
+OUTBOX_CLAIM_LEASE = 120  # 领取消息后的租约时长(秒)，防止重复投递
+OUTBOX_POLL_INTERVAL = 5  # 投递线程的轮询间隔(秒)
 
 # ================ 正则表达式模式 ================
 REGEX_TABLE = r"<table>(.*?)</table>"
@@ -52,7 +77,138 @@ REGEX_SC3_UID = r"sct(\d+)t"
 # ================ 通知配置 ================
 NOTIFICATION_TITLE = "LINUX DO"  # 通知标题
 NOTIFICATION_SUCCESS_PREFIX = "✅每日登录成功"  # 成功通知前缀
+NOTIFICATION_FAILURE_PREFIX = "❌每日登录失败"  # 失败通知前缀
+NOTIFICATION_DIGEST_PREFIX = "📬运行结果汇总"  # 汇总通知前缀
+
+# ================ 浏览器配置 ================
+BROWSER_ADDRESS = os.environ.get(
+    "LINUXDO_BROWSER_ADDRESS"
+)  # 已运行浏览器的调试地址(如127.0.0.1:9222)，设置后复用该浏览器而不是自行启动
+BROWSER_SERVER_PORT = 9222  # 常驻浏览器的远程调试端口
+BROWSER_PROFILE_DIR = ROOT_DIR / "browser_profile"  # 常驻浏览器的用户数据目录
+BROWSER_HEALTH_INTERVAL = 30  # 常驻浏览器健康检查间隔(秒)
+BROWSER_HEALTH_FAILURES = 2  # 连续健康检查失败多少次后重启
+BROWSER_IDLE_RESTART = 4 * 3600  # 常驻浏览器空闲超过该时长后重启以回收内存(秒)
+
+# ================ 多账号配置 ================
+ACCOUNT_CONCURRENCY = 2  # 多账号模式下同时运行的账号数量
+ACCOUNT_TIMEOUT = 1800  # 单个账号的运行超时时间(秒)，超时后终止该账号的进程
+ACCOUNT_PROFILE_DIR = ROOT_DIR / "profiles"  # 各账号独立的浏览器用户数据目录
+
+# ================ 内存控制配置 ================
+MEMORY_RSS_LIMIT_MB = int(
+    os.environ.get("LINUXDO_MEMORY_RSS_LIMIT_MB", 2048)
+)  # 浏览器进程树总RSS上限(MB)，超过后在主题之间重启浏览器，0表示不限制
+MEMORY_HEAP_LIMIT_MB = int(
+    os.environ.get("LINUXDO_MEMORY_HEAP_LIMIT_MB", 512)
+)  # 单个标签页JS堆上限(MB)，超过后重建该标签页，0表示不限制
+
+# ================ 任务图配置 ================
+TASK_GRAPH_WORKERS = 4  # 单次运行中同时执行的最大任务数
+
+# ================ 断点续跑配置 ================
+CHECKPOINT_DIR = ROOT_DIR / "checkpoints"  # 各账号运行进度的检查点目录
+CHECKPOINT_WINDOW = int(
+    os.environ.get("LINUXDO_CHECKPOINT_WINDOW", 3600)
+)  # 检查点有效期(秒)，在此时间内重新运行时从检查点继续，0表示不续跑
+
+# ================ 时间预算配置 ================
+TIME_BUDGET_RESERVE = 60  # 为签到后连接信息和通知保留的时间(秒)，最多为总预算的一半
+TIME_BUDGET_SHARES = {
+    "login": 0.2,
+    "connect-before": 0.1,
+    "topic-list": 0.1,
+}  # 浏览前各阶段的重试截止时间占总预算的比例，剩余时间留给浏览
+TIME_BUDGET_TOPIC_ESTIMATE = 40  # 浏览一个主题的初始估计耗时(秒)
+TIME_BUDGET_MIN_DWELL_SCALE = 0.25  # 时间不足时停留时间最多缩短到原来的比例
+
+# ================ 录制回放配置 ================
+FIXTURE_DIR = ROOT_DIR / "fixtures"  # 录制的夹具归档默认保存目录
+
+# ================ 常驻模式配置 ================
+DAEMON_INTERVAL = 6 * 3600  # 常驻模式下的执行间隔(秒)
+DAEMON_JITTER = 600  # 每次执行时间的随机延后上限(秒)
+DAEMON_STATE_PATH = ROOT_DIR / "daemon_state.json"  # 上次执行时间的记录文件
+
+# ================ 追踪配置 ================
+METRICS_DIR = Path(
+    os.environ.get("LINUXDO_METRICS_DIR", ROOT_DIR / "metrics")
+)  # 追踪和指标文件的输出目录(可指向node-exporter的textfile目录)
+TRACE_JSON_PATH = METRICS_DIR / "trace.json"  # 追踪数据JSON文件
+TRACE_PROM_PATH = METRICS_DIR / "linuxdo_autoread_trace.prom"  # Prometheus textfile
+TRACE_MAX_RECORDS = 5000  # 每次运行保留的span明细记录上限
+TRACE_HISTOGRAM_BUCKETS = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+)  # 延迟直方图的桶边界(秒)
+
+# ================ 指标配置 ================
+METRICS_PROM_PATH = METRICS_DIR / "linuxdo_autoread_metrics.prom"  # 指标textfile
+METRICS_STATE_PATH = METRICS_DIR / "metrics.json"  # 跨运行累计的指标数据
+METRICS_HOST = os.environ.get("LINUXDO_METRICS_HOST", "127.0.0.1")  # 指标端点监听地址
+METRICS_PORT = int(
+    os.environ.get("LINUXDO_METRICS_PORT", 9464)
+)  # 常驻模式下指标端点的端口，0表示不启动
+
+# ================ CDP统计配置 ================
+CDP_STATS = os.environ.get("LINUXDO_CDP_STATS", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)  # 是否统计每次运行的CDP调用次数、耗时和返回字节数
+CDP_STATS_TOP_N = 10  # 报告中列出的调用最多的调用方和CDP方法数量
+
+# ================ 网络流量统计配置 ================
+NETWORK_STATS = os.environ.get("LINUXDO_NETWORK_STATS", "1").lower() in (
+    "1",
+    "true",
+    "yes",
+)  # 是否按阶段、资源类型和主机统计浏览器传输的字节数
+NETWORK_STATS_TOP_N = 10  # 报告中列出的流量最大的主机数量
+
+# ================ 内存泄漏诊断配置 ================
+LEAK_CHECK = os.environ.get("LINUXDO_LEAK_CHECK", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)  # 是否启用tracemalloc内存泄漏诊断
+LEAK_CHECK_FRAMES = 10  # 每次分配保留的调用栈深度
+LEAK_CHECK_TOP_N = 10  # 报告的持续增长分配位置数量
+LEAK_CHECK_MIN_CYCLES = 3  # 连续增长多少轮后才报告
+
+# ================ 性能分析配置 ================
+PROFILE_DIR = METRICS_DIR / "profiles"  # 采样分析结果输出目录
+PROFILE_INTERVAL = 0.01  # 采样间隔(秒)
+PROFILE_MAX_DEPTH = 128  # 调用栈最大采样深度
+PROFILE_TOP_N = 15  # 汇总输出的模块数量
+PROFILE_THREAD_PREFIXES = ("task",)  # 除主线程外被采样的线程名前缀(任务图的工作线程)
 
 # ================ 日志配置 ================
 LOG_LEVEL = "INFO"  # 日志级别
 LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"  # 日志格式
+LOG_FILE = ROOT_DIR / "linuxdo-autoread.log"  # 日志文件路径
+LOG_ROTATION = "10 MB"  # 日志文件达到该大小时轮转
+LOG_RETENTION = "7 days"  # 轮转后的日志保留时长
+LOG_COMPRESSION = "gz"  # 轮转后的日志压缩格式
+LOG_JSON = os.environ.get("LINUXDO_LOG_JSON", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)  # 日志文件是否写入JSON格式的结构化记录
+LOG_MODULE_LEVELS = dict(
+    tuple(part.strip() for part in item.split("=", 1))
+    for item in os.environ.get("LINUXDO_LOG_LEVELS", "").split(",")
+    if "=" in item
+)  # 各模块的日志级别，如"core.topic_browser=DEBUG,utils.notification=WARNING"
+LOG_SAMPLE_EVERY = 5  # 逐步滚动的调试日志每隔多少步记录一次
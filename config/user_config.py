@@ -4,13 +4,18 @@
 用户配置模块
 
 本模块用于管理用户可自定义的配置项，并提供配置的加载和验证功能
+
+配置在首次访问时才会加载，加载后经过校验并缓存为不可变对象，
+多线程读取无需加锁；长驻进程可通过reload_config_if_changed()在配置文件变化时重新加载
 """
 
 import os
 import json
-import yaml
+import copy
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Mapping, List, Callable, Tuple
 
 # ================ 默认用户配置 ================
 # 默认配置，请勿直接修改此处，请在config.json或config.yaml中修改
@@ -20,6 +25,10 @@ DEFAULT_CONFIG = {
     "password": None,  # Linux.Do 密码
     "browse_enabled": True,  # 是否启用浏览功能
     "max_topics": 30,  # 每次浏览的主题数量
+    "time_budget": 0,  # 单次运行的时间预算(秒)，0表示不限制
+    # 多账号配置，每项至少包含username和password，可单独覆盖browse_enabled和max_topics
+    # 非空时进入多账号模式，忽略上面的单账号配置
+    "accounts": [],
     # 通知配置
     "notifications": {
         "gotify": {
@@ -29,134 +38,462 @@ DEFAULT_CONFIG = {
         "server_chan": {
             "push_key": None  # Server酱³ SendKey
         },
+        "digest_window": 0,  # 成功通知的汇总窗口(秒)，0表示不汇总、立即发送
     },
 }
 
-# 当前配置，将在load_config()函数中被更新
-config = DEFAULT_CONFIG.copy()
+# 配置项的类型约束，None表示允许为空
+_SCHEMA: Dict[str, Any] = {
+    "username": (str, None),
+    "password": (str, None),
+    "browse_enabled": (bool,),
+    "max_topics": (int,),
+    "time_budget": (int, float),
+    "accounts": (list,),
+    "notifications": {
+        "gotify": {"url": (str, None), "token": (str, None)},
+        "server_chan": {"push_key": (str, None)},
+        "digest_window": (int,),
+    },
+}
 
+# 非负数值配置项
+_NON_NEGATIVE = ["max_topics", "time_budget", "notifications.digest_window"]
 
-def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+# 多账号配置中每个账号的类型约束
+_ACCOUNT_SCHEMA: Dict[str, Any] = {
+    "username": (str,),
+    "password": (str,),
+    "browse_enabled": (bool, None),
+    "max_topics": (int, None),
+}
+
+
+class ConfigError(ValueError):
+    """配置校验失败"""
+
+
+class _ConfigCache:
+    """已加载配置的缓存，记录配置来源以便检测变化"""
+
+    def __init__(self):
+        self.config: Optional[Mapping[str, Any]] = None
+        self.requested_path: Optional[str] = None  # 调用方指定的路径
+        self.source_path: Optional[Path] = None  # 实际使用的配置文件
+        self.source_mtime: Optional[float] = None
+        self.lock = threading.RLock()
+        self.listeners: List[Callable[[Mapping[str, Any]], None]] = []
+
+
+_cache = _ConfigCache()
+
+
+def _find_config_file(config_path: Optional[str]) -> Optional[Path]:
     """
-    加载用户配置
+    定位配置文件
+
+    Args:
+        config_path: 配置文件路径，为None时在常见位置查找
+
+    Returns:
+        Optional[Path]: 找到的配置文件路径
+    """
+    if config_path:
+        path = Path(config_path)
+        return path if path.exists() else None
+
+    base_dir = Path(__file__).parent.parent.absolute()
+    possible_paths = [
+        base_dir / "config.json",
+        base_dir / "config.yaml",
+        base_dir / "config.yml",
+        Path.home() / ".config" / "linuxdo-autoread" / "config.json",
+        Path.home() / ".config" / "linuxdo-autoread" / "config.yaml",
+    ]
+
+    for path in possible_paths:
+        if path.exists():
+            return path
+    return None
+
+
+def _yaml_loader() -> Any:
+    """
+    获取YAML加载器，优先使用基于libyaml的C实现
+
+    yaml只在实际读写YAML配置时才导入
+
+    Returns:
+        Any: YAML SafeLoader类
+    """
+    import yaml
+
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _read_config_file(path: Path) -> Dict[str, Any]:
+    """
+    读取并解析配置文件
+
+    Args:
+        path: 配置文件路径
+
+    Returns:
+        Dict[str, Any]: 配置文件内容
+    """
+    file_ext = path.suffix.lower()
+
+    with open(path, "r", encoding="utf-8") as f:
+        if file_ext == ".json":
+            user_config = json.load(f)
+        elif file_ext in [".yaml", ".yml"]:
+            import yaml
+
+            user_config = yaml.load(f, Loader=_yaml_loader())
+        else:
+            raise ValueError(f"不支持的配置文件格式: {file_ext}")
+
+    return user_config or {}
+
+
+def _build_config(config_path: Optional[str]) -> Tuple[Dict[str, Any], Optional[Path]]:
+    """
+    从默认配置、配置文件和环境变量构建一份新的配置并校验
 
     Args:
         config_path: 配置文件路径，默认为None(自动搜索)
 
     Returns:
-        Dict[str, Any]: 加载后的配置字典
-    """
-    global config
-
-    # 如果未指定配置文件路径，则尝试在常见位置查找
-    if not config_path:
-        base_dir = Path(__file__).parent.parent.absolute()
-        possible_paths = [
-            base_dir / "config.json",
-            base_dir / "config.yaml",
-            base_dir / "config.yml",
-            Path.home() / ".config" / "linuxdo-autoread" / "config.json",
-            Path.home() / ".config" / "linuxdo-autoread" / "config.yaml",
-        ]
-
-        for path in possible_paths:
-            if path.exists():
-                config_path = str(path)
-                break
-
-    # 如果找到配置文件，则加载它
-    if config_path and Path(config_path).exists():
-        file_ext = Path(config_path).suffix.lower()
+        Tuple[Dict[str, Any], Optional[Path]]: 配置字典和实际使用的配置文件
+    """
+    cfg = copy.deepcopy(DEFAULT_CONFIG)
 
+    source = _find_config_file(config_path)
+    if source is not None:
         try:
-            if file_ext == ".json":
-                with open(config_path, "r", encoding="utf-8") as f:
-                    user_config = json.load(f)
-            elif file_ext in [".yaml", ".yml"]:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    user_config = yaml.safe_load(f)
-            else:
-                raise ValueError(f"不支持的配置文件格式: {file_ext}")
-
-            # 更新配置
-            _update_config(user_config)
-
+            _update_config(cfg, _read_config_file(source))
         except Exception as e:
-            print(f"加载配置文件 {config_path} 时出错: {str(e)}")
+            print(f"加载配置文件 {source} 时出错: {str(e)}")
 
     # 尝试从环境变量加载配置
-    _load_from_env()
+    _load_from_env(cfg)
 
-    # 返回配置字典的副本
-    return config.copy()
+    _validate(cfg)
+    return cfg, source
 
 
-def _update_config(user_config: Dict[str, Any]) -> None:
+def _update_config(cfg: Dict[str, Any], user_config: Dict[str, Any]) -> None:
     """
     使用用户配置更新默认配置
 
     Args:
+        cfg: 待更新的配置字典
         user_config: 用户配置字典
     """
-    global config
-
     # 更新顶级配置项
-    for key in ["username", "password", "browse_enabled", "max_topics"]:
+    for key in [
+        "username",
+        "password",
+        "browse_enabled",
+        "max_topics",
+        "time_budget",
+        "accounts",
+    ]:
         if key in user_config:
-            config[key] = user_config[key]
+            cfg[key] = user_config[key]
 
     # 更新通知配置
     if "notifications" in user_config:
-        notifications = user_config["notifications"]
+        notifications = user_config["notifications"] or {}
 
         # 更新Gotify配置
         if "gotify" in notifications:
-            gotify = notifications["gotify"]
+            gotify = notifications["gotify"] or {}
             for key in ["url", "token"]:
                 if key in gotify:
-                    config["notifications"]["gotify"][key] = gotify[key]
+                    cfg["notifications"]["gotify"][key] = gotify[key]
 
         # 更新Server酱配置
         if "server_chan" in notifications:
-            server_chan = notifications["server_chan"]
+            server_chan = notifications["server_chan"] or {}
             if "push_key" in server_chan:
-                config["notifications"]["server_chan"]["push_key"] = server_chan[
+                cfg["notifications"]["server_chan"]["push_key"] = server_chan[
                     "push_key"
                 ]
 
+        # 更新汇总窗口
+        if "digest_window" in notifications:
+            cfg["notifications"]["digest_window"] = notifications["digest_window"]
 
-def _load_from_env() -> None:
-    """从环境变量加载配置"""
-    global config
 
+def _load_from_env(cfg: Dict[str, Any]) -> None:
+    """
+    从环境变量加载配置
+
+    Args:
+        cfg: 待更新的配置字典
+    """
     # 核心配置
     if os.environ.get("LINUXDO_USERNAME"):
-        config["username"] = os.environ.get("LINUXDO_USERNAME")
+        cfg["username"] = os.environ.get("LINUXDO_USERNAME")
     elif os.environ.get("USERNAME"):  # 备用字段
-        config["username"] = os.environ.get("USERNAME")
+        cfg["username"] = os.environ.get("USERNAME")
 
     if os.environ.get("LINUXDO_PASSWORD"):
-        config["password"] = os.environ.get("LINUXDO_PASSWORD")
+        cfg["password"] = os.environ.get("LINUXDO_PASSWORD")
     elif os.environ.get("PASSWORD"):  # 备用字段
-        config["password"] = os.environ.get("PASSWORD")
+        cfg["password"] = os.environ.get("PASSWORD")
 
     # 浏览功能
     if "BROWSE_ENABLED" in os.environ:
         value = os.environ.get("BROWSE_ENABLED", "").strip().lower()
-        config["browse_enabled"] = value not in ["false", "0", "off"]
+        cfg["browse_enabled"] = value not in ["false", "0", "off"]
+
+    # 时间预算
+    if os.environ.get("LINUXDO_TIME_BUDGET"):
+        try:
+            cfg["time_budget"] = float(os.environ.get("LINUXDO_TIME_BUDGET"))
+        except ValueError:
+            print("环境变量 LINUXDO_TIME_BUDGET 必须为秒数，已忽略")
 
     # Gotify配置
     if os.environ.get("GOTIFY_URL"):
-        config["notifications"]["gotify"]["url"] = os.environ.get("GOTIFY_URL")
+        cfg["notifications"]["gotify"]["url"] = os.environ.get("GOTIFY_URL")
     if os.environ.get("GOTIFY_TOKEN"):
-        config["notifications"]["gotify"]["token"] = os.environ.get("GOTIFY_TOKEN")
+        cfg["notifications"]["gotify"]["token"] = os.environ.get("GOTIFY_TOKEN")
 
     # Server酱配置
     if os.environ.get("SC3_PUSH_KEY"):
-        config["notifications"]["server_chan"]["push_key"] = os.environ.get(
+        cfg["notifications"]["server_chan"]["push_key"] = os.environ.get(
             "SC3_PUSH_KEY"
         )
 
+    # 通知汇总窗口
+    if os.environ.get("NOTIFICATION_DIGEST_WINDOW"):
+        try:
+            cfg["notifications"]["digest_window"] = int(
+                os.environ.get("NOTIFICATION_DIGEST_WINDOW")
+            )
+        except ValueError:
+            print("环境变量 NOTIFICATION_DIGEST_WINDOW 必须为整数秒数，已忽略")
+
+
+def _validate(cfg: Dict[str, Any]) -> None:
+    """
+    按_SCHEMA校验配置类型
+
+    Args:
+        cfg: 配置字典
+
+    Raises:
+        ConfigError: 配置不合法
+    """
+    errors: List[str] = []
+
+    def check(value: Any, schema: Any, path: str) -> None:
+        if isinstance(schema, dict):
+            if not isinstance(value, dict):
+                errors.append(f"{path} 必须为对象")
+                return
+            for key, sub_schema in schema.items():
+                check(value.get(key), sub_schema, f"{path}.{key}" if path else key)
+            return
+
+        allow_none = None in schema
+        types = tuple(t for t in schema if t is not None)
+        if value is None:
+            if not allow_none:
+                errors.append(f"{path} 不能为空")
+            return
+        # bool是int的子类，整数配置项不接受布尔值
+        if (bool not in types and isinstance(value, bool)) or not isinstance(
+            value, types
+        ):
+            type_names = "/".join(t.__name__ for t in types)
+            errors.append(f"{path} 类型错误，应为 {type_names}")
+
+    check(cfg, _SCHEMA, "")
+
+    accounts = cfg.get("accounts")
+    if isinstance(accounts, list):
+        usernames = set()
+        for index, account in enumerate(accounts):
+            check(account, _ACCOUNT_SCHEMA, f"accounts[{index}]")
+            if not isinstance(account, dict):
+                continue
+            max_topics = account.get("max_topics")
+            if isinstance(max_topics, int) and max_topics < 0:
+                errors.append(f"accounts[{index}].max_topics 不能为负数")
+            if account.get("username") in usernames:
+                errors.append(f"accounts[{index}].username 重复")
+            usernames.add(account.get("username"))
+
+    for path in _NON_NEGATIVE:
+        value: Any = cfg
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(value, (int, float)) and value < 0:
+            errors.append(f"{path} 不能为负数")
+
+    if errors:
+        raise ConfigError("配置校验失败: " + "; ".join(errors))
+
+
+def _freeze(value: Any) -> Any:
+    """
+    将配置递归转换为不可变对象
+
+    Args:
+        value: 配置值
+
+    Returns:
+        Any: 不可变的配置值
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """
+    将不可变配置递归转换为普通字典，供调用方自由修改
+
+    Args:
+        value: 不可变的配置值
+
+    Returns:
+        Any: 可修改的配置值
+    """
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _file_mtime(path: Optional[Path]) -> Optional[float]:
+    """
+    获取文件修改时间，文件不存在时返回None
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Optional[float]: 修改时间
+    """
+    try:
+        return path.stat().st_mtime if path else None
+    except OSError:
+        return None
+
+
+def _load_into_cache(config_path: Optional[str]) -> Mapping[str, Any]:
+    """
+    构建配置并写入缓存(调用方需持有缓存锁)
+
+    Args:
+        config_path: 配置文件路径
+
+    Returns:
+        Mapping[str, Any]: 不可变的配置对象
+    """
+    cfg, source = _build_config(config_path)
+    _cache.config = _freeze(cfg)
+    _cache.requested_path = config_path
+    _cache.source_path = source
+    _cache.source_mtime = _file_mtime(source)
+    return _cache.config
+
+
+def get_config() -> Mapping[str, Any]:
+    """
+    获取当前配置，首次调用时才加载
+
+    Returns:
+        Mapping[str, Any]: 不可变的配置对象，可直接在多线程中共享
+    """
+    config = _cache.config
+    if config is not None:
+        return config
+
+    with _cache.lock:
+        if _cache.config is None:
+            _load_into_cache(_cache.requested_path)
+        return _cache.config
+
+
+def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    加载用户配置
+
+    相同路径的配置只解析一次，之后直接使用缓存
+
+    Args:
+        config_path: 配置文件路径，默认为None(自动搜索)
+
+    Returns:
+        Dict[str, Any]: 加载后的配置字典(可修改的深拷贝，不影响缓存)
+    """
+    with _cache.lock:
+        if _cache.config is None or _cache.requested_path != config_path:
+            _load_into_cache(config_path)
+        return _thaw(_cache.config)
+
+
+def reload_config(config_path: Optional[str] = None) -> Mapping[str, Any]:
+    """
+    强制重新加载配置
+
+    Args:
+        config_path: 配置文件路径，默认沿用上次加载时的路径
+
+    Returns:
+        Mapping[str, Any]: 新的不可变配置对象
+    """
+    with _cache.lock:
+        config = _load_into_cache(config_path or _cache.requested_path)
+        listeners = list(_cache.listeners)
+
+    for listener in listeners:
+        try:
+            listener(config)
+        except Exception as e:
+            print(f"配置变更回调执行出错: {str(e)}")
+    return config
+
+
+def reload_config_if_changed() -> bool:
+    """
+    配置文件发生变化(修改、新建或删除)时重新加载，供长驻进程定期调用
+
+    Returns:
+        bool: 是否重新加载了配置
+    """
+    with _cache.lock:
+        if _cache.config is None:
+            return False
+        current = _find_config_file(_cache.requested_path)
+        changed = current != _cache.source_path or _file_mtime(
+            current
+        ) != _cache.source_mtime
+
+    if changed:
+        reload_config()
+    return changed
+
+
+def on_config_change(listener: Callable[[Mapping[str, Any]], None]) -> None:
+    """
+    注册配置重新加载后的回调
+
+    Args:
+        listener: 回调函数，参数为新的不可变配置对象
+    """
+    with _cache.lock:
+        _cache.listeners.append(listener)
+
 
 def create_default_config(config_path: str = "config.json") -> None:
     """
@@ -179,6 +516,8 @@ def create_default_config(config_path: str = "config.json") -> None:
             with open(path, "w", encoding="utf-8") as f:
                 json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
         elif file_ext in [".yaml", ".yml"]:
+            import yaml
+
             with open(path, "w", encoding="utf-8") as f:
                 yaml.dump(
                     DEFAULT_CONFIG, f, default_flow_style=False, allow_unicode=True
@@ -189,17 +528,3 @@ def create_default_config(config_path: str = "config.json") -> None:
         print(f"默认配置文件已创建: {path}")
     except Exception as e:
         print(f"创建配置文件时出错: {str(e)}")
-
-
-def get_config() -> Dict[str, Any]:
-    """
-    获取当前配置
-
-    Returns:
-        Dict[str, Any]: 当前配置字典的副本
-    """
-    return config.copy()
-
-
-# 初始化时自动加载配置
-load_config()
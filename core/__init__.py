@@ -4,24 +4,72 @@
 核心功能模块
 
 此模块集成了所有核心功能，包括浏览器管理、登录、主题浏览和连接信息等
+
+各子模块在首次使用时才会导入，避免在不需要浏览器的命令中加载DrissionPage和rich
 """
 
-from .browser import BrowserManager, browser_manager
-from .login import LoginManager, create_login_manager
-from .topic_browser import TopicBrowser, topic_browser
-from .connect_info import ConnectInfoManager, connect_info_manager
+import importlib
+from typing import Any, List
 
-__all__ = [
+# 导出名称 -> 所在子模块，首次访问时才导入对应子模块
+_EXPORTS = {
     # 从browser.py导出
-    "BrowserManager",
-    "browser_manager",
+    "BrowserManager": "browser",
+    "browser_manager": "browser",
+    "probe_browser": "browser",
+    # 从browser_server.py导出
+    "BrowserServer": "browser_server",
+    # 从accounts.py导出
+    "AccountPool": "accounts",
+    "ContextPool": "accounts",
+    "account_configs": "accounts",
+    # 从memory.py导出
+    "MemoryGovernor": "memory",
+    "memory_governor": "memory",
     # 从login.py导出
-    "LoginManager",
-    "create_login_manager",
+    "LoginManager": "login",
+    "create_login_manager": "login",
     # 从topic_browser.py导出
-    "TopicBrowser",
-    "topic_browser",
+    "TopicBrowser": "topic_browser",
+    "topic_browser": "topic_browser",
+    # 从session.py导出
+    "Session": "session",
+    "Runner": "session",
+    "RunReport": "session",
+    # 从replay.py导出
+    "PageCache": "replay",
+    # 从cdp_stats.py导出
+    "CdpCollector": "cdp_stats",
+    "collect_cdp": "cdp_stats",
+    # 从network_stats.py导出
+    "NetworkStats": "network_stats",
     # 从connect_info.py导出
-    "ConnectInfoManager",
-    "connect_info_manager",
-]
+    "ConnectInfoManager": "connect_info",
+    "connect_info_manager": "connect_info",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    按需导入子模块并返回导出对象(PEP 562)
+
+    Args:
+        name: 导出名称
+
+    Returns:
+        Any: 导出对象
+    """
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """列出包括延迟导出名称在内的模块属性"""
+    return sorted(set(globals()) | set(__all__))
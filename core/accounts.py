@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多账号模块
+
+将多账号配置拆分为单账号配置，并在有并发上限的池中运行:
+- AccountPool: 每个账号使用独立的进程、浏览器用户数据目录和调试端口
+- ContextPool: 所有账号共享一个浏览器，每个账号在独立的浏览器上下文中由线程运行
+结果都汇总回调用方
+"""
+
+import re
+import copy
+import time
+import queue
+import signal
+import socket
+import threading
+import multiprocessing
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from loguru import logger
+
+from config import ACCOUNT_CONCURRENCY, ACCOUNT_TIMEOUT, ACCOUNT_PROFILE_DIR
+from utils.tracing import tracer
+from utils.metrics import metrics
+from core.browser import BrowserManager
+
+# 单账号任务: (配置, 用户数据目录, 调试端口) -> None，失败时抛出异常或调用sys.exit(非0)
+AccountTarget = Callable[[Dict[str, Any], str, int], None]
+
+# 浏览器上下文中的单账号任务: (配置, 浏览器上下文) -> None
+ContextTarget = Callable[[Dict[str, Any], BrowserManager], None]
+
+
+def account_configs(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    将多账号配置拆分为各账号的完整配置
+
+    账号中的字段覆盖顶层同名配置，通知等其他配置沿用顶层
+
+    Args:
+        config: 包含accounts列表的配置字典
+
+    Returns:
+        List[Dict[str, Any]]: 各账号的配置字典
+    """
+    base = {key: value for key, value in config.items() if key != "accounts"}
+    configs = []
+    for account in config.get("accounts") or []:
+        cfg = copy.deepcopy(base)
+        cfg.update(
+            {key: value for key, value in account.items() if value is not None}
+        )
+        configs.append(cfg)
+    return configs
+
+
+def profile_dir_for(
+    username: str, root: Union[str, Path] = ACCOUNT_PROFILE_DIR
+) -> Path:
+    """
+    获取账号的浏览器用户数据目录
+
+    Args:
+        username: 用户名
+        root: 所有账号用户数据目录的父目录
+
+    Returns:
+        Path: 用户数据目录
+    """
+    return Path(root) / re.sub(r"[^\w.-]", "_", username)
+
+
+def find_free_port() -> int:
+    """
+    获取一个当前空闲的本地端口
+
+    Returns:
+        int: 端口号
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _raise_system_exit(signum, frame):
+    """将终止信号转换为SystemExit，使子进程中的finally块有机会关闭浏览器"""
+    raise SystemExit(128 + signum)
+
+
+def _worker(
+    target: AccountTarget,
+    index: int,
+    config: Dict[str, Any],
+    profile_dir: str,
+    results: "multiprocessing.Queue",
+) -> None:
+    """
+    子进程入口，运行单个账号并回传结果
+
+    Args:
+        target: 单账号任务
+        index: 账号序号
+        config: 账号配置
+        profile_dir: 浏览器用户数据目录
+        results: 结果队列
+    """
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+
+    started = time.time()
+    success, error = True, None
+    try:
+        Path(profile_dir).mkdir(parents=True, exist_ok=True)
+        target(config, profile_dir, find_free_port())
+    except SystemExit as e:
+        success = e.code in (0, None)
+        if not success:
+            error = f"退出码 {e.code}"
+    except BaseException as e:
+        success, error = False, str(e) or type(e).__name__
+
+    results.put(
+        {
+            "index": index,
+            "username": config.get("username"),
+            "success": success,
+            "error": error,
+            "duration": time.time() - started,
+            "finished": True,
+            # 追踪数据和指标随子进程退出丢失，回传给父进程合并后导出
+            "telemetry": {
+                "tracer": tracer.snapshot(),
+                "metrics": metrics.snapshot(),
+            },
+        }
+    )
+
+
+class AccountPool:
+    """有并发上限的多账号进程池"""
+
+    def __init__(
+        self,
+        target: AccountTarget,
+        concurrency: int = ACCOUNT_CONCURRENCY,
+        timeout: float = ACCOUNT_TIMEOUT,
+    ):
+        """
+        初始化进程池
+
+        Args:
+            target: 单账号任务，必须是模块级函数以便传给子进程
+            concurrency: 同时运行的账号数量
+            timeout: 单个账号的运行超时时间(秒)
+        """
+        self.target = target
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        # spawn方式启动子进程，不继承父进程的线程和浏览器连接
+        self._context = multiprocessing.get_context("spawn")
+
+    def run(self, configs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        运行所有账号，直到全部完成或超时
+
+        Args:
+            configs: 各账号的配置字典
+
+        Returns:
+            List[Dict[str, Any]]: 与configs顺序一致的结果，
+                包含username、success、error、duration，表示子进程是否
+                正常结束(而非超时或崩溃)的finished，以及正常结束时
+                子进程的追踪数据和指标telemetry
+        """
+        results_queue = self._context.Queue()
+        pending: Deque[int] = deque(range(len(configs)))
+        running: Dict[int, Tuple[Any, float]] = {}
+        results: Dict[int, Dict[str, Any]] = {}
+
+        while pending or running:
+            while pending and len(running) < self.concurrency:
+                index = pending.popleft()
+                process = self._start(index, configs[index], results_queue)
+                running[index] = (process, time.time())
+
+            self._collect(results_queue, results, timeout=0.5)
+
+            for index, (process, started) in list(running.items()):
+                if process.is_alive():
+                    if time.time() - started <= self.timeout:
+                        continue
+                    self._terminate(process, configs[index])
+                    results.setdefault(
+                        index, self._failure(configs[index], started, "运行超时")
+                    )
+                else:
+                    process.join()
+                    # 子进程退出前已写入结果，稍等片刻让其从管道中读出
+                    if index not in results:
+                        self._collect(results_queue, results, timeout=1.0)
+                    if index not in results:
+                        error = f"进程异常退出，退出码 {process.exitcode}"
+                        results[index] = self._failure(configs[index], started, error)
+                del running[index]
+
+        return [results[index] for index in range(len(configs))]
+
+    def _start(self, index: int, config: Dict[str, Any], results_queue: Any) -> Any:
+        """
+        启动一个账号的子进程
+
+        Args:
+            index: 账号序号
+            config: 账号配置
+            results_queue: 结果队列
+
+        Returns:
+            multiprocessing.Process: 子进程
+        """
+        username = config.get("username")
+        profile_dir = str(profile_dir_for(username))
+        process = self._context.Process(
+            target=_worker,
+            args=(self.target, index, config, profile_dir, results_queue),
+            name=f"account-{index}",
+        )
+        process.start()
+        logger.info(f"账号 {username} 开始运行 (进程 {process.pid})")
+        return process
+
+    def _terminate(self, process: Any, config: Dict[str, Any]) -> None:
+        """
+        终止超时的子进程，先发送SIGTERM让其关闭浏览器，仍未退出时强制结束
+
+        Args:
+            process: 子进程
+            config: 账号配置
+        """
+        logger.error(
+            f"账号 {config.get('username')} 运行超过 {self.timeout:.0f} 秒，终止进程"
+        )
+        process.terminate()
+        process.join(10)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    @staticmethod
+    def _collect(
+        results_queue: Any, results: Dict[int, Dict[str, Any]], timeout: float
+    ) -> None:
+        """
+        读取结果队列中已有的结果
+
+        Args:
+            results_queue: 结果队列
+            results: 账号序号 -> 结果
+            timeout: 等待第一个结果的时间(秒)
+        """
+        try:
+            result = results_queue.get(timeout=timeout)
+            while True:
+                # 超时终止的账号已记录超时结果，不被子进程退出时的结果覆盖
+                results.setdefault(result.pop("index"), result)
+                result = results_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    @staticmethod
+    def _failure(config: Dict[str, Any], started: float, error: str) -> Dict[str, Any]:
+        """
+        构造失败结果
+
+        Args:
+            config: 账号配置
+            started: 开始时间
+            error: 错误信息
+
+        Returns:
+            Dict[str, Any]: 结果
+        """
+        return {
+            "username": config.get("username"),
+            "success": False,
+            "error": error,
+            "duration": time.time() - started,
+            "finished": False,
+        }
+
+
+class ContextPool:
+    """
+    在共享浏览器的独立浏览器上下文中并发运行多账号的线程池
+
+    所有账号共用一个浏览器进程，内存占用远低于每个账号启动一个浏览器；
+    线程无法被强制终止，超时的账号通过销毁其浏览器上下文使后续操作尽快失败
+    """
+
+    def __init__(
+        self,
+        target: ContextTarget,
+        browser: Optional[BrowserManager] = None,
+        concurrency: int = ACCOUNT_CONCURRENCY,
+        timeout: float = ACCOUNT_TIMEOUT,
+    ):
+        """
+        初始化线程池
+
+        Args:
+            target: 单账号任务
+            browser: 提供共享浏览器的管理器，None表示创建新的管理器
+            concurrency: 同时运行的账号数量
+            timeout: 单个账号的运行超时时间(秒)
+        """
+        self.target = target
+        self.browser = browser or BrowserManager()
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # 账号序号 -> (浏览器上下文, 开始时间)
+        self._active: Dict[int, Tuple[BrowserManager, float]] = {}
+        self._expired = set()
+
+    def run(self, configs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        运行所有账号，直到全部完成
+
+        Args:
+            configs: 各账号的配置字典
+
+        Returns:
+            List[Dict[str, Any]]: 与configs顺序一致的结果，格式与AccountPool.run()相同
+        """
+        # 先在主线程中连接浏览器，避免多个线程同时启动浏览器
+        self.browser.connect()
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="account"
+        ) as executor:
+            futures = [
+                executor.submit(self._run_one, index, config)
+                for index, config in enumerate(configs)
+            ]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=0.5)
+                self._expire_overdue()
+
+        return [future.result() for future in futures]
+
+    def _expire_overdue(self) -> None:
+        """销毁运行超时的账号的浏览器上下文"""
+        now = time.time()
+        with self._lock:
+            overdue = [
+                (index, context)
+                for index, (context, started) in self._active.items()
+                if index not in self._expired and now - started > self.timeout
+            ]
+            self._expired.update(index for index, _ in overdue)
+
+        for index, context in overdue:
+            logger.error(
+                f"账号 {context.name} 运行超过 {self.timeout:.0f} 秒，销毁其浏览器上下文"
+            )
+            context.dispose()
+
+    def _run_one(self, index: int, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        在新的浏览器上下文中运行单个账号
+
+        Args:
+            index: 账号序号
+            config: 账号配置
+
+        Returns:
+            Dict[str, Any]: 运行结果
+        """
+        username = config.get("username")
+        started = time.time()
+        success, error = True, None
+        context: Optional[BrowserManager] = None
+        try:
+            context = self.browser.create_context(username)
+            with self._lock:
+                self._active[index] = (context, started)
+            logger.info(f"账号 {username} 开始运行 (浏览器上下文 {context.context_id})")
+            self.target(config, context)
+        except SystemExit as e:
+            success = e.code in (0, None)
+            if not success:
+                error = f"退出码 {e.code}"
+        except Exception as e:
+            success, error = False, str(e) or type(e).__name__
+        finally:
+            with self._lock:
+                self._active.pop(index, None)
+                timed_out = index in self._expired
+            if context is not None:
+                context.dispose()
+
+        if timed_out:
+            success, error = False, "运行超时"
+        return {
+            "username": username,
+            "success": success,
+            "error": error,
+            "duration": time.time() - started,
+            "finished": not timed_out,
+        }
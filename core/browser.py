@@ -6,23 +6,264 @@
 提供浏览器初始化、页面管理等功能
 """
 
+import json
 import time
-from typing import Optional, Any, Dict, List, Union, Callable
+import weakref
+import urllib.request
+from typing import Optional, Any, Dict, List, Union, Callable, TYPE_CHECKING
 from loguru import logger
-from DrissionPage import ChromiumPage
 
+from config import BROWSER_ADDRESS, NETWORK_STATS
 from utils.decorators import retry, log_entry_exit
+from utils.metrics import browser_restarts_total
+from utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from DrissionPage import ChromiumPage
+    from core.replay import PageCache
+    from core.network_stats import NetworkStats
+
+
+def probe_browser(address: str, timeout: float = 3.0) -> Optional[Dict[str, Any]]:
+    """
+    通过远程调试端口检查浏览器是否存活
+
+    Args:
+        address: 浏览器调试地址，如127.0.0.1:9222
+        timeout: 请求超时时间(秒)
+
+    Returns:
+        Optional[Dict[str, Any]]: /json/version返回的版本信息，浏览器不可用时返回None
+    """
+    try:
+        with urllib.request.urlopen(
+            f"http://{address}/json/version", timeout=timeout
+        ) as response:
+            return json.load(response)
+    except Exception:
+        return None
 
 
 class BrowserManager:
-    """浏览器管理器，负责创建和管理浏览器实例"""
+    """
+    浏览器管理器，负责创建和管理浏览器实例
+
+    设置了调试地址时附加到已运行的浏览器(见core/browser_server.py)，
+    页面以标签页形式打开，关闭时只关闭标签页而不退出浏览器，
+    以便后续运行继续复用浏览器进程、磁盘缓存和已登录的用户数据
+
+    通过create_context()可以在同一个浏览器中创建多个相互隔离的浏览器上下文
+    (类似无痕窗口，Cookie各自独立)，返回的上下文与BrowserManager接口一致
+    """
+
+    def __init__(self, address: Optional[str] = BROWSER_ADDRESS):
+        """
+        初始化浏览器管理器
+
+        Args:
+            address: 已运行浏览器的调试地址，None表示由每个页面自行启动浏览器
+        """
+        self.pages: Dict[str, "ChromiumPage"] = {}
+        self.main_page: Optional["ChromiumPage"] = None
+        self.address = address
+        # 自行启动浏览器时使用的用户数据目录和调试端口，None表示使用DrissionPage默认值
+        self.user_data_dir: Optional[str] = None
+        self.local_port: Optional[int] = None
+        # 与浏览器的共享连接，附加模式和浏览器上下文中的页面都是它的标签页
+        self._browser: Optional["ChromiumPage"] = None
+        # 浏览器上下文ID，None表示使用浏览器的默认上下文
+        self.context_id: Optional[str] = None
+        self.name = "default"
+        self.parent: Optional["BrowserManager"] = None
+        self.contexts: Dict[str, "BrowserManager"] = {}
+        # 自行启动浏览器时作为主页面标签页打开的页面
+        self._local_tabs: set = set()
+        # 录制回放缓存(见core/replay.py)，设置后新页面的请求都经过它
+        self.page_cache: Optional["PageCache"] = None
+        # 网络流量统计(见core/network_stats.py)，由会话在运行期间设置
+        self.network_stats: Optional["NetworkStats"] = None
+        # 创建过且仍未被回收的页面对象，用于发现关闭后仍被引用的页面
+        self._live_pages: "weakref.WeakSet[ChromiumPage]" = weakref.WeakSet()
+
+    @property
+    def attached(self) -> bool:
+        """是否附加到已运行的浏览器"""
+        return self.address is not None
+
+    def attach(self, address: Optional[str]) -> None:
+        """
+        切换要附加的浏览器，已打开的页面会先关闭
+
+        Args:
+            address: 浏览器调试地址，None表示恢复为自行启动浏览器
+        """
+        if address == self.address:
+            return
+        self.close_all_pages()
+        self.address = address
+        self._browser = None
+
+    def configure_launch(
+        self, user_data_dir: Optional[str] = None, port: Optional[int] = None
+    ) -> None:
+        """
+        设置自行启动浏览器时的用户数据目录和调试端口
+
+        同一台机器上运行多个浏览器时，每个浏览器都需要独立的目录和端口
+
+        Args:
+            user_data_dir: 用户数据目录
+            port: 远程调试端口
+        """
+        self.user_data_dir = user_data_dir
+        self.local_port = port
+
+    def _create_local_page(self) -> "ChromiumPage":
+        """
+        自行启动(或连接本地已启动的)浏览器并打开页面
+
+        Returns:
+            ChromiumPage: 页面实例
+        """
+        from DrissionPage import ChromiumOptions, ChromiumPage
+
+        if self.user_data_dir is None and self.local_port is None:
+            return ChromiumPage()
+
+        options = ChromiumOptions()
+        if self.local_port is not None:
+            options.set_local_port(self.local_port)
+        if self.user_data_dir is not None:
+            options.set_user_data_path(self.user_data_dir)
+        return ChromiumPage(addr_or_opts=options)
+
+    def connect(self) -> "ChromiumPage":
+        """
+        获取与浏览器的共享连接，附加模式下连接调试地址，否则启动本地浏览器
+
+        多个线程同时创建浏览器上下文前应先在主线程中调用一次
+
+        Returns:
+            ChromiumPage: 浏览器当前标签页的页面实例
+        """
+        if self._browser is not None:
+            return self._browser
+
+        if self.attached:
+            from DrissionPage import ChromiumPage
+
+            if probe_browser(self.address) is None:
+                logger.warning(f"调试地址 {self.address} 上没有可用的浏览器，将在该端口启动")
+            else:
+                logger.info(f"附加到已运行的浏览器: {self.address}")
+            self._browser = ChromiumPage(addr_or_opts=self.address)
+        else:
+            self._browser = self._create_local_page()
+        return self._browser
+
+    def _run_browser_cdp(self, command: str, **params: Any) -> Dict[str, Any]:
+        """
+        在浏览器级连接上执行CDP命令(Target域等不属于单个页面的命令)
+
+        Args:
+            command: CDP命令
+            **params: 命令参数
+
+        Returns:
+            Dict[str, Any]: 命令返回结果
+        """
+        browser = self.connect()
+        driver = getattr(browser, "browser", None)
+        run_cdp = getattr(driver, "run_cdp", None) or browser.run_cdp
+        return run_cdp(command, **params)
+
+    def create_context(self, name: str) -> "BrowserManager":
+        """
+        在共享的浏览器中创建隔离的浏览器上下文
+
+        上下文之间不共享Cookie和存储，多个账号可以在同一个浏览器中并行运行，
+        比每个账号启动一个浏览器节省大量内存
+
+        Args:
+            name: 上下文名称，用于日志和内存报告
+
+        Returns:
+            BrowserManager: 绑定到该上下文的管理器，页面都在该上下文中打开
+        """
+        result = self._run_browser_cdp(
+            "Target.createBrowserContext", disposeOnDetach=True
+        )
+
+        context = BrowserManager(self.address)
+        context._browser = self._browser
+        context.context_id = result["browserContextId"]
+        context.name = name
+        context.parent = self
+        context.page_cache = self.page_cache
+        self.contexts[context.context_id] = context
+
+        logger.debug(f"创建浏览器上下文: {name} ({context.context_id})")
+        return context
+
+    def dispose(self) -> None:
+        """关闭上下文中的所有页面并销毁上下文，只对create_context()返回的上下文有效"""
+        if self.context_id is None:
+            return
+
+        self.close_all_pages()
+        try:
+            self._run_browser_cdp(
+                "Target.disposeBrowserContext", browserContextId=self.context_id
+            )
+        except Exception as e:
+            logger.warning(f"销毁浏览器上下文 {self.name} 失败: {str(e)}")
+        if self.parent is not None:
+            self.parent.contexts.pop(self.context_id, None)
+        logger.debug(f"销毁浏览器上下文: {self.name}")
 
-    def __init__(self):
-        """初始化浏览器管理器"""
-        self.pages: Dict[str, ChromiumPage] = {}
-        self.main_page: Optional[ChromiumPage] = None
+    def _create_context_page(self) -> "ChromiumPage":
+        """
+        在浏览器上下文中打开新标签页
 
-    def create_page(self, page_id: str = "main") -> ChromiumPage:
+        Returns:
+            ChromiumPage: 标签页实例
+        """
+        result = self._run_browser_cdp(
+            "Target.createTarget", url="about:blank", browserContextId=self.context_id
+        )
+        return self._browser.get_tab(result["targetId"])
+
+    def _create_attached_page(self, page_id: str) -> "ChromiumPage":
+        """
+        在已运行的浏览器中打开页面
+
+        Args:
+            page_id: 页面标识符
+
+        Returns:
+            ChromiumPage: main页面复用浏览器的当前标签页，其他页面为新标签页
+        """
+        browser = self.connect()
+        if page_id == "main":
+            return browser
+        return browser.new_tab()
+
+    def _release_attached_page(self, page: "ChromiumPage") -> None:
+        """
+        释放以标签页形式打开的页面(附加模式或浏览器上下文)，不退出浏览器
+
+        Args:
+            page: 页面实例
+        """
+        if self.context_id is not None:
+            self._run_browser_cdp("Target.closeTarget", targetId=page.tab_id)
+        elif page is self._browser:
+            # 浏览器至少要保留一个标签页，主页面回到空白页即表示空闲
+            page.get("about:blank")
+        else:
+            self._browser.close_tabs(page.tab_id)
+
+    def create_page(self, page_id: str = "main") -> "ChromiumPage":
         """
         创建新页面
 
@@ -36,9 +277,26 @@ class BrowserManager:
         if page_id in self.pages:
             self.close_page(page_id)
 
-        # 创建新页面
-        page = ChromiumPage()
+        # 创建新页面，DrissionPage只在第一次创建页面时才导入
+        if self.context_id is not None:
+            page = self._create_context_page()
+        elif self.attached:
+            page = self._create_attached_page(page_id)
+        elif page_id != "main" and self.main_page is not None:
+            # 主页面已启动浏览器时，其他页面作为主页面的标签页打开，可与主页面同时使用
+            page = self.main_page.new_tab()
+            self._local_tabs.add(page_id)
+        else:
+            page = self._create_local_page()
         self.pages[page_id] = page
+        try:
+            self._live_pages.add(page)
+        except TypeError:
+            pass
+        if self.page_cache is not None:
+            self.page_cache.attach(page)
+        if NETWORK_STATS:
+            self._watch_network(page_id, page)
 
         # 如果是main页面，设置为主页面
         if page_id == "main" and self.main_page is None:
@@ -47,7 +305,36 @@ class BrowserManager:
         logger.debug(f"创建页面: {page_id}")
         return page
 
-    def get_page(self, page_id: str = "main") -> Optional[ChromiumPage]:
+    def _watch_network(self, page_id: str, page: "ChromiumPage") -> None:
+        """
+        订阅页面的Network事件，转发给当前的网络流量统计
+
+        统计对象在每次运行时替换，常驻模式下跨运行复用的页面也计入当前运行
+
+        Args:
+            page_id: 页面标识符
+            page: 页面实例
+        """
+
+        def forward(handler: str, *args: Any) -> Callable[..., None]:
+            def callback(**event: Any) -> None:
+                stats = self.network_stats
+                if stats is not None:
+                    getattr(stats, handler)(*args, event)
+
+            return callback
+
+        try:
+            page.run_cdp("Network.enable")
+            page.driver.set_callback(
+                "Network.responseReceived", forward("on_response", page_id)
+            )
+            page.driver.set_callback("Network.loadingFinished", forward("on_finished"))
+            page.driver.set_callback("Network.loadingFailed", forward("on_failed"))
+        except Exception as e:
+            logger.debug(f"订阅页面 {page_id} 的网络事件失败: {str(e)}")
+
+    def get_page(self, page_id: str = "main") -> Optional["ChromiumPage"]:
         """
         获取页面实例
 
@@ -72,7 +359,14 @@ class BrowserManager:
         if page_id in self.pages:
             try:
                 page = self.pages[page_id]
-                page.quit()
+                if self.attached or self.context_id is not None:
+                    self._release_attached_page(page)
+                elif page_id in self._local_tabs:
+                    self._local_tabs.discard(page_id)
+                    if self.main_page is not None:
+                        self.main_page.close_tabs(page.tab_id)
+                else:
+                    page.quit()
                 del self.pages[page_id]
 
                 # 如果关闭的是主页面，将main_page置为None
@@ -86,10 +380,132 @@ class BrowserManager:
         return False
 
     def close_all_pages(self) -> None:
-        """关闭所有页面"""
-        for page_id in list(self.pages.keys()):
+        """关闭所有页面，并销毁从本管理器创建的浏览器上下文"""
+        for context in list(self.contexts.values()):
+            context.dispose()
+
+        # 主页面最后关闭，先关闭它的标签页
+        for page_id in sorted(self.pages, key=lambda page_id: page_id == "main"):
             self.close_page(page_id)
 
+        # 为创建上下文而自行启动的浏览器在此退出，附加的浏览器保持运行
+        owns_browser = not self.attached and self.context_id is None
+        if self._browser is not None and owns_browser:
+            try:
+                self._browser.quit()
+            except Exception as e:
+                logger.warning(f"退出浏览器失败: {str(e)}")
+            self._browser = None
+
+    def restarts_on_recycle(self, page_id: str) -> bool:
+        """
+        判断重建该页面时是否需要重启整个浏览器
+
+        Args:
+            page_id: 页面标识符
+
+        Returns:
+            bool: 自行启动浏览器时的主页面返回True
+        """
+        return page_id == "main" and not self.attached and self.context_id is None
+
+    def recycle_page(self, page_id: str) -> Optional["ChromiumPage"]:
+        """
+        关闭页面并以同一ID重新打开，回到原来的地址，以释放标签页积累的内存
+
+        自行启动浏览器时主页面就是浏览器本身，关闭它会退出浏览器，
+        因此重建主页面时改为重启浏览器，Cookie和其他标签页随之恢复
+
+        Args:
+            page_id: 页面标识符
+
+        Returns:
+            Optional[ChromiumPage]: 新页面实例，页面不存在时返回None
+        """
+        page = self.get_page(page_id)
+        if page is None:
+            return None
+
+        if self.restarts_on_recycle(page_id):
+            self.restart_browser()
+            return self.main_page
+
+        url = page.url
+        page = self.create_page(page_id)
+        if url:
+            page.get(url)
+        logger.info(f"已重建页面: {page_id}")
+        return page
+
+    def page_counts(self) -> Dict[str, int]:
+        """
+        统计本管理器及其浏览器上下文持有的页面数量
+
+        Returns:
+            Dict[str, int]: open为当前打开的页面数，live为仍未被回收的页面对象数
+        """
+        counts = {"open": len(self.pages), "live": len(self._live_pages)}
+        for context in list(self.contexts.values()):
+            for key, value in context.page_counts().items():
+                counts[key] += value
+        return counts
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        """
+        读取浏览器中所有域名的Cookie
+
+        Returns:
+            List[Dict[str, Any]]: Cookie列表，主页面不存在时为空
+        """
+        if self.main_page is None:
+            return []
+        return list(self.main_page.cookies(all_domains=True, all_info=True))
+
+    def set_cookies(self, cookies: List[Dict[str, Any]]) -> None:
+        """
+        将Cookie写入浏览器，主页面不存在时先创建
+
+        Args:
+            cookies: Cookie列表
+        """
+        if not cookies:
+            return
+        page = self.main_page or self.create_page("main")
+        page.set.cookies(cookies)
+
+    def restart_browser(self) -> None:
+        """
+        重启浏览器并恢复所有页面，Cookie随之迁移，登录状态不会丢失
+
+        附加模式下浏览器进程由常驻浏览器管理，浏览器上下文与其他账号共享浏览器，
+        这两种情况下只重建各个标签页
+        """
+        browser_restarts_total.inc()
+        if self.attached or self.context_id is not None:
+            for page_id in list(self.pages.keys()):
+                self.recycle_page(page_id)
+            return
+
+        urls = {page_id: page.url for page_id, page in self.pages.items()}
+        cookies = []
+        if self.main_page is not None:
+            try:
+                cookies = self.get_cookies()
+            except Exception as e:
+                logger.warning(f"读取Cookie失败，重启后可能需要重新登录: {str(e)}")
+
+        self.close_all_pages()
+
+        # 主页面先启动浏览器，其他页面作为它的标签页打开
+        for page_id, url in sorted(urls.items(), key=lambda item: item[0] != "main"):
+            page = self.create_page(page_id)
+            if cookies:
+                page.set.cookies(cookies)
+                cookies = []
+            if url:
+                page.get(url)
+        logger.info(f"浏览器已重启，恢复了 {len(urls)} 个页面")
+
     def navigate(self, url: str, page_id: str = "main", wait_time: float = 2.0) -> bool:
         """
         导航到URL
@@ -107,11 +523,16 @@ class BrowserManager:
             logger.warning(f"页面 {page_id} 不存在，创建新页面")
             page = self.create_page(page_id)
 
+        if self.network_stats is not None:
+            self.network_stats.set_phase(page_id, tracer.current_phase())
+
         try:
             logger.info(f"正在导航到: {url}")
             page.get(url)
             time.sleep(wait_time)  # 等待页面加载
             logger.info(f"已加载页面: {page.url}")
+            if self.page_cache is not None:
+                self.page_cache.snapshot(page_id, page)
             return True
         except Exception as e:
             logger.error(f"导航到 {url} 失败: {str(e)}")
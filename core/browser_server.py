@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻浏览器模块
+
+启动一个开启远程调试端口的浏览器并保持运行，供短时运行的main.py附加复用，
+定时进行健康检查，浏览器失去响应或长时间空闲后自动重启
+"""
+
+import json
+import time
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Optional, Union, TYPE_CHECKING
+from loguru import logger
+
+from config import (
+    BROWSER_SERVER_PORT,
+    BROWSER_PROFILE_DIR,
+    BROWSER_HEALTH_INTERVAL,
+    BROWSER_HEALTH_FAILURES,
+    BROWSER_IDLE_RESTART,
+)
+from core.browser import probe_browser
+
+if TYPE_CHECKING:
+    from DrissionPage import ChromiumPage
+
+# 这些地址的标签页视为空闲
+IDLE_URLS = ("", "about:blank", "chrome://newtab/", "chrome://new-tab-page/")
+
+
+class BrowserServer:
+    """常驻浏览器，负责启动、健康检查和重启"""
+
+    def __init__(
+        self,
+        port: int = BROWSER_SERVER_PORT,
+        user_data_dir: Union[str, Path] = BROWSER_PROFILE_DIR,
+        health_interval: float = BROWSER_HEALTH_INTERVAL,
+        max_failures: int = BROWSER_HEALTH_FAILURES,
+        idle_restart: float = BROWSER_IDLE_RESTART,
+    ):
+        """
+        初始化常驻浏览器
+
+        Args:
+            port: 远程调试端口
+            user_data_dir: 用户数据目录，保存登录状态和磁盘缓存
+            health_interval: 健康检查间隔(秒)
+            max_failures: 连续健康检查失败多少次后重启
+            idle_restart: 空闲超过该时长后重启(秒)，0表示不因空闲重启
+        """
+        self.port = port
+        self.user_data_dir = Path(user_data_dir)
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self.idle_restart = idle_restart
+        self.address = f"127.0.0.1:{port}"
+        self.stop_event = threading.Event()
+        self.restarts = 0
+        self._page: Optional["ChromiumPage"] = None
+        self._started_at = 0.0
+        self._idle_since: Optional[float] = None
+
+    def start(self) -> None:
+        """启动浏览器，端口上已有浏览器时直接接管"""
+        from DrissionPage import ChromiumOptions, ChromiumPage
+
+        self.user_data_dir.mkdir(parents=True, exist_ok=True)
+        options = ChromiumOptions()
+        options.set_local_port(self.port)
+        options.set_user_data_path(str(self.user_data_dir))
+
+        self._page = ChromiumPage(addr_or_opts=options)
+        self._started_at = time.time()
+        self._idle_since = None
+        version = probe_browser(self.address) or {}
+        logger.info(
+            f"常驻浏览器已就绪: {self.address} ({version.get('Browser', '未知版本')})"
+        )
+
+    def shutdown(self) -> None:
+        """退出浏览器"""
+        if self._page is None:
+            return
+        try:
+            self._page.quit()
+        except Exception as e:
+            logger.warning(f"退出浏览器失败: {str(e)}")
+        self._page = None
+
+    def restart(self, reason: str) -> None:
+        """
+        重启浏览器
+
+        Args:
+            reason: 重启原因，记录到日志
+        """
+        logger.warning(f"重启常驻浏览器: {reason}")
+        self.shutdown()
+        self.start()
+        self.restarts += 1
+
+    def is_idle(self) -> bool:
+        """
+        检查浏览器是否空闲，即所有标签页都停留在空白页
+
+        Returns:
+            bool: 是否空闲，无法获取标签页列表时视为不空闲
+        """
+        try:
+            with urllib.request.urlopen(
+                f"http://{self.address}/json/list", timeout=3
+            ) as response:
+                targets = json.load(response)
+        except Exception:
+            return False
+
+        return all(
+            target.get("url", "") in IDLE_URLS
+            for target in targets
+            if target.get("type") == "page"
+        )
+
+    def check(self, failures: int) -> int:
+        """
+        执行一次健康检查，必要时重启浏览器
+
+        Args:
+            failures: 此前连续失败的次数
+
+        Returns:
+            int: 本次检查后的连续失败次数
+        """
+        if probe_browser(self.address) is None:
+            failures += 1
+            logger.warning(f"常驻浏览器健康检查失败 ({failures}/{self.max_failures})")
+            if failures >= self.max_failures:
+                self.restart("浏览器无响应")
+                return 0
+            return failures
+
+        if not self.idle_restart:
+            return 0
+
+        # 只在没有运行附加到浏览器时重启，不会打断正在进行的任务
+        now = time.time()
+        if not self.is_idle():
+            self._idle_since = None
+        elif self._idle_since is None:
+            self._idle_since = now
+        elif (
+            now - self._idle_since >= self.idle_restart
+            and now - self._started_at >= self.idle_restart
+        ):
+            self.restart(f"已空闲 {now - self._idle_since:.0f} 秒")
+        return 0
+
+    def stop(self) -> None:
+        """请求停止服务"""
+        self.stop_event.set()
+
+    def serve_forever(self) -> None:
+        """启动浏览器并循环进行健康检查，直到调用stop()，退出时关闭浏览器"""
+        self.start()
+        failures = 0
+        try:
+            while not self.stop_event.wait(self.health_interval):
+                try:
+                    failures = self.check(failures)
+                except Exception as e:
+                    # 重启失败时留待下次检查重试
+                    logger.error(f"常驻浏览器健康检查出错: {str(e)}")
+                    failures = self.max_failures
+        finally:
+            self.shutdown()
+            logger.info(f"常驻浏览器已停止，期间共重启 {self.restarts} 次")
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CDP调用统计模块
+
+BrowserManager的每个方法以及元素的属性访问(如link.attr、link.text)最终都是一次或多次
+DrissionPage发出的CDP调用。启用统计后包装DrissionPage的CDP发送方法，
+按阶段(当前span)和调用方(项目代码中发起调用的函数)统计每次调用的次数、
+往返耗时和返回数据的字节数，并汇总为每个主题和整次运行的开销报告
+
+未启用统计时不包装任何方法，不影响正常运行
+"""
+
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+from config import ROOT_DIR, CDP_STATS_TOP_N
+from utils.tracing import tracer
+
+
+class CallStats:
+    """一组CDP调用的累计开销"""
+
+    __slots__ = ("calls", "seconds", "bytes")
+
+    def __init__(self):
+        """初始化累计开销"""
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def add(self, seconds: float, size: int) -> None:
+        """
+        累加一次调用
+
+        Args:
+            seconds: 往返耗时(秒)
+            size: 返回数据的字节数
+        """
+        self.calls += 1
+        self.seconds += seconds
+        self.bytes += size
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出累计开销
+
+        Returns:
+            Dict[str, Any]: 调用次数、总耗时(秒)和返回字节数
+        """
+        return {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 4),
+            "bytes": self.bytes,
+        }
+
+
+class CdpCollector:
+    """一次运行的CDP调用统计"""
+
+    def __init__(self, name: str = "run"):
+        """
+        初始化统计
+
+        Args:
+            name: 统计名称，用于日志
+        """
+        self.name = name
+        self.total = CallStats()
+        self.by_phase: Dict[str, CallStats] = {}
+        self.by_caller: Dict[Tuple[str, str], CallStats] = {}  # (阶段, 调用方)
+        self.by_method: Dict[str, CallStats] = {}
+        self.topics: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self, phase: str, caller: str, method: str, seconds: float, size: int
+    ) -> None:
+        """
+        记录一次CDP调用
+
+        Args:
+            phase: 阶段名称
+            caller: 调用方
+            method: CDP方法名
+            seconds: 往返耗时(秒)
+            size: 返回数据的字节数
+        """
+        with self._lock:
+            self.total.add(seconds, size)
+            for table, key in (
+                (self.by_phase, phase),
+                (self.by_caller, (phase, caller)),
+                (self.by_method, method),
+            ):
+                stats = table.get(key)
+                if stats is None:
+                    stats = table[key] = CallStats()
+                stats.add(seconds, size)
+
+    def add_topic(self, url: str, stats: CallStats) -> None:
+        """
+        记录一个主题的开销
+
+        Args:
+            url: 主题URL
+            stats: 浏览该主题期间的CDP调用开销
+        """
+        with self._lock:
+            self.topics.append(dict(stats.to_dict(), topic=url))
+
+    def summary(self, top: int = CDP_STATS_TOP_N) -> Dict[str, Any]:
+        """
+        汇总统计结果
+
+        Args:
+            top: 输出调用次数最多的调用方和CDP方法的数量
+
+        Returns:
+            Dict[str, Any]: 总计、各阶段、调用最多的调用方和CDP方法，以及每个主题的开销
+        """
+
+        def ranked(table: Dict[Any, CallStats]) -> List[Tuple[Any, CallStats]]:
+            return sorted(table.items(), key=lambda item: item[1].calls, reverse=True)
+
+        with self._lock:
+            return {
+                "total": self.total.to_dict(),
+                "phases": {
+                    phase: stats.to_dict() for phase, stats in ranked(self.by_phase)
+                },
+                "callers": [
+                    dict(stats.to_dict(), phase=phase, caller=caller)
+                    for (phase, caller), stats in ranked(self.by_caller)[:top]
+                ],
+                "methods": [
+                    dict(stats.to_dict(), method=method)
+                    for method, stats in ranked(self.by_method)[:top]
+                ],
+                "topics": list(self.topics),
+            }
+
+    def log_summary(self, top: int = CDP_STATS_TOP_N) -> None:
+        """
+        在日志中输出统计结果
+
+        Args:
+            top: 输出调用次数最多的调用方数量
+        """
+        summary = self.summary(top)
+        total = summary["total"]
+        logger.info(
+            f"CDP调用统计({self.name}): 共 {total['calls']} 次，"
+            f"耗时 {total['seconds']:.2f} 秒，返回 {total['bytes'] / 1024:.0f} KB"
+        )
+        for phase, stats in summary["phases"].items():
+            logger.info(
+                f"  阶段 {phase:<16} {stats['calls']:>6} 次 "
+                f"{stats['seconds']:>8.2f} 秒 {stats['bytes'] / 1024:>8.0f} KB"
+            )
+        for row in summary["callers"]:
+            logger.info(
+                f"  {row['phase']:<16} {row['caller']:<48} {row['calls']:>6} 次 "
+                f"{row['seconds']:>8.2f} 秒"
+            )
+        topics = summary["topics"]
+        if topics:
+            calls = sum(topic["calls"] for topic in topics) / len(topics)
+            seconds = sum(topic["seconds"] for topic in topics) / len(topics)
+            logger.info(
+                f"  平均每个主题 {calls:.0f} 次CDP调用，耗时 {seconds:.2f} 秒"
+            )
+
+
+# 当前上下文中的统计和主题开销，任务图的线程通过copy_context继承
+_collector: ContextVar[Optional[CdpCollector]] = ContextVar(
+    "cdp_collector", default=None
+)
+_topic: ContextVar[Optional[CallStats]] = ContextVar("cdp_topic", default=None)
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def _caller() -> str:
+    """
+    查找发起CDP调用的项目代码
+
+    Returns:
+        str: 形如"browser.navigate"或"topic_browser.visit_topic"的调用方
+    """
+    root = str(ROOT_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(root)
+            and filename != __file__
+            and "site-packages" not in filename
+        ):
+            return f"{Path(filename).stem}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _install() -> None:
+    """包装DrissionPage的CDP发送方法，只在第一次启用统计时执行"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        from DrissionPage._base.driver import Driver
+
+        original: Callable[..., Any] = Driver.run
+
+        def run(driver: Any, _method: str, **kwargs: Any) -> Any:
+            collector = _collector.get()
+            if collector is None:
+                return original(driver, _method, **kwargs)
+
+            started = time.perf_counter()
+            result = original(driver, _method, **kwargs)
+            seconds = time.perf_counter() - started
+            try:
+                size = len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+            except (TypeError, ValueError):
+                size = 0
+
+            collector.record(tracer.current_phase(), _caller(), _method, seconds, size)
+            topic = _topic.get()
+            if topic is not None:
+                topic.add(seconds, size)
+            return result
+
+        Driver.run = run
+        _installed = True
+
+
+@contextmanager
+def collect_cdp(name: str = "run") -> Iterator[CdpCollector]:
+    """
+    统计上下文中(包括其中启动的任务图线程)的所有CDP调用
+
+    Args:
+        name: 统计名称
+
+    Yields:
+        CdpCollector: 统计结果
+    """
+    _install()
+    collector = CdpCollector(name)
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def cdp_topic(url: str) -> Iterator[None]:
+    """
+    将上下文中的CDP调用计入一个主题的开销，未启用统计时不做任何事
+
+    Args:
+        url: 主题URL
+    """
+    collector = _collector.get()
+    if collector is None:
+        yield
+        return
+
+    stats = CallStats()
+    token = _topic.set(stats)
+    try:
+        yield
+    finally:
+        _topic.reset(token)
+        collector.add_topic(url, stats)
@@ -9,29 +9,40 @@
 import time
 from typing import List, Dict, Any, Tuple, Optional
 from loguru import logger
-from tabulate import tabulate
-from rich.console import Console
-from rich.table import Table
-from rich import box
 
 from config import CONNECT_URL
 from utils.decorators import retry, log_entry_exit
-from core.browser import browser_manager
+from core.browser import BrowserManager, browser_manager
 from utils.html_parser import extract_table_data, format_table
 
 
 class ConnectInfoManager:
     """连接信息管理器，负责获取和解析连接信息"""
 
-    def __init__(self):
-        """初始化连接信息管理器"""
+    def __init__(self, browser: Optional[BrowserManager] = None):
+        """
+        初始化连接信息管理器
+
+        Args:
+            browser: 使用的浏览器管理器或浏览器上下文，None表示创建新的管理器
+        """
+        self.browser = browser or BrowserManager()
         self.last_headers = []
         self.last_data = []
         self.before_data = []  # 存储签到前的数据
         self.after_data = []  # 存储签到后的数据
-        self.console = Console()  # Rich控制台实例
+        self._console = None  # Rich控制台实例，首次显示表格时创建
         self.compare_html = ""  # 存储HTML格式的对比结果
 
+    @property
+    def console(self):
+        """Rich控制台实例，rich只在第一次显示表格时才导入"""
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return self._console
+
     @log_entry_exit()
     @retry(retries=3, delay=2)
     def get_connect_info(self, is_after=False) -> Tuple[List[str], List[List[str]]]:
@@ -49,16 +60,16 @@ class ConnectInfoManager:
 
         try:
             # 创建新页面并导航到连接信息页面
-            browser_manager.create_page(page_id)
-            browser_manager.navigate(CONNECT_URL, page_id, wait_time=3.0)
+            self.browser.create_page(page_id)
+            self.browser.navigate(CONNECT_URL, page_id, wait_time=3.0)
 
             # 获取并检查页面标题
-            page = browser_manager.get_page(page_id)
+            page = self.browser.get_page(page_id)
             if page:
                 logger.info(f"页面标题: {page.title}")
 
             # 获取页面源码
-            html = browser_manager.get_page_source(page_id)
+            html = self.browser.get_page_source(page_id)
             if not html:
                 logger.error("获取页面源码失败")
                 return [], []
@@ -121,6 +132,9 @@ class ConnectInfoManager:
             logger.warning("没有连接信息数据可显示")
             return
 
+        from rich import box
+        from rich.table import Table
+
         # 创建Rich表格
         table = Table(title="连接信息", box=box.DOUBLE_EDGE)
 
@@ -233,6 +247,9 @@ class ConnectInfoManager:
             logger.warning("缺少签到前或签到后的数据，无法进行对比")
             return
 
+        from rich import box
+        from rich.table import Table
+
         # 创建Rich表格用于对比
         table = Table(title="连接信息对比", box=box.DOUBLE_EDGE, show_lines=True)
 
@@ -318,4 +335,4 @@ class ConnectInfoManager:
 
 
 # 创建连接信息管理器实例
-connect_info_manager = ConnectInfoManager()
+connect_info_manager = ConnectInfoManager(browser_manager)
@@ -20,22 +20,26 @@ from config import (
     SELECTOR_LOGIN_BUTTON,
 )
 from utils.decorators import retry, log_entry_exit
-from core.browser import browser_manager
+from core.browser import BrowserManager
 
 
 class LoginManager:
     """登录管理器，负责处理网站登录逻辑"""
 
-    def __init__(self, username: str, password: str):
+    def __init__(
+        self, username: str, password: str, browser: Optional[BrowserManager] = None
+    ):
         """
         初始化登录管理器
 
         Args:
             username: 用户名
             password: 密码
+            browser: 使用的浏览器管理器或浏览器上下文，None表示创建新的管理器
         """
         self.username = username
         self.password = password
+        self.browser = browser or BrowserManager()
         self.is_logged_in = False
 
     @log_entry_exit()
@@ -47,11 +51,11 @@ class LoginManager:
             bool: 是否成功打开登录页面
         """
         logger.info("正在打开登录页面...")
-        result = browser_manager.navigate(LOGIN_URL, "main", wait_time=2.0)
+        result = self.browser.navigate(LOGIN_URL, "main", wait_time=2.0)
 
         if result:
             # 获取当前页面并检查URL
-            page = browser_manager.get_page("main")
+            page = self.browser.get_page("main")
             if page and page.url == LOGIN_URL:
                 logger.info(f"已打开登录页面: {page.url}")
                 return True
@@ -71,11 +75,11 @@ class LoginManager:
             bool: 是否已登录
         """
         # 访问首页
-        browser_manager.navigate(HOME_URL, "main", wait_time=2.0)
+        self.browser.navigate(HOME_URL, "main", wait_time=2.0)
 
         try:
             # 查找用户元素
-            user_element = browser_manager.find_element(
+            user_element = self.browser.find_element(
                 SELECTOR_CURRENT_USER, timeout=3.0
             )
             if user_element:
@@ -112,15 +116,15 @@ class LoginManager:
 
         try:
             # 查找登录表单
-            browser_manager.find_element(SELECTOR_LOGIN_FORM, timeout=3.0)
+            self.browser.find_element(SELECTOR_LOGIN_FORM, timeout=3.0)
 
             # 填写用户名
-            username_field = browser_manager.find_element(SELECTOR_LOGIN_USERNAME)
+            username_field = self.browser.find_element(SELECTOR_LOGIN_USERNAME)
             username_field.input(username)
             time.sleep(1)
 
             # 填写密码
-            password_field = browser_manager.find_element(SELECTOR_LOGIN_PASSWORD)
+            password_field = self.browser.find_element(SELECTOR_LOGIN_PASSWORD)
             password_field.input(password)
             time.sleep(1)
 
@@ -139,7 +143,7 @@ class LoginManager:
         """
         try:
             # 点击登录按钮
-            login_button = browser_manager.find_element(SELECTOR_LOGIN_BUTTON)
+            login_button = self.browser.find_element(SELECTOR_LOGIN_BUTTON)
             login_button.click()
 
             # 等待登录完成
@@ -160,7 +164,7 @@ class LoginManager:
         """
         try:
             # 查找用户元素
-            user_element = browser_manager.find_element(
+            user_element = self.browser.find_element(
                 SELECTOR_CURRENT_USER, timeout=5.0
             )
             if user_element:
@@ -210,12 +214,15 @@ class LoginManager:
 
 
 # 创建登录器实例的工厂函数
-def create_login_manager(config: Dict[str, Any]) -> LoginManager:
+def create_login_manager(
+    config: Dict[str, Any], browser: Optional[BrowserManager] = None
+) -> LoginManager:
     """
     根据配置创建登录管理器
 
     Args:
         config: 配置字典
+        browser: 使用的浏览器管理器或浏览器上下文，None表示创建新的管理器
 
     Returns:
         LoginManager: 登录管理器实例
@@ -226,4 +233,4 @@ def create_login_manager(config: Dict[str, Any]) -> LoginManager:
     if not username or not password:
         logger.error("配置中未提供用户名或密码")
 
-    return LoginManager(username, password)
+    return LoginManager(username, password, browser)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存控制模块
+
+在主题之间采样浏览器进程树的RSS和各标签页的JS堆大小，
+超过上限时重建标签页或重启浏览器，避免Discourse无限加载的帖子流
+在长时间运行中不断占用内存
+"""
+
+import os
+from typing import Dict, List, Optional
+from loguru import logger
+
+from config import MEMORY_RSS_LIMIT_MB, MEMORY_HEAP_LIMIT_MB
+from core.browser import BrowserManager, browser_manager
+
+MB = 1024 * 1024
+
+
+def _children_from_proc() -> Dict[int, List[int]]:
+    """
+    通过/proc构建父进程 -> 子进程的映射
+
+    Returns:
+        Dict[int, List[int]]: 进程树
+    """
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 进程名可能包含空格和括号，从最后一个右括号之后开始解析
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _rss_from_proc(pid: int) -> int:
+    """
+    读取单个进程的RSS
+
+    Args:
+        pid: 进程ID
+
+    Returns:
+        int: RSS(字节)，进程已退出时为0
+    """
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """
+    统计进程及其所有子进程(渲染进程、GPU进程等)的RSS总和
+
+    优先使用psutil，未安装时在Linux上回退到读取/proc
+
+    Args:
+        pid: 根进程ID
+
+    Returns:
+        Optional[int]: RSS总和(字节)，当前平台无法统计时返回None
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = _children_from_proc()
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _rss_from_proc(current)
+        pending.extend(children.get(current, []))
+    return total
+
+
+class MemoryGovernor:
+    """内存控制器，在安全的时机(主题之间)检查内存并回收"""
+
+    def __init__(
+        self,
+        manager: Optional[BrowserManager] = None,
+        rss_limit_mb: int = MEMORY_RSS_LIMIT_MB,
+        heap_limit_mb: int = MEMORY_HEAP_LIMIT_MB,
+    ):
+        """
+        初始化内存控制器
+
+        Args:
+            manager: 被控制的浏览器管理器，None表示创建新的管理器
+            rss_limit_mb: 浏览器进程树总RSS上限(MB)，0表示不限制
+            heap_limit_mb: 单个标签页JS堆上限(MB)，0表示不限制
+        """
+        self.manager = manager or BrowserManager()
+        self.rss_limit = rss_limit_mb * MB
+        self.heap_limit = heap_limit_mb * MB
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计数据"""
+        self.peak_rss = 0
+        self.peak_heap = 0
+        self.peak_total_heap = 0  # 所有标签页JS堆之和的峰值
+        self.tab_recycles = 0
+        self.browser_restarts = 0
+        self._rss_unsupported = False
+
+    def sample_rss(self) -> Optional[int]:
+        """
+        采样浏览器进程树的RSS
+
+        Returns:
+            Optional[int]: RSS(字节)，浏览器未启动或无法统计时返回None
+        """
+        # 浏览器上下文与其他上下文共享浏览器进程，无法单独统计RSS
+        if self.manager.context_id is not None or self._rss_unsupported:
+            return None
+
+        page = self.manager.main_page
+        pid = getattr(page, "process_id", None) if page is not None else None
+        if not pid:
+            return None
+
+        rss = process_tree_rss(pid)
+        if rss is None:
+            # 只提示一次，之后只检查JS堆
+            self._rss_unsupported = True
+            logger.warning("当前平台无法统计浏览器进程内存，安装psutil后可启用")
+        return rss
+
+    def sample_heaps(self) -> Dict[str, int]:
+        """
+        通过CDP采样各标签页的JS堆已用大小
+
+        Returns:
+            Dict[str, int]: 页面ID -> JS堆大小(字节)
+        """
+        heaps = {}
+        for page_id, page in list(self.manager.pages.items()):
+            try:
+                heaps[page_id] = int(page.run_cdp("Runtime.getHeapUsage")["usedSize"])
+            except Exception as e:
+                logger.debug(f"采样页面 {page_id} 的JS堆失败: {str(e)}")
+        return heaps
+
+    def checkpoint(self) -> None:
+        """
+        采样内存并在超过上限时回收
+
+        只应在没有页面正在使用的时机调用，例如两个主题之间
+        """
+        heaps = self.sample_heaps()
+        rss = self.sample_rss()
+
+        if heaps:
+            self.peak_heap = max(self.peak_heap, max(heaps.values()))
+            self.peak_total_heap = max(self.peak_total_heap, sum(heaps.values()))
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+
+        if self.rss_limit and rss is not None and rss > self.rss_limit:
+            logger.warning(
+                f"浏览器内存 {rss / MB:.0f} MB 超过上限 {self.rss_limit / MB:.0f} MB，重启浏览器"
+            )
+            self.manager.restart_browser()
+            self.browser_restarts += 1
+            return
+
+        if not self.heap_limit:
+            return
+        for page_id, heap in heaps.items():
+            if heap > self.heap_limit:
+                logger.warning(
+                    f"页面 {page_id} 的JS堆 {heap / MB:.0f} MB "
+                    f"超过上限 {self.heap_limit / MB:.0f} MB，重建该页面"
+                )
+                if self.manager.restarts_on_recycle(page_id):
+                    # 重建主页面会重启浏览器，其他页面随之重建，不再逐个检查
+                    self.manager.recycle_page(page_id)
+                    self.browser_restarts += 1
+                    return
+                self.manager.recycle_page(page_id)
+                self.tab_recycles += 1
+
+    def summary(self) -> str:
+        """
+        生成内存统计摘要
+
+        Returns:
+            str: 摘要文本
+        """
+        heap = f"JS堆峰值 {self.peak_heap / MB:.0f} MB，重建标签页 {self.tab_recycles} 次"
+        if self.manager.context_id is not None:
+            return (
+                f"浏览器上下文 {self.manager.name}: "
+                f"JS堆合计峰值 {self.peak_total_heap / MB:.0f} MB，{heap}"
+            )
+
+        rss = f"{self.peak_rss / MB:.0f} MB" if self.peak_rss else "未知"
+        return f"浏览器内存峰值 {rss}，{heap}，重启浏览器 {self.browser_restarts} 次"
+
+
+# 创建全局内存控制器实例
+memory_governor = MemoryGovernor(browser_manager)
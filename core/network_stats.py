@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网络流量统计模块
+
+BrowserManager在每个页面上订阅CDP Network事件，请求完成时按实际传输的字节数
+(encodedDataLength，命中缓存的请求几乎为0)累计到页面当前所在的阶段、资源类型和主机，
+运行结束后写入运行结果和监控指标，便于发现流量回归以及验证屏蔽和缓存的效果
+"""
+
+import threading
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+from loguru import logger
+
+from config import NETWORK_STATS_TOP_N
+from utils.metrics import network_bytes_total, network_requests_total
+
+
+class NetworkStats:
+    """一次运行的网络流量统计"""
+
+    def __init__(self):
+        """初始化流量统计"""
+        self.requests = 0
+        self.bytes = 0
+        self.cached = 0  # 命中磁盘缓存或Service Worker的请求数
+        # 名称 -> [请求数, 字节数]
+        self.by_phase: Dict[str, List[int]] = {}
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_host: Dict[str, List[int]] = {}
+        # 页面ID -> 页面最近一次导航时所在的阶段
+        self._phases: Dict[str, str] = {}
+        # 请求ID -> (阶段, 资源类型, 主机)，收到响应后等待加载完成
+        self._pending: Dict[str, Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def set_phase(self, page_id: str, phase: str) -> None:
+        """
+        设置页面之后的请求所属的阶段，由BrowserManager.navigate()调用
+
+        Args:
+            page_id: 页面标识符
+            phase: 阶段名称
+        """
+        with self._lock:
+            self._phases[page_id] = phase
+
+    def on_response(self, page_id: str, event: Dict[str, Any]) -> None:
+        """
+        处理Network.responseReceived事件
+
+        Args:
+            page_id: 页面标识符
+            event: 事件参数
+        """
+        response = event.get("response") or {}
+        parts = urlsplit(response.get("url", ""))
+        if parts.scheme not in ("http", "https"):
+            return
+
+        with self._lock:
+            if response.get("fromDiskCache") or response.get("fromServiceWorker"):
+                self.cached += 1
+            self._pending[event["requestId"]] = (
+                self._phases.get(page_id, "other"),
+                event.get("type", "Other"),
+                parts.hostname or "",
+            )
+
+    def on_finished(self, event: Dict[str, Any]) -> None:
+        """
+        处理Network.loadingFinished事件，累计传输的字节数
+
+        Args:
+            event: 事件参数
+        """
+        size = int(event.get("encodedDataLength") or 0)
+        with self._lock:
+            pending = self._pending.pop(event["requestId"], None)
+            if pending is None:
+                return
+            phase, resource_type, host = pending
+            self.requests += 1
+            self.bytes += size
+            for table, key in (
+                (self.by_phase, phase),
+                (self.by_type, resource_type),
+                (self.by_host, host),
+            ):
+                totals = table.setdefault(key, [0, 0])
+                totals[0] += 1
+                totals[1] += size
+
+        network_requests_total.inc(phase=phase, type=resource_type)
+        network_bytes_total.inc(size, phase=phase, type=resource_type)
+
+    def on_failed(self, event: Dict[str, Any]) -> None:
+        """
+        处理Network.loadingFailed事件，丢弃未完成的请求
+
+        Args:
+            event: 事件参数
+        """
+        with self._lock:
+            self._pending.pop(event["requestId"], None)
+
+    def summary(self, top: int = NETWORK_STATS_TOP_N) -> Dict[str, Any]:
+        """
+        汇总统计结果
+
+        Args:
+            top: 列出流量最大的主机数量
+
+        Returns:
+            Dict[str, Any]: 总计以及按阶段、资源类型和主机的请求数和字节数
+        """
+
+        def ranked(table: Dict[str, List[int]]) -> List[Tuple[str, List[int]]]:
+            return sorted(table.items(), key=lambda item: item[1][1], reverse=True)
+
+        def rows(table: Dict[str, List[int]], limit: int = 0) -> Dict[str, Any]:
+            items = ranked(table)
+            if limit:
+                items = items[:limit]
+            return {
+                name: {"requests": requests, "bytes": size}
+                for name, (requests, size) in items
+            }
+
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes": self.bytes,
+                "cached": self.cached,
+                "phases": rows(self.by_phase),
+                "types": rows(self.by_type),
+                "hosts": rows(self.by_host, top),
+            }
+
+    def log_summary(self) -> None:
+        """在日志中输出流量统计"""
+        summary = self.summary()
+        logger.info(
+            f"网络流量: {summary['requests']} 个请求，{summary['bytes'] / 1024:.0f} KB，"
+            f"命中缓存 {summary['cached']} 个"
+        )
+        for title, key in (("阶段", "phases"), ("类型", "types"), ("主机", "hosts")):
+            parts = [
+                f"{name} {row['bytes'] / 1024:.0f} KB/{row['requests']}"
+                for name, row in summary[key].items()
+            ]
+            if parts:
+                logger.info(f"  按{title}: {', '.join(parts)}")
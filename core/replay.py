@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制回放模块
+
+录制模式下通过CDP Fetch域在响应阶段拦截浏览器的所有请求，保存响应内容，
+并在每次导航后保存页面DOM快照，运行结束后写入压缩的夹具归档；
+回放模式下在请求阶段拦截请求，按录制顺序用归档中的响应直接完成请求，不访问网络，
+从而可以离线、确定性地重复整个运行，并与录制时的各任务耗时进行对比
+
+归档为zip文件:
+- manifest.json: 响应列表、DOM快照列表、随机数种子和录制时的任务耗时
+- bodies/<sha1>: 按内容去重的响应体
+- snapshots/<序号>.html: 导航后的DOM快照
+"""
+
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import zipfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from loguru import logger
+
+FIXTURE_VERSION = 1
+
+# 请求键中忽略的查询参数(Discourse的XHR请求用于绕过缓存的时间戳)
+IGNORED_QUERY_PARAMS = {"_"}
+
+# 不写入归档的响应头，其中带有登录会话的凭据；回放时页面内容来自归档，不需要这些头
+SENSITIVE_HEADERS = {"set-cookie", "authorization"}
+
+
+def request_key(method: str, url: str) -> str:
+    """
+    生成请求键，录制和回放时相同的请求得到相同的键
+
+    Args:
+        method: 请求方法
+        url: 请求地址
+
+    Returns:
+        str: 请求键
+    """
+    parts = urlsplit(url)
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in IGNORED_QUERY_PARAMS
+    ]
+    url = urlunsplit(parts._replace(query=urlencode(query), fragment=""))
+    return f"{method.upper()} {url}"
+
+
+class PageCache:
+    """页面录制回放缓存，通过BrowserManager.page_cache挂载到浏览器管理器"""
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(self, mode: str, path: Union[str, Path]):
+        """
+        初始化页面缓存，回放模式下立即读取归档
+
+        Args:
+            mode: RECORD或REPLAY
+            path: 夹具归档路径
+
+        Raises:
+            ValueError: 模式无效
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f"无效的录制回放模式: {mode}")
+
+        self.mode = mode
+        self.path = Path(path)
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+        # 请求键 -> 按顺序排列的响应
+        self.responses: Dict[str, List[Dict[str, Any]]] = {}
+        self.bodies: Dict[str, bytes] = {}  # sha1 -> 响应体
+        self.snapshots: List[Dict[str, Any]] = []
+        self.recorded_timings: Dict[str, List[Optional[float]]] = {}
+        self.recorded_duration: Optional[float] = None
+
+        # 回放统计
+        self._cursors: Dict[str, int] = {}
+        self.hits = 0
+        self.misses: List[str] = []
+        self.dom_mismatches = 0
+        self._snapshot_index = 0
+
+        if mode == self.REPLAY:
+            self._load()
+        else:
+            self.seed = random.randrange(2**32)
+        # 录制和回放使用相同的随机数种子，滚动距离、点赞等随机决策保持一致
+        random.seed(self.seed)
+
+    @classmethod
+    def record(cls, path: Union[str, Path]) -> "PageCache":
+        """创建录制模式的页面缓存"""
+        return cls(cls.RECORD, path)
+
+    @classmethod
+    def replay(cls, path: Union[str, Path]) -> "PageCache":
+        """创建回放模式的页面缓存"""
+        return cls(cls.REPLAY, path)
+
+    # ---------------- 浏览器挂钩 ----------------
+
+    def attach(self, page: Any) -> None:
+        """
+        在新页面上启用请求拦截，由BrowserManager.create_page()调用
+
+        Args:
+            page: ChromiumPage实例
+        """
+        # 禁用缓存，保证每个请求都经过拦截
+        page.run_cdp("Network.enable")
+        page.run_cdp("Network.setCacheDisabled", cacheDisabled=True)
+
+        stage = "Response" if self.mode == self.RECORD else "Request"
+        page.driver.set_callback(
+            "Fetch.requestPaused", lambda **event: self._on_paused(page, event)
+        )
+        page.run_cdp(
+            "Fetch.enable", patterns=[{"urlPattern": "*", "requestStage": stage}]
+        )
+
+    def snapshot(self, page_id: str, page: Any) -> None:
+        """
+        导航完成后保存(录制)或核对(回放)DOM快照，由BrowserManager.navigate()调用
+
+        Args:
+            page_id: 页面标识符
+            page: ChromiumPage实例
+        """
+        try:
+            html = page.html
+        except Exception as e:
+            logger.debug(f"读取页面 {page_id} 的DOM失败: {str(e)}")
+            return
+
+        digest = hashlib.sha1(html.encode("utf-8")).hexdigest()
+        with self._lock:
+            if self.mode == self.RECORD:
+                self.snapshots.append(
+                    {
+                        "page_id": page_id,
+                        "url": page.url,
+                        "sha1": digest,
+                        "html": html,
+                        "elapsed": round(time.monotonic() - self.started, 3),
+                    }
+                )
+                return
+
+            index = self._snapshot_index
+            self._snapshot_index += 1
+        if index < len(self.snapshots) and self.snapshots[index]["sha1"] != digest:
+            self.dom_mismatches += 1
+            logger.warning(
+                f"页面 {page_id} 的DOM与录制时第 {index + 1} 个快照不一致: {page.url}"
+            )
+
+    def _on_paused(self, page: Any, event: Dict[str, Any]) -> None:
+        """
+        处理被拦截的请求
+
+        Args:
+            page: 发出请求的页面
+            event: Fetch.requestPaused事件参数
+        """
+        request_id = event["requestId"]
+        request = event["request"]
+        key = request_key(request["method"], request["url"])
+        try:
+            if self.mode == self.RECORD:
+                self._record(page, key, event)
+                page.run_cdp("Fetch.continueRequest", requestId=request_id)
+            else:
+                self._fulfill(page, key, request_id)
+        except Exception as e:
+            logger.debug(f"处理被拦截的请求 {key} 失败: {str(e)}")
+            try:
+                page.run_cdp("Fetch.continueRequest", requestId=request_id)
+            except Exception:
+                pass
+
+    def _record(self, page: Any, key: str, event: Dict[str, Any]) -> None:
+        """
+        保存响应
+
+        Args:
+            page: 发出请求的页面
+            key: 请求键
+            event: 响应阶段的Fetch.requestPaused事件参数
+        """
+        status = event.get("responseStatusCode") or 200
+        headers = [
+            [header["name"], header["value"]]
+            for header in event.get("responseHeaders") or []
+            if header["name"].lower() not in SENSITIVE_HEADERS
+        ]
+
+        body: Optional[bytes] = None
+        # 跳转响应没有响应体
+        if not 300 <= status < 400:
+            result = page.run_cdp("Fetch.getResponseBody", requestId=event["requestId"])
+            if result.get("base64Encoded"):
+                body = base64.b64decode(result["body"])
+            else:
+                body = result["body"].encode("utf-8")
+
+        digest = None
+        if body is not None:
+            digest = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            if digest is not None:
+                self.bodies[digest] = body
+            self.responses.setdefault(key, []).append(
+                {"status": status, "headers": headers, "body": digest}
+            )
+
+    def _fulfill(self, page: Any, key: str, request_id: str) -> None:
+        """
+        用归档中的响应完成请求，同一请求按录制顺序依次返回，用完后重复最后一个
+
+        Args:
+            page: 发出请求的页面
+            key: 请求键
+            request_id: 被拦截的请求ID
+        """
+        with self._lock:
+            recorded = self.responses.get(key)
+            if not recorded:
+                self.misses.append(key)
+                response = None
+            else:
+                index = self._cursors.get(key, 0)
+                self._cursors[key] = index + 1
+                response = recorded[min(index, len(recorded) - 1)]
+                self.hits += 1
+
+        if response is None:
+            logger.debug(f"归档中没有该请求的响应: {key}")
+            page.run_cdp(
+                "Fetch.failRequest",
+                requestId=request_id,
+                errorReason="InternetDisconnected",
+            )
+            return
+
+        body = self.bodies.get(response["body"], b"") if response["body"] else b""
+        page.run_cdp(
+            "Fetch.fulfillRequest",
+            requestId=request_id,
+            responseCode=response["status"],
+            responseHeaders=[
+                {"name": name, "value": value}
+                # 响应体已解压，不能再声明压缩编码和原始长度
+                for name, value in response["headers"]
+                if name.lower() not in ("content-encoding", "content-length")
+            ],
+            body=base64.b64encode(body).decode("ascii"),
+        )
+
+    # ---------------- 归档读写 ----------------
+
+    def _load(self) -> None:
+        """读取夹具归档"""
+        with zipfile.ZipFile(self.path, "r") as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+            if manifest.get("version") != FIXTURE_VERSION:
+                raise ValueError(f"不支持的夹具归档版本: {manifest.get('version')}")
+
+            self.seed = manifest["seed"]
+            self.responses = manifest["responses"]
+            self.snapshots = manifest["snapshots"]
+            self.recorded_timings = manifest.get("timings") or {}
+            self.recorded_duration = manifest.get("duration")
+            for name in archive.namelist():
+                if name.startswith("bodies/"):
+                    self.bodies[name[len("bodies/") :]] = archive.read(name)
+
+        logger.info(
+            f"已加载夹具归档 {self.path}: {sum(map(len, self.responses.values()))} 个响应，"
+            f"{len(self.snapshots)} 个DOM快照"
+        )
+
+    def _save(self, timings: Optional[Dict[str, Tuple[Any, Any]]]) -> None:
+        """
+        写入夹具归档
+
+        Args:
+            timings: 录制运行中各任务的(开始, 结束)秒数
+        """
+        with self._lock:
+            snapshots = [
+                {key: value for key, value in snapshot.items() if key != "html"}
+                for snapshot in self.snapshots
+            ]
+            manifest = {
+                "version": FIXTURE_VERSION,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "seed": self.seed,
+                "responses": self.responses,
+                "snapshots": snapshots,
+                "timings": timings or {},
+                "duration": round(time.monotonic() - self.started, 3),
+            }
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            temp_path.unlink(missing_ok=True)
+            # 响应体和DOM快照中包含已登录账号的页面内容，只允许当前用户读写
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f, zipfile.ZipFile(
+                f, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9
+            ) as archive:
+                archive.writestr(
+                    "manifest.json", json.dumps(manifest, ensure_ascii=False)
+                )
+                for digest, body in self.bodies.items():
+                    archive.writestr(f"bodies/{digest}", body)
+                for index, snapshot in enumerate(self.snapshots):
+                    archive.writestr(f"snapshots/{index}.html", snapshot["html"])
+            os.replace(temp_path, self.path)
+
+        logger.info(
+            f"已写入夹具归档 {self.path}: {len(self.bodies)} 个不同的响应体，"
+            f"{len(self.snapshots)} 个DOM快照，{self.path.stat().st_size / 1024:.0f} KB"
+        )
+
+    def close(self, timings: Optional[Dict[str, Tuple[Any, Any]]] = None) -> None:
+        """
+        结束录制或回放: 录制模式写入归档，回放模式输出命中情况和耗时对比
+
+        Args:
+            timings: 本次运行各任务的(开始, 结束)秒数，运行失败时为None
+        """
+        if self.mode == self.RECORD:
+            self._save(timings)
+            return
+
+        logger.info(
+            f"回放完成: 命中 {self.hits} 个请求，未命中 {len(self.misses)} 个，"
+            f"DOM快照不一致 {self.dom_mismatches} 个"
+        )
+        for key in sorted(set(self.misses))[:10]:
+            logger.info(f"未命中: {key}")
+        if timings:
+            self.log_comparison(timings)
+
+    def log_comparison(self, timings: Dict[str, Tuple[Any, Any]]) -> None:
+        """
+        对比录制时与本次回放的各任务耗时
+
+        Args:
+            timings: 本次运行各任务的(开始, 结束)秒数
+        """
+
+        def duration(span: Any) -> Optional[float]:
+            if not span or span[0] is None or span[1] is None:
+                return None
+            return span[1] - span[0]
+
+        logger.info(f"{'任务':<16} {'录制':>8} {'回放':>8} {'差值':>8}")
+        for name, span in timings.items():
+            recorded = duration(self.recorded_timings.get(name))
+            replayed = duration(span)
+            if recorded is None or replayed is None:
+                continue
+            logger.info(
+                f"{name:<16} {recorded:>8.2f} {replayed:>8.2f} "
+                f"{replayed - recorded:>+8.2f}"
+            )
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话模块
+
+一次签到运行所需的浏览器、登录、浏览、连接信息和通知组件都由会话持有，
+不依赖模块级的全局实例，多个会话可以在同一个解释器的不同线程中同时运行；
+Runner提供以库的方式调用的入口
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from config import (
+    OUTBOX_PATH,
+    CHECKPOINT_DIR,
+    CHECKPOINT_WINDOW,
+    NOTIFICATION_SUCCESS_PREFIX,
+    NOTIFICATION_FAILURE_PREFIX,
+    NOTIFICATION_FLUSH_TIMEOUT,
+    NOTIFICATION_TOTAL_TIMEOUT,
+    CDP_STATS,
+    NETWORK_STATS,
+)
+from utils.tracing import span
+from utils.metrics import runs_started_total, runs_finished_total, last_run_timestamp
+from utils.taskgraph import TaskGraph
+from utils.checkpoint import RunCheckpoint
+from utils.timebudget import TimeBudget
+from utils.decorators import retry_budget
+from utils.leakcheck import leak_detector
+from utils.outbox import NotificationOutbox
+from utils.notification import NotificationManager, setup_notifications
+from core.browser import BrowserManager
+from core.memory import MemoryGovernor
+from core.login import LoginManager, create_login_manager
+from core.topic_browser import TopicBrowser
+from core.connect_info import ConnectInfoManager
+from core.accounts import find_free_port, profile_dir_for
+from core.cdp_stats import CdpCollector, collect_cdp
+from core.network_stats import NetworkStats
+
+
+class LoginFailed(Exception):
+    """登录失败"""
+
+
+class RunReport:
+    """一次运行的结果"""
+
+    def __init__(self, username: Optional[str] = None):
+        """
+        初始化运行结果
+
+        Args:
+            username: 账号
+        """
+        self.username = username
+        self.success = False
+        self.error: Optional[str] = None
+        self.browse_enabled = False
+        self.visited_topics = 0
+        self.connect_before: List[List[str]] = []  # 签到前的连接信息数据行
+        self.connect_after: List[List[str]] = []  # 签到后的连接信息数据行
+        self.compare_html = ""  # HTML格式的前后对比表格
+        self.memory = ""  # 内存统计摘要
+        # 各任务相对于运行开始的(开始, 结束)秒数
+        self.tasks: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self.critical_path: List[str] = []  # 关键路径上的任务
+        self.critical_path_seconds = 0.0  # 关键路径总耗时
+        self.resumed = False  # 是否从检查点恢复
+        self.skipped_topics = 0  # 因时间预算不足未浏览的主题数量
+        self.cdp: Dict[str, Any] = {}  # CDP调用统计，未启用统计时为空
+        self.network: Dict[str, Any] = {}  # 网络流量统计，未启用统计时为空
+        self.started_at = time.time()
+        self.duration = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典
+
+        Returns:
+            Dict[str, Any]: 运行结果字典
+        """
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        status = "成功" if self.success else f"失败: {self.error}"
+        return f"RunReport({self.username}, {status}, {self.duration:.1f}s)"
+
+
+class Session:
+    """
+    一次签到会话，持有本次运行使用的全部组件
+
+    未传入浏览器或通知管理器时会话自行创建并在close()时释放，
+    传入时由调用方负责其生命周期
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        browser: Optional[BrowserManager] = None,
+        notifications: Optional[NotificationManager] = None,
+        manage_notifications: Optional[bool] = None,
+        checkpoint_window: float = CHECKPOINT_WINDOW,
+    ):
+        """
+        初始化会话
+
+        Args:
+            config: 配置字典
+            browser: 使用的浏览器管理器或浏览器上下文
+            notifications: 使用的通知管理器
+            manage_notifications: 是否由会话按配置设置通知处理器并启动投递线程，
+                默认只在会话自行创建通知管理器时设置
+            checkpoint_window: 检查点有效期(秒)，0表示不从检查点恢复
+        """
+        self.config = dict(config)
+        self._owns_browser = browser is None
+        self._owns_notifications = notifications is None
+
+        self._manage_notifications = (
+            self._owns_notifications
+            if manage_notifications is None
+            else manage_notifications
+        )
+
+        self.browser = browser or BrowserManager()
+        self.notifications = notifications or NotificationManager(
+            NotificationOutbox(OUTBOX_PATH)
+        )
+
+        self.governor = MemoryGovernor(self.browser)
+        self.topic_browser = TopicBrowser(self.browser, self.governor)
+        self.connect_info = ConnectInfoManager(self.browser)
+        # 登录管理器和检查点在确定账号后才创建
+        self.login_manager: Optional[LoginManager] = None
+        self.checkpoint_window = checkpoint_window
+        self.checkpoint: Optional[RunCheckpoint] = None
+        # 配置了time_budget时在run()开始时创建
+        self.time_budget: Optional[TimeBudget] = None
+        self.report = RunReport(self.config.get("username"))
+
+    def _resolve_credentials(self) -> bool:
+        """
+        确定登录凭据，配置中没有时从环境变量获取
+
+        Returns:
+            bool: 是否找到有效的用户名和密码
+        """
+        username = self.config.get("username")
+        password = self.config.get("password")
+        if username and password:
+            logger.info(f"账户: {username} (来源: 配置文件)")
+            return True
+
+        # 尝试从环境变量直接获取（避免配置文件已加载但环境变量后续修改的情况）
+        username = (
+            username or os.environ.get("USERNAME") or os.environ.get("LINUXDO_USERNAME")
+        )
+        password = (
+            password or os.environ.get("PASSWORD") or os.environ.get("LINUXDO_PASSWORD")
+        )
+        if not username or not password:
+            return False
+
+        logger.info("已从环境变量获取登录凭据")
+        logger.info(f"账户: {username} (来源: 环境变量)")
+        self.config["username"] = username
+        self.config["password"] = password
+        self.report.username = username
+        return True
+
+    def _start_notifications(self) -> None:
+        """设置通知处理器并启动发件箱投递线程(同时投递之前运行遗留的消息)"""
+        if self._manage_notifications:
+            setup_notifications(self.config, self.notifications)
+            self.notifications.start_worker()
+
+    def _login(self) -> None:
+        """
+        执行登录
+
+        Raises:
+            LoginFailed: 登录失败
+        """
+        self.login_manager = create_login_manager(self.config, self.browser)
+        if self.checkpoint.done("login"):
+            # 恢复上次运行的Cookie，登录状态检查通过后无需重新填写登录表单
+            try:
+                self.browser.set_cookies(self.checkpoint.result("login"))
+            except Exception as e:
+                logger.warning(f"恢复Cookie失败: {str(e)}")
+
+        with span("login"):
+            if not self.login_manager.login():
+                raise LoginFailed("登录失败")
+
+        try:
+            cookies = self.browser.get_cookies()
+        except Exception as e:
+            logger.warning(f"读取Cookie失败: {str(e)}")
+            cookies = []
+        self.checkpoint.complete_phase("login", cookies)
+
+    def _collect_topics(self) -> List[Tuple[str, str]]:
+        """
+        收集待浏览的主题，与获取签到前的连接信息同时进行
+
+        Returns:
+            List[Tuple[str, str]]: (href, title)元组列表
+        """
+        if self.checkpoint.done("topic-list"):
+            logger.info("使用检查点中的主题列表")
+            return [tuple(link) for link in self.checkpoint.result("topic-list")]
+
+        with span("topic-list"):
+            topic_links = self.topic_browser.collect_topics()
+        self.checkpoint.complete_phase("topic-list", topic_links)
+        return topic_links
+
+    def _fetch_connect_info(self, is_after: bool) -> None:
+        """
+        获取连接信息
+
+        Args:
+            is_after: 是否为签到后的数据获取
+        """
+        phase = "connect-after" if is_after else "connect-before"
+        if self.checkpoint.done(phase):
+            logger.info(f"使用检查点中{'签到后' if is_after else '签到前'}的连接信息")
+            data = self.checkpoint.result(phase)
+        else:
+            logger.info(f"获取{'签到后' if is_after else '签到前'}的连接信息")
+            with span(phase):
+                _, data = self.connect_info.get_connect_info(is_after=is_after)
+            # 获取失败时不记录，恢复运行时重新获取
+            if data:
+                self.checkpoint.complete_phase(phase, data)
+
+        if is_after:
+            self.connect_info.after_data = self.report.connect_after = data
+        else:
+            self.connect_info.before_data = self.report.connect_before = data
+
+    def _browse(self, topic_links: List[Tuple[str, str]], max_topics: int) -> None:
+        """
+        浏览收集到的主题
+
+        Args:
+            topic_links: (href, title)元组列表
+            max_topics: 最多浏览的主题数量
+        """
+        if self.checkpoint.done("browse"):
+            self.report.visited_topics = self.checkpoint.result("browse")
+            logger.info(
+                f"浏览已在上次运行中完成，共访问 {self.report.visited_topics} 个主题"
+            )
+            return
+
+        logger.info("开始浏览帖子任务")
+        with span("browse"):
+            self.report.visited_topics = self.topic_browser.visit_topics(
+                topic_links,
+                max_topics=max_topics,
+                checkpoint=self.checkpoint,
+                time_budget=self.time_budget,
+            )
+        self.checkpoint.complete_phase("browse", self.report.visited_topics)
+        logger.info(
+            f"完成浏览，共访问 {self.report.visited_topics} 个主题，"
+            f"点赞 {self.checkpoint.likes_used} 次"
+        )
+        self.report.memory = self.governor.summary()
+        logger.info(self.report.memory)
+
+    def _compare(self) -> None:
+        """显示前后对比信息，并生成HTML格式的对比表格"""
+        logger.info("显示连接信息对比")
+        self.connect_info.display_compare_info()
+        self.report.compare_html = self.connect_info.get_compare_info_html()
+
+    def _notify(self) -> None:
+        """上报运行结果，由后台投递线程异步发送(启用汇总窗口时合并发送)"""
+        notification_message = NOTIFICATION_SUCCESS_PREFIX
+        if self.report.browse_enabled:
+            notification_message += " + 浏览任务完成"
+
+        with span("notify"):
+            self.notifications.report(
+                notification_message, account=self.report.username
+            )
+            # 有时间预算时在预算内立即投递，不等待投递线程的轮询和退避
+            if self.time_budget is not None:
+                self.notifications.deliver_pending(
+                    min(NOTIFICATION_TOTAL_TIMEOUT, self.time_budget.remaining())
+                )
+
+    def _budgeted(self, phase: str, func: Callable[[], Any]) -> Callable[[], Any]:
+        """
+        设置了时间预算时，让任务中所有嵌套的重试在该阶段分到的时间内截止
+
+        Args:
+            phase: 阶段名称
+            func: 任务函数
+
+        Returns:
+            Callable[[], Any]: 任务函数
+        """
+        if self.time_budget is None:
+            return func
+
+        def run_in_budget() -> Any:
+            timeout = self.time_budget.phase_timeout(phase)
+            with retry_budget(timeout=timeout, name=phase):
+                return func()
+
+        return run_in_budget
+
+    def _diagnosed(self, phase: str, func: Callable[[], Any]) -> Callable[[], Any]:
+        """
+        启用内存泄漏诊断时，在任务结束后拍摄该阶段的堆快照
+
+        Args:
+            phase: 阶段名称
+            func: 任务函数
+
+        Returns:
+            Callable[[], Any]: 任务函数
+        """
+        if not leak_detector.enabled:
+            return func
+
+        def run_and_snapshot() -> Any:
+            try:
+                return func()
+            finally:
+                leak_detector.phase_boundary(phase)
+
+        return run_and_snapshot
+
+    def build_graph(self, browse_enabled: bool, max_topics: int) -> TaskGraph:
+        """
+        构建本次运行的任务图
+
+        登录前设置通知；登录后同时获取主题列表和签到前的连接信息，
+        两者都完成后才开始浏览，以保证签到前的数据不受浏览影响
+
+        Args:
+            browse_enabled: 是否浏览帖子
+            max_topics: 最多浏览的主题数量
+
+        Returns:
+            TaskGraph: 任务图
+        """
+        graph = TaskGraph()
+
+        def add(name: str, func: Callable[[], Any], deps: Iterable[str] = ()) -> None:
+            graph.add(name, self._diagnosed(name, self._budgeted(name, func)), deps)
+
+        add("notifications", self._start_notifications)
+        add("login", self._login)
+        add("connect-before", lambda: self._fetch_connect_info(False), ["login"])
+        if browse_enabled:
+            add("topic-list", self._collect_topics, ["login"])
+            add(
+                "browse",
+                lambda: self._browse(graph.tasks["topic-list"].result, max_topics),
+                ["topic-list", "connect-before"],
+            )
+            before_after = "browse"
+        else:
+            logger.info("浏览功能已禁用，跳过浏览任务")
+            before_after = "connect-before"
+        add("connect-after", lambda: self._fetch_connect_info(True), [before_after])
+        add("compare", self._compare, ["connect-after"])
+        add("notify", self._notify, ["compare", "notifications"])
+        return graph
+
+    def run(self) -> RunReport:
+        """
+        执行完整的签到流程: 登录、获取连接信息、浏览帖子、再次获取连接信息并上报结果
+
+        各步骤按任务图执行，互不依赖的步骤同时进行；
+        登录失败等预期内的失败记录在返回结果中，意外错误直接抛出
+
+        Returns:
+            RunReport: 运行结果
+        """
+        report = self.report
+        runs_started_total.inc()
+        try:
+            logger.info("开始运行 Linux.Do 签到脚本 (DrissionPage版)")
+            if not self._resolve_credentials():
+                report.error = "在配置文件和环境变量中均未找到有效的用户名或密码"
+                logger.error(report.error)
+                return report
+
+            self.checkpoint = RunCheckpoint(
+                CHECKPOINT_DIR / f"{profile_dir_for(report.username).name}.json",
+                self.checkpoint_window,
+            )
+            report.resumed = self.checkpoint.load()
+
+            browse_enabled = self.config.get("browse_enabled", True)
+            # 从配置中获取每次浏览的主题数量，默认为5
+            max_topics = self.config.get("max_topics", 5)
+            report.browse_enabled = browse_enabled
+            logger.info(f"浏览功能: {'启用' if browse_enabled else '禁用'}")
+            if browse_enabled:
+                logger.info(f"浏览主题数: {max_topics}")
+            if self.config.get("time_budget"):
+                self.time_budget = TimeBudget(self.config["time_budget"])
+                logger.info(
+                    f"时间预算: {self.time_budget.total:.0f} 秒，"
+                    f"为签到后连接信息和通知保留 {self.time_budget.reserve:.0f} 秒"
+                )
+
+            graph = self.build_graph(browse_enabled, max_topics)
+            collector: Optional[CdpCollector] = None
+            if NETWORK_STATS:
+                self.browser.network_stats = NetworkStats()
+            try:
+                if self.config.get("cdp_stats", CDP_STATS):
+                    with collect_cdp(report.username) as collector:
+                        graph.run()
+                else:
+                    graph.run()
+            except LoginFailed as e:
+                report.error = str(e)
+                logger.error("登录失败，程序终止")
+                self.notifications.report(
+                    NOTIFICATION_FAILURE_PREFIX, success=False, account=report.username
+                )
+                return report
+            finally:
+                report.tasks = graph.timings()
+                report.critical_path, report.critical_path_seconds = (
+                    graph.critical_path()
+                )
+                graph.log_summary()
+                if collector is not None:
+                    report.cdp = collector.summary()
+                    collector.log_summary()
+                if self.browser.network_stats is not None:
+                    report.network = self.browser.network_stats.summary()
+                    self.browser.network_stats.log_summary()
+                    self.browser.network_stats = None
+                leak_detector.end_cycle(self.browser.page_counts())
+                if self.time_budget is not None:
+                    report.skipped_topics = self.time_budget.skipped_topics
+                    self.time_budget.log_summary()
+
+            report.success = True
+            # 运行完成，下次运行从头开始
+            self.checkpoint.clear()
+            return report
+        finally:
+            report.duration = time.time() - report.started_at
+            result = "succeeded" if report.success else "failed"
+            runs_finished_total.inc(result=result)
+            last_run_timestamp.set(time.time(), result=result)
+
+    def close(self) -> None:
+        """释放会话自行创建的浏览器和通知管理器"""
+        if self._owns_browser:
+            self.browser.close_all_pages()
+        if self._owns_notifications:
+            self.notifications.stop_worker()
+            self.notifications.clear_handlers()
+
+
+class Runner:
+    """
+    以库的方式运行签到任务
+
+    每次run()都使用独立的会话；未指定调试地址时每个会话启动自己的浏览器，
+    使用账号独立的用户数据目录和调试端口，因此可以在多个线程中同时调用
+    """
+
+    def __init__(self, browser_address: Optional[str] = None):
+        """
+        初始化运行器
+
+        Args:
+            browser_address: 已运行浏览器的调试地址，设置后各会话附加到该浏览器
+        """
+        self.browser_address = browser_address
+
+    def _create_browser(self, config: Dict[str, Any]) -> BrowserManager:
+        """
+        为一次运行创建浏览器管理器
+
+        Args:
+            config: 配置字典
+
+        Returns:
+            BrowserManager: 浏览器管理器
+        """
+        browser = BrowserManager(self.browser_address)
+        if self.browser_address is None:
+            username = config.get("username") or "default"
+            profile_dir = profile_dir_for(username)
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            browser.configure_launch(str(profile_dir), find_free_port())
+        return browser
+
+    def run(self, config: Dict[str, Any]) -> RunReport:
+        """
+        执行一次签到任务
+
+        Args:
+            config: 配置字典
+
+        Returns:
+            RunReport: 运行结果，意外错误也记录在结果中而不是抛出
+        """
+        session = Session(config, browser=self._create_browser(config))
+        try:
+            return session.run()
+        except Exception as e:
+            report = session.report
+            report.error = str(e) or type(e).__name__
+            logger.error(f"运行出错: {report.error}")
+            session.notifications.report(
+                f"{NOTIFICATION_FAILURE_PREFIX}: {report.error}",
+                success=False,
+                account=report.username,
+            )
+            session.notifications.deliver_pending(NOTIFICATION_FLUSH_TIMEOUT)
+            return report
+        finally:
+            session.browser.close_all_pages()
+            session.close()
@@ -20,21 +20,42 @@ from config import (
     SCROLL_WAIT_MIN,
     SCROLL_WAIT_MAX,
     LIKE_PROBABILITY,
+    LOG_SAMPLE_EVERY,
 )
-from utils.decorators import retry, log_entry_exit
-from core.browser import browser_manager
+from utils.decorators import retry, log_entry_exit, timeit
+from utils.tracing import span
+from utils.metrics import topics_read_total, likes_total
+from core.browser import BrowserManager, browser_manager
+from core.memory import MemoryGovernor, memory_governor
+from core.cdp_stats import cdp_topic
+from utils.checkpoint import RunCheckpoint
+from utils.timebudget import TimeBudget
 from utils.html_parser import extract_links
 
 
 class TopicBrowser:
     """主题浏览器，负责浏览帖子和点赞功能"""
 
-    def __init__(self):
-        """初始化主题浏览器"""
+    def __init__(
+        self,
+        browser: Optional[BrowserManager] = None,
+        governor: Optional[MemoryGovernor] = None,
+    ):
+        """
+        初始化主题浏览器
+
+        Args:
+            browser: 使用的浏览器管理器或浏览器上下文，None表示创建新的管理器
+            governor: 在主题之间检查内存的内存控制器，None表示为浏览器创建新的控制器
+        """
+        self.browser = browser or BrowserManager()
+        self.governor = governor or MemoryGovernor(self.browser)
         self.visited_topics = set()  # 已访问的主题ID集合
+        self.likes_used = 0  # 本次运行的点赞次数
+        self.time_budget: Optional[TimeBudget] = None  # 浏览时生效的时间预算
+        self.dwell_scale = 1.0  # 滚动等待时间的缩放比例，时间不足时缩短
 
     @log_entry_exit()
-    @retry(retries=3, delay=2)
     def browse_topics(self, max_topics: int = 5) -> int:
         """
         浏览主题列表
@@ -45,8 +66,18 @@ class TopicBrowser:
         Returns:
             int: 成功浏览的主题数量
         """
+        return self.visit_topics(self.collect_topics(), max_topics)
+
+    @retry(retries=3, delay=2)
+    def collect_topics(self) -> List[Tuple[str, str]]:
+        """
+        打开最新主题页面并收集主题链接
+
+        Returns:
+            List[Tuple[str, str]]: (href, title)元组列表
+        """
         # 切换到最新主题页面
-        browser_manager.navigate(PAGE_URL, "main", wait_time=3.0)
+        self.browser.navigate(PAGE_URL, "main", wait_time=3.0)
 
         logger.info("开始获取主题列表")
 
@@ -64,16 +95,101 @@ class TopicBrowser:
         if not topic_links:
             topic_links = self._get_topics_with_fallback_method()
 
-        # 浏览收集到的主题
-        visited_count = 0
-        for href, title in topic_links[:max_topics]:
+        return topic_links
+
+    def visit_topics(
+        self,
+        topic_links: List[Tuple[str, str]],
+        max_topics: int = 5,
+        checkpoint: Optional[RunCheckpoint] = None,
+        time_budget: Optional[TimeBudget] = None,
+    ) -> int:
+        """
+        依次浏览收集到的主题
+
+        Args:
+            topic_links: (href, title)元组列表
+            max_topics: 最多浏览的主题数量
+            checkpoint: 检查点，跳过其中已处理的主题，并在每个主题后记录进度
+            time_budget: 时间预算，剩余时间不够浏览一个主题时停止，
+                不够按原停留时间浏览剩余主题时缩短停留时间
+
+        Returns:
+            int: 成功浏览的主题数量，包含检查点中记录的数量
+        """
+        pending = [
+            (href, title)
+            for href, title in topic_links[:max_topics]
+            if not (checkpoint and checkpoint.is_topic_done(href))
+        ]
+        skipped = min(len(topic_links), max_topics) - len(pending)
+        if skipped:
+            logger.info(f"跳过上次运行中已处理的 {skipped} 个主题")
+
+        self.time_budget = time_budget
+        try:
+            return self._visit_pending(pending, checkpoint)
+        finally:
+            self.time_budget = None
+            self.dwell_scale = 1.0
+
+    def _visit_pending(
+        self,
+        pending: List[Tuple[str, str]],
+        checkpoint: Optional[RunCheckpoint],
+    ) -> int:
+        """
+        浏览尚未处理的主题
+
+        Args:
+            pending: (href, title)元组列表
+            checkpoint: 检查点
+
+        Returns:
+            int: 成功浏览的主题数量，包含检查点中记录的数量
+        """
+        visited_count = checkpoint.visited_topics if checkpoint else 0
+        for index, (href, title) in enumerate(pending):
+            if self.time_budget is not None:
+                scale = self.time_budget.dwell_scale(len(pending) - index)
+                if scale is None:
+                    self.time_budget.skipped_topics = len(pending) - index
+                    logger.warning(
+                        f"剩余时间不足以浏览下一个主题，"
+                        f"跳过剩余的 {len(pending) - index} 个主题"
+                    )
+                    break
+                if scale < 1.0:
+                    logger.info(f"剩余时间不足，停留时间缩短为原来的 {scale:.0%}")
+                self.dwell_scale = scale
+
+            visited = False
+            likes_before = self.likes_used
+            started = time.monotonic()
             try:
                 logger.info(f"开始访问主题: {title}")
-                if self.visit_topic(href):
+                with cdp_topic(href):
+                    visited = self.visit_topic(href)
+                if visited:
                     visited_count += 1
+                    topics_read_total.inc()
             except Exception as e:
                 logger.error(f"访问主题 '{title}' 时出错: {str(e)}")
 
+            if self.time_budget is not None:
+                self.time_budget.record_topic(
+                    time.monotonic() - started, self.dwell_scale
+                )
+
+            if checkpoint:
+                checkpoint.complete_topic(href, visited, self.likes_used > likes_before)
+
+            # 主题页面已关闭，此时回收内存不会打断正在进行的浏览
+            try:
+                self.governor.checkpoint()
+            except Exception as e:
+                logger.warning(f"内存检查失败: {str(e)}")
+
         return visited_count
 
     def _get_topics_with_primary_selector(self) -> List[Tuple[str, str]]:
@@ -87,7 +203,7 @@ class TopicBrowser:
 
         try:
             # 使用XPath获取表格行(主题帖)
-            topic_rows = browser_manager.find_elements(
+            topic_rows = self.browser.find_elements(
                 'xpath://*[@id="ember57"]/table/tbody/tr'
             )
             logger.info(f"主选择器发现 {len(topic_rows)} 个主题帖")
@@ -113,7 +229,7 @@ class TopicBrowser:
                             href = link.attr("href")
                             topic_title = link.text
                             if href:
-                                logger.info(f"找到主题: {topic_title}, 链接: {href}")
+                                logger.debug(f"找到主题: {topic_title}, 链接: {href}")
                                 topic_links.append((href, topic_title))
                             else:
                                 logger.warning(f"主题 '{topic_title}' 没有链接属性")
@@ -139,7 +255,7 @@ class TopicBrowser:
         try:
             # 备用方法1：使用表格内通用选择器
             logger.warning("未找到主题帖，尝试使用备用选择器")
-            topic_rows = browser_manager.find_elements("table tbody tr")
+            topic_rows = self.browser.find_elements("table tbody tr")
             logger.info(f"备用选择器1找到 {len(topic_rows)} 个主题帖")
 
             if topic_rows:
@@ -163,7 +279,7 @@ class TopicBrowser:
                             href = link.attr("href")
                             topic_title = link.text
                             if href:
-                                logger.info(f"找到主题: {topic_title}, 链接: {href}")
+                                logger.debug(f"找到主题: {topic_title}, 链接: {href}")
                                 topic_links.append((href, topic_title))
                     except Exception as e:
                         logger.error(f"处理主题行时出错: {str(e)}")
@@ -171,7 +287,7 @@ class TopicBrowser:
             else:
                 # 备用方法2：使用.raw-topic-link类选择器
                 logger.warning("备用选择器1仍未找到主题帖，尝试使用备用选择器2")
-                links = browser_manager.find_elements("a.raw-topic-link")
+                links = self.browser.find_elements("a.raw-topic-link")
                 logger.info(f"备用选择器2找到 {len(links)} 个主题链接")
 
                 # 处理找到的链接
@@ -180,7 +296,7 @@ class TopicBrowser:
                         href = link.attr("href")
                         topic_title = link.text
                         if href:
-                            logger.info(f"找到主题: {topic_title}, 链接: {href}")
+                            logger.debug(f"找到主题: {topic_title}, 链接: {href}")
                             topic_links.append((href, topic_title))
                     except Exception as e:
                         logger.error(f"处理链接时出错: {str(e)}")
@@ -202,7 +318,7 @@ class TopicBrowser:
         try:
             # 尝试使用CSS选择器
             logger.warning("所有选择器策略失败，尝试使用最后的备用方法")
-            links = browser_manager.find_elements("a[data-topic-id]")
+            links = self.browser.find_elements("a[data-topic-id]")
             logger.info(f"最后的备用方法找到 {len(links)} 个主题链接")
 
             # 处理找到的链接
@@ -211,7 +327,7 @@ class TopicBrowser:
                     href = link.attr("href")
                     topic_title = link.text
                     if href:
-                        logger.info(f"找到主题: {topic_title}, 链接: {href}")
+                        logger.debug(f"找到主题: {topic_title}, 链接: {href}")
                         topic_links.append((href, topic_title))
                 except Exception as e:
                     logger.error(f"处理链接时出错: {str(e)}")
@@ -220,7 +336,7 @@ class TopicBrowser:
             # 如果仍然没有找到链接，尝试从HTML中提取
             if not topic_links:
                 logger.warning("所有选择器都失败，尝试从HTML中提取链接")
-                html = browser_manager.get_page_source()
+                html = self.browser.get_page_source()
                 extracted_links = extract_links(html)
 
                 for link_info in extracted_links:
@@ -237,6 +353,7 @@ class TopicBrowser:
 
         return topic_links
 
+    @timeit(name="topic")
     @retry(retries=2, delay=2)
     def visit_topic(self, topic_url: str) -> bool:
         """
@@ -256,19 +373,20 @@ class TopicBrowser:
 
         try:
             # 创建新页面并导航
-            browser_manager.create_page(page_id)
+            self.browser.create_page(page_id)
 
             # 构建完整URL并访问
             full_url = (
                 HOME_URL + topic_url if not topic_url.startswith("http") else topic_url
             )
-            if not browser_manager.navigate(full_url, page_id, wait_time=2.0):
+            if not self.browser.navigate(full_url, page_id, wait_time=2.0):
                 logger.error(f"导航到主题失败: {full_url}")
                 return False
 
             # 随机决定是否点赞
-            if random.random() < LIKE_PROBABILITY:
-                self._like_post(page_id)
+            if random.random() < LIKE_PROBABILITY and self._like_post(page_id):
+                self.likes_used += 1
+                likes_total.inc()
 
             # 浏览帖子内容
             self._scroll_and_read(page_id)
@@ -279,7 +397,7 @@ class TopicBrowser:
             return False
         finally:
             # 确保关闭页面
-            browser_manager.close_page(page_id)
+            self.browser.close_page(page_id)
 
     def _scroll_and_read(self, page_id: str) -> None:
         """
@@ -289,44 +407,67 @@ class TopicBrowser:
             page_id: 页面ID
         """
         prev_url = None
+        # 逐步的滚动只在调试日志中抽样记录，结束时汇总为一条日志
+        steps, scrolled, waited = 0, 0, 0.0
+        reason = "达到最大滚动次数"
 
         # 开始自动滚动
         for scroll_count in range(MAX_SCROLL_TIMES):
-            # 随机滚动一段距离
-            scroll_distance = random.randint(SCROLL_DISTANCE_MIN, SCROLL_DISTANCE_MAX)
-            logger.info(f"向下滚动 {scroll_distance} 像素...")
-
-            if not browser_manager.scroll_page(scroll_distance, page_id):
-                logger.warning("滚动失败，中断浏览")
-                break
-
-            # 获取当前页面
-            page = browser_manager.get_page(page_id)
-            if not page:
-                logger.warning("页面已关闭，中断浏览")
-                break
-
-            logger.info(f"已加载页面: {page.url}")
-
-            # 随机决定是否提前退出
-            if random.random() < 0.1:  # 10%的概率提前退出
-                logger.success("随机退出浏览")
+            # 浏览时间用完时结束当前主题，保留签到后连接信息和通知所需的时间
+            if self.time_budget is not None and not self.time_budget.browse_remaining():
+                reason = "浏览时间已用完"
                 break
 
-            # 检查是否到达页面底部
-            at_bottom = browser_manager.is_bottom_of_page(page_id)
-            current_url = page.url
-
-            if current_url != prev_url:
-                prev_url = current_url
-            elif at_bottom and prev_url == current_url:
-                logger.success("已到达页面底部，退出浏览")
-                break
-
-            # 动态随机等待
-            wait_time = random.uniform(SCROLL_WAIT_MIN, SCROLL_WAIT_MAX)
-            logger.info(f"等待 {wait_time:.2f} 秒...")
-            time.sleep(wait_time)
+            with span("scroll-step", step=scroll_count):
+                # 随机滚动一段距离
+                scroll_distance = random.randint(
+                    SCROLL_DISTANCE_MIN, SCROLL_DISTANCE_MAX
+                )
+                if not self.browser.scroll_page(scroll_distance, page_id):
+                    logger.warning("滚动失败，中断浏览")
+                    reason = "滚动失败"
+                    break
+                steps += 1
+                scrolled += scroll_distance
+
+                # 获取当前页面
+                page = self.browser.get_page(page_id)
+                if not page:
+                    logger.warning("页面已关闭，中断浏览")
+                    reason = "页面已关闭"
+                    break
+
+                # 随机决定是否提前退出
+                if random.random() < 0.1:  # 10%的概率提前退出
+                    reason = "随机退出"
+                    break
+
+                # 检查是否到达页面底部
+                at_bottom = self.browser.is_bottom_of_page(page_id)
+                current_url = page.url
+
+                if current_url != prev_url:
+                    prev_url = current_url
+                elif at_bottom and prev_url == current_url:
+                    reason = "已到达页面底部"
+                    break
+
+                # 动态随机等待
+                wait_time = (
+                    random.uniform(SCROLL_WAIT_MIN, SCROLL_WAIT_MAX) * self.dwell_scale
+                )
+                if scroll_count % LOG_SAMPLE_EVERY == 0:
+                    logger.debug(
+                        f"第 {scroll_count + 1} 步: 向下滚动 {scroll_distance} 像素，"
+                        f"等待 {wait_time:.2f} 秒，当前页面: {current_url}"
+                    )
+                time.sleep(wait_time)
+                waited += wait_time
+
+        logger.info(
+            f"结束浏览({reason}): 滚动 {steps} 次共 {scrolled} 像素，"
+            f"停留 {waited:.1f} 秒"
+        )
 
     def _like_post(self, page_id: str) -> bool:
         """
@@ -339,20 +480,20 @@ class TopicBrowser:
             bool: 是否成功点赞
         """
         try:
-            logger.info("尝试寻找点赞按钮")
+            logger.debug("尝试寻找点赞按钮")
 
             # 查找所有包含"点赞此帖子"的元素
-            like_candidates = browser_manager.find_elements(
+            like_candidates = self.browser.find_elements(
                 'xpath://*[contains(@title, "点赞此帖子")]', page_id
             )
 
             if like_candidates:
-                logger.info(f"找到 {len(like_candidates)} 个候选点赞元素")
+                logger.debug(f"找到 {len(like_candidates)} 个候选点赞元素")
 
                 # 尝试点击第一个可见的点赞按钮
                 for button in like_candidates:
                     try:
-                        logger.info("找到未点赞的帖子，准备点赞")
+                        logger.debug("找到未点赞的帖子，准备点赞")
                         button.click()
                         logger.info("点赞成功")
                         time.sleep(random.uniform(1, 2))
@@ -371,7 +512,7 @@ class TopicBrowser:
 
             # 获取页面HTML用于调试
             try:
-                html = browser_manager.get_page_source(page_id)
+                html = self.browser.get_page_source(page_id)
                 logger.debug(f"页面源码片段: {html[:500]}...")
             except:
                 pass
@@ -380,4 +521,4 @@ class TopicBrowser:
 
 
 # 创建主题浏览器实例
-topic_browser = TopicBrowser()
+topic_browser = TopicBrowser(browser_manager, memory_governor)
@@ -18,50 +18,56 @@ cron: 0 */6 * * *
 import os
 import sys
 import time
+import random
+import signal
 import argparse
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from loguru import logger
 
 # 导入配置和工具模块
 from config import (
     get_config,
     load_config,
+    reload_config_if_changed,
     create_default_config,
-    LOG_LEVEL,
-    LOG_FORMAT,
-    NOTIFICATION_SUCCESS_PREFIX,
+    NOTIFICATION_FAILURE_PREFIX,
+    NOTIFICATION_FLUSH_TIMEOUT,
     MAX_TOPICS,
+    RUN_RETRY_BUDGET,
+    RUN_RETRY_DEADLINE,
+    PROFILE_DIR,
+    FIXTURE_DIR,
+    BROWSER_SERVER_PORT,
+    ACCOUNT_CONCURRENCY,
+    ACCOUNT_TIMEOUT,
+    DAEMON_INTERVAL,
+    DAEMON_JITTER,
+    DAEMON_STATE_PATH,
+    METRICS_PORT,
+    LEAK_CHECK,
 )
-from utils import setup_notifications, notification_manager
-from core import (
-    browser_manager,
-    create_login_manager,
-    topic_browser,
-    connect_info_manager,
+from utils import (
+    setup_notifications,
+    notification_manager,
+    retry_budget,
+    tracer,
+    span,
+    metrics,
+    SamplingProfiler,
+    IntervalScheduler,
+    configure_logger,
+    leak_detector,
 )
+from utils.metrics import runs_started_total, runs_finished_total
 
 
-def configure_logger():
+def close_browser() -> None:
     """
-    配置日志记录器
+    关闭所有浏览器页面，浏览器模块尚未加载(从未启动浏览器)时直接跳过
     """
-    # 移除默认处理程序
-    logger.remove()
-
-    # 添加控制台处理程序
-    logger.add(sys.stderr, level=LOG_LEVEL, format=LOG_FORMAT)
-
-    # 添加文件处理程序
-    log_file = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "linuxdo-autoread.log"
-    )
-    logger.add(
-        log_file,
-        level=LOG_LEVEL,
-        format=LOG_FORMAT,
-        rotation="10 MB",  # 当日志文件达到10MB时轮转
-        retention="7 days",  # 保留7天的日志
-    )
+    browser_module = sys.modules.get("core.browser")
+    if browser_module is not None:
+        browser_module.browser_manager.close_all_pages()
 
 
 def parse_arguments():
@@ -89,121 +95,418 @@ def parse_arguments():
         "--debug", action="store_true", help="启用调试模式，显示更详细的日志"
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=float,
+        const=1.0,
+        default=None,
+        metavar="RATE",
+        help="启用采样性能分析，可指定0~1之间的采样概率(默认1，即每次运行都分析)",
+    )
 
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        help="单次运行的时间预算(秒)，时间不足时减少浏览的主题并缩短停留时间，"
+        "始终保留签到后连接信息和通知所需的时间",
+    )
 
-def run(config: Dict[str, Any]):
-    """
-    执行自动签到任务
+    parser.add_argument(
+        "--leak-check",
+        action="store_true",
+        help="启用内存泄漏诊断，每个阶段结束时拍摄tracemalloc快照，"
+        "报告跨运行持续增长的分配位置，适合与--daemon一起使用",
+    )
 
-    Args:
-        config: 配置字典
-    """
-    try:
-        # 跟踪凭据来源
-        credentials_from_env = False
+    parser.add_argument(
+        "--cdp-stats",
+        action="store_true",
+        help="统计每次运行的CDP调用次数、耗时和返回字节数，按阶段、调用方和主题汇总",
+    )
 
-        # 获取关键配置项
-        username = config.get("username")
-        password = config.get("password")
-        browse_enabled = config.get("browse_enabled", True)
-        max_topics = config.get(
-            "max_topics", 5
-        )  # 从配置中获取每次浏览的主题数量，默认为5
+    replay_group = parser.add_mutually_exclusive_group()
+    replay_group.add_argument(
+        "--record",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help=f"录制本次运行的所有响应和DOM快照到夹具归档，默认保存到{FIXTURE_DIR.name}目录",
+    )
+    replay_group.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="用夹具归档中的响应离线回放运行，并与录制时的各任务耗时对比",
+    )
 
-        # 命令行参数可以覆盖配置
-        if args.no_browse:
-            browse_enabled = False
-
-        # 检查是否有足够的凭据信息
-        if not username or not password:
-            # 尝试从环境变量直接获取（避免配置文件已加载但环境变量后续修改的情况）
-            username = (
-                username
-                or os.environ.get("USERNAME")
-                or os.environ.get("LINUXDO_USERNAME")
-            )
-            password = (
-                password
-                or os.environ.get("PASSWORD")
-                or os.environ.get("LINUXDO_PASSWORD")
-            )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="以常驻模式运行，按固定间隔自动执行，浏览器和连接在各轮之间保持",
+    )
 
-            # 如果环境变量中也没有凭据，则退出
-            if not username or not password:
-                logger.error("在配置文件和环境变量中均未找到有效的用户名或密码")
-                sys.exit(1)
-            else:
-                logger.info("已从环境变量获取登录凭据")
-                # 标记凭据来源
-                credentials_from_env = True
-                # 更新配置字典，确保后续函数可以正确获取凭据
-                config["username"] = username
-                config["password"] = password
-
-        # 显示启动信息
-        logger.info("开始运行 Linux.Do 签到脚本 (DrissionPage版)")
-        credential_source = "环境变量" if credentials_from_env else "配置文件"
-        logger.info(f"账户: {username} (来源: {credential_source})")
-        logger.info(f"浏览功能: {'启用' if browse_enabled else '禁用'}")
-        if browse_enabled:
-            logger.info(f"浏览主题数: {max_topics}")
-
-        # 设置通知
-        setup_notifications(config)
-
-        # 创建登录管理器
-        login_manager = create_login_manager(config)
-
-        # 执行登录
-        if not login_manager.login():
-            logger.error("登录失败，程序终止")
-            sys.exit(1)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DAEMON_INTERVAL,
+        help=f"常驻模式的执行间隔(秒)，默认为{DAEMON_INTERVAL}",
+    )
 
-        # 获取连接信息(登录前)
-        logger.info("获取签到前的连接信息")
-        connect_info_manager.get_connect_info(is_after=False)
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=DAEMON_JITTER,
+        help=f"常驻模式每次执行的随机延后上限(秒)，默认为{DAEMON_JITTER}",
+    )
 
-        # 浏览帖子
-        if browse_enabled:
-            logger.info("开始浏览帖子任务")
-            visited_count = topic_browser.browse_topics(max_topics=max_topics)
-            logger.info(f"完成浏览，共访问 {visited_count} 个主题")
-        else:
-            logger.info("浏览功能已禁用，跳过浏览任务")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=ACCOUNT_CONCURRENCY,
+        help=f"多账号模式下同时运行的账号数量，默认为{ACCOUNT_CONCURRENCY}",
+    )
 
-        # 再次获取连接信息(完成任务后)
-        logger.info("获取签到后的连接信息")
-        connect_info_manager.get_connect_info(is_after=True)
+    parser.add_argument(
+        "--account-timeout",
+        type=float,
+        default=ACCOUNT_TIMEOUT,
+        help=f"多账号模式下单个账号的超时时间(秒)，默认为{ACCOUNT_TIMEOUT}",
+    )
 
-        # 显示前后对比信息
-        logger.info("显示连接信息对比")
-        connect_info_manager.display_compare_info()
+    parser.add_argument(
+        "--contexts",
+        action="store_true",
+        help="多账号模式下所有账号共享一个浏览器，各自使用独立的浏览器上下文",
+    )
 
-        # 获取HTML格式的对比表格
-        html_compare_table = connect_info_manager.get_compare_info_html()
+    parser.add_argument(
+        "--browser-address",
+        metavar="HOST:PORT",
+        help="附加到已运行浏览器的调试地址，也可通过LINUXDO_BROWSER_ADDRESS环境变量设置",
+    )
 
-        # 发送通知
-        notification_message = NOTIFICATION_SUCCESS_PREFIX
-        if browse_enabled:
-            notification_message += " + 浏览任务完成"
+    parser.add_argument(
+        "--browser-server",
+        action="store_true",
+        help="启动并保持一个常驻浏览器，供其他运行通过--browser-address附加复用",
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help=f"常驻模式下指标端点的端口，0表示不启动，默认为{METRICS_PORT}",
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=BROWSER_SERVER_PORT,
+        help=f"常驻浏览器的远程调试端口，默认为{BROWSER_SERVER_PORT}",
+    )
+
+    return parser.parse_args()
 
-        # 发送普通文本通知
-        notification_manager.send_all(notification_message)
+
+def run(config: Dict[str, Any], resident: bool = False, browser=None):
+    """
+    执行自动签到任务
+
+    Args:
+        config: 配置字典
+        resident: 是否为常驻模式，常驻模式下结束后保留浏览器和通知投递线程
+        browser: 使用的浏览器上下文，None表示使用全局浏览器管理器；
+            指定时由调用方负责设置通知和关闭浏览器
+
+    Returns:
+        RunReport: 运行结果
+    """
+    # 核心模块依赖DrissionPage和rich，只在真正执行任务时才导入
+    from core import Session, browser_manager
+
+    shared_browser = browser is None
+    try:
+        # 使用全局浏览器时由会话设置通知并启动发件箱投递线程
+        session = Session(
+            config,
+            browser or browser_manager,
+            notification_manager,
+            manage_notifications=shared_browser,
+        )
+        report = session.run()
+        # 录制模式写入夹具归档，回放模式输出耗时对比
+        page_cache = (browser or browser_manager).page_cache
+        if page_cache is not None:
+            page_cache.close(report.tasks)
+        if not report.success:
+            sys.exit(1)
 
         # 设置环境变量，供GitHub Actions使用
         if "GITHUB_ENV" in os.environ:
             try:
                 with open(os.environ["GITHUB_ENV"], "a") as f:
-                    f.write(f"LINUXDO_COMPARE_TABLE<<EOF\n{html_compare_table}\nEOF\n")
+                    f.write(f"LINUXDO_COMPARE_TABLE<<EOF\n{report.compare_html}\nEOF\n")
                 logger.info("已将连接信息对比表格写入GitHub Actions环境变量")
             except Exception as e:
                 logger.error(f"写入GitHub环境变量失败: {str(e)}")
 
         logger.success("所有任务完成")
+        return report
     finally:
-        # 确保关闭所有浏览器页面
-        browser_manager.close_all_pages()
+        if not resident and shared_browser:
+            # 确保关闭所有浏览器页面
+            close_browser()
+            # 给投递线程留出有限的时间，未完成的通知留待下次运行
+            notification_manager.stop_worker()
+
+
+def run_account(config: Dict[str, Any], profile_dir: str, port: int) -> None:
+    """
+    在多账号模式的子进程中运行单个账号
+
+    Args:
+        config: 账号配置
+        profile_dir: 该账号独立的浏览器用户数据目录
+        port: 该账号浏览器的远程调试端口
+    """
+    configure_logger()
+    if config.get("leak_check", LEAK_CHECK):
+        leak_detector.start()
+
+    from core import browser_manager
+
+    # 各账号的Cookie必须隔离，不附加到共享的浏览器
+    browser_manager.attach(None)
+    browser_manager.configure_launch(profile_dir, port)
+
+    try:
+        run_single_account(config)
+    finally:
+        # 等待队列中的日志写完再退出子进程
+        logger.complete()
+
+
+def run_account_in_context(config: Dict[str, Any], context) -> None:
+    """
+    在共享浏览器的独立浏览器上下文中运行单个账号，由多账号模式的线程调用
+
+    Args:
+        config: 账号配置
+        context: 该账号独立的浏览器上下文
+    """
+    run_single_account(config, context)
+
+
+def run_single_account(config: Dict[str, Any], browser=None) -> None:
+    """
+    运行单个账号，出错时立即发送该账号的失败通知后再抛出
+
+    Args:
+        config: 账号配置
+        browser: 使用的浏览器上下文，None表示使用全局浏览器管理器
+    """
+    try:
+        with retry_budget(max_retries=RUN_RETRY_BUDGET, timeout=RUN_RETRY_DEADLINE):
+            with span("run", account=config.get("username")):
+                run(config, browser=browser)
+    except Exception as e:
+        logger.error(f"账号 {config.get('username')} 运行出错: {str(e)}")
+        notification_manager.report(
+            f"{NOTIFICATION_FAILURE_PREFIX}: {str(e)}",
+            success=False,
+            account=config.get("username"),
+        )
+        notification_manager.deliver_pending(NOTIFICATION_FLUSH_TIMEOUT)
+        raise
+
+
+def run_accounts(
+    config: Dict[str, Any],
+    concurrency: int,
+    timeout: float,
+    no_browse: bool = False,
+    contexts: bool = False,
+) -> bool:
+    """
+    多账号模式，并发运行所有账号
+
+    Args:
+        config: 包含accounts列表的配置字典
+        concurrency: 同时运行的账号数量
+        timeout: 单个账号的超时时间(秒)
+        no_browse: 是否对所有账号禁用浏览功能
+        contexts: 是否在同一个浏览器的独立浏览器上下文中运行各账号，
+            否则每个账号使用独立的进程和浏览器
+
+    Returns:
+        bool: 是否所有账号都运行成功
+    """
+    from core import AccountPool, ContextPool, account_configs, browser_manager
+
+    configs = account_configs(config)
+    if no_browse:
+        for cfg in configs:
+            cfg["browse_enabled"] = False
+    if leak_detector.enabled and not contexts:
+        # 子进程每次运行后退出，只能报告单次运行的堆大小和页面数量
+        logger.warning("独立进程模式下无法跨运行对比堆快照，检查内存泄漏请使用--contexts")
+        for cfg in configs:
+            cfg["leak_check"] = True
+
+    mode = "浏览器上下文" if contexts else "独立进程"
+    logger.info(f"多账号模式({mode}): 共 {len(configs)} 个账号，并发数 {concurrency}")
+    started = time.time()
+    setup_notifications(config)
+    with span("accounts", count=len(configs)):
+        if contexts:
+            # 各线程共用父进程的通知投递线程
+            notification_manager.start_worker()
+            try:
+                pool = ContextPool(
+                    run_account_in_context,
+                    browser_manager,
+                    concurrency=concurrency,
+                    timeout=timeout,
+                )
+                results = pool.run(configs)
+            finally:
+                close_browser()
+        else:
+            results = AccountPool(run_account, concurrency, timeout).run(configs)
+            for result in results:
+                telemetry = result.get("telemetry")
+                if telemetry is not None:
+                    tracer.absorb(telemetry["tracer"])
+                    metrics.absorb(telemetry["metrics"])
+                    continue
+                # 超时或崩溃的子进程没有回传指标，由父进程记录其运行结果
+                runs_started_total.inc()
+                runs_finished_total.inc(
+                    result="succeeded" if result["success"] else "failed"
+                )
+    elapsed = time.time() - started
+
+    # 超时或异常退出的账号没有机会自行上报，由父进程补发失败通知
+    for result in results:
+        username, duration = result["username"], result["duration"]
+        if result["success"]:
+            logger.success(f"账号 {username}: 成功 ({duration:.0f} 秒)")
+            continue
+        logger.error(f"账号 {username}: 失败 ({duration:.0f} 秒)，{result['error']}")
+        if not result["finished"]:
+            notification_manager.report(
+                f"{NOTIFICATION_FAILURE_PREFIX}: {result['error']}",
+                success=False,
+                account=username,
+            )
+    notification_manager.deliver_pending(NOTIFICATION_FLUSH_TIMEOUT)
+    notification_manager.stop_worker()
+
+    succeeded = sum(1 for result in results if result["success"])
+    serial = sum(result["duration"] for result in results)
+    logger.info(
+        f"多账号运行完成: 成功 {succeeded}/{len(results)}，"
+        f"总耗时 {elapsed:.0f} 秒(串行约需 {serial:.0f} 秒)"
+    )
+    return succeeded == len(results)
+
+
+def run_daemon(
+    config_path: str,
+    interval: float,
+    jitter: float,
+    no_browse: bool = False,
+    concurrency: int = ACCOUNT_CONCURRENCY,
+    account_timeout: float = ACCOUNT_TIMEOUT,
+    contexts: bool = False,
+    time_budget: Optional[float] = None,
+    metrics_port: int = METRICS_PORT,
+    cdp_stats: bool = False,
+) -> None:
+    """
+    以常驻模式按计划循环执行签到任务
+
+    浏览器、通知处理器的HTTP连接池和缓存在各轮之间保持，
+    每轮开始前检查配置文件是否变化，并清空上一轮的运行状态
+
+    Args:
+        config_path: 配置文件路径
+        interval: 执行间隔(秒)
+        jitter: 每次执行的随机延后上限(秒)
+        no_browse: 是否禁用浏览功能
+        concurrency: 多账号模式下同时运行的账号数量
+        account_timeout: 多账号模式下单个账号的超时时间(秒)
+        contexts: 多账号模式下是否使用共享浏览器的浏览器上下文
+        time_budget: 每轮运行的时间预算(秒)，None表示使用配置文件中的设置
+        metrics_port: 指标端点的端口，0表示不启动
+        cdp_stats: 是否统计每轮运行的CDP调用
+    """
+    scheduler = IntervalScheduler(interval, jitter, DAEMON_STATE_PATH)
+
+    def handle_stop(signum, frame):
+        logger.warning("收到停止信号，当前一轮执行完成后退出")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    def cycle() -> None:
+        if reload_config_if_changed():
+            logger.info("配置文件已变化，已重新加载")
+        config = load_config(config_path)
+        if no_browse:
+            config["browse_enabled"] = False
+        if time_budget is not None:
+            config["time_budget"] = time_budget
+        if cdp_stats:
+            config["cdp_stats"] = True
+
+        tracer.reset_records()
+        if config["accounts"]:
+            # 多账号模式下每个账号都在独立的子进程中运行，不保留浏览器
+            run_accounts(config, concurrency, account_timeout, no_browse, contexts)
+        else:
+            with retry_budget(
+                max_retries=RUN_RETRY_BUDGET, timeout=RUN_RETRY_DEADLINE
+            ):
+                with span("run"):
+                    run(config, resident=True)
+        tracer.export()
+        metrics.export()
+
+    logger.info(f"以常驻模式运行，执行间隔 {interval:.0f} 秒，随机延后 {jitter:.0f} 秒以内")
+    if metrics_port:
+        metrics.serve(port=metrics_port)
+    try:
+        scheduler.run_forever(cycle)
+    finally:
+        metrics.stop_server()
+        close_browser()
+        notification_manager.stop_worker()
+
+
+def run_browser_server(port: int) -> None:
+    """
+    运行常驻浏览器，直到收到停止信号
+
+    Args:
+        port: 远程调试端口
+    """
+    from core import BrowserServer
+
+    server = BrowserServer(port=port)
+
+    def handle_stop(signum, frame):
+        logger.warning("收到停止信号，关闭常驻浏览器")
+        server.stop()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    logger.info(f"其他运行可通过 --browser-address {server.address} 附加到该浏览器")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.warning("用户中断，关闭常驻浏览器")
 
 
 if __name__ == "__main__":
@@ -212,32 +515,123 @@ if __name__ == "__main__":
 
     # 配置日志记录器
     if args.debug:
-        logger.remove()
-        logger.add(sys.stderr, level="DEBUG")
+        configure_logger("DEBUG", log_file=None)
     else:
         configure_logger()
 
+    # 诊断模式需要尽早开始追踪，之后的分配才有调用栈
+    if args.leak_check or LEAK_CHECK:
+        leak_detector.start()
+
     # 创建默认配置文件并退出
     if args.create_config:
         create_default_config(args.config or "config.json")
         sys.exit(0)
 
+    # 常驻浏览器不需要加载配置
+    if args.browser_server:
+        run_browser_server(args.port)
+        sys.exit(0)
+
+    # 附加到已运行的浏览器，命令行参数优先于环境变量
+    if args.browser_address:
+        from core import browser_manager
+
+        browser_manager.attach(args.browser_address)
+
+    # 录制或回放单账号运行
+    if args.record is not None or args.replay:
+        from core import browser_manager, PageCache
+
+        if args.replay:
+            browser_manager.page_cache = PageCache.replay(args.replay)
+        else:
+            browser_manager.page_cache = PageCache.record(
+                args.record
+                or FIXTURE_DIR / time.strftime("fixture-%Y%m%d-%H%M%S.zip")
+            )
+
     try:
         # 加载配置
         config = load_config(args.config)
 
-        # 执行主程序
-        run(config)
+        # 程序退出时导出各阶段的耗时直方图和运行指标
+        tracer.export_at_exit()
+        metrics.export_at_exit()
+
+        # 常驻模式由调度器循环执行，直到收到停止信号
+        if args.daemon:
+            run_daemon(
+                args.config,
+                args.interval,
+                args.jitter,
+                args.no_browse,
+                args.concurrency,
+                args.account_timeout,
+                args.contexts,
+                args.time_budget,
+                args.metrics_port,
+                args.cdp_stats,
+            )
+            sys.exit(0)
+
+        # 命令行参数可以覆盖配置
+        if args.no_browse:
+            config["browse_enabled"] = False
+        if args.time_budget is not None:
+            config["time_budget"] = args.time_budget
+        if args.cdp_stats:
+            config["cdp_stats"] = True
+
+        # 多账号模式，所有账号都成功时才返回0
+        if config["accounts"]:
+            succeeded = run_accounts(
+                config,
+                args.concurrency,
+                args.account_timeout,
+                args.no_browse,
+                args.contexts,
+            )
+            sys.exit(0 if succeeded else 1)
+
+        # 按采样概率决定本次运行是否启用性能分析
+        profiler = None
+        if args.profile is not None and random.random() < args.profile:
+            profiler = SamplingProfiler()
+            profiler.start()
+
+        try:
+            # 执行主程序，所有嵌套的重试共享同一份预算
+            with retry_budget(
+                max_retries=RUN_RETRY_BUDGET, timeout=RUN_RETRY_DEADLINE
+            ):
+                with span("run"):
+                    run(config)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                profiler.log_summary()
+                prefix = PROFILE_DIR / time.strftime("profile-%Y%m%d-%H%M%S")
+                for path in profiler.write_collapsed(prefix):
+                    logger.info(f"已写入折叠栈文件: {path}")
     except KeyboardInterrupt:
         logger.warning("用户中断，退出程序")
         # 确保关闭所有浏览器页面
-        browser_manager.close_all_pages()
+        close_browser()
         sys.exit(0)
     except Exception as e:
         logger.error(f"程序运行出错: {str(e)}")
         import traceback
 
         logger.debug(f"错误详情: {traceback.format_exc()}")
+        # 失败结果不参与汇总，立即投递
+        try:
+            notification_manager.report(
+                f"{NOTIFICATION_FAILURE_PREFIX}: {str(e)}", success=False
+            )
+            notification_manager.deliver_pending(NOTIFICATION_FLUSH_TIMEOUT)
+        except Exception as notify_error:
+            logger.error(f"发送失败通知时出错: {str(notify_error)}")
         # 确保关闭所有浏览器页面
-        browser_manager.close_all_pages()
+        close_browser()
         sys.exit(1)
@@ -4,41 +4,86 @@
 工具模块
 
 此模块集成了所有工具类和函数，包括装饰器、HTML解析和通知等
+
+各子模块在首次使用时才会导入，避免启动时加载requests等重量级依赖
 """
 
-from .decorators import retry, timeit, log_entry_exit
-from .html_parser import (
-    clean_html,
-    extract_table_data,
-    extract_links,
-    format_table,
-    safe_html_parse,
-)
-from .notification import (
-    NotificationHandler,
-    GotifyNotification,
-    ServerChanNotification,
-    NotificationManager,
-    notification_manager,
-    setup_notifications,
-)
-
-__all__ = [
+import importlib
+from typing import Any, List
+
+# 导出名称 -> 所在子模块，首次访问时才导入对应子模块
+_EXPORTS = {
     # 从decorators.py导出
-    "retry",
-    "timeit",
-    "log_entry_exit",
+    "retry": "decorators",
+    "timeit": "decorators",
+    "log_entry_exit": "decorators",
+    "RetryBudget": "decorators",
+    "retry_budget": "decorators",
+    "get_retry_budget": "decorators",
     # 从html_parser.py导出
-    "clean_html",
-    "extract_table_data",
-    "extract_links",
-    "format_table",
-    "safe_html_parse",
+    "clean_html": "html_parser",
+    "extract_table_data": "html_parser",
+    "extract_links": "html_parser",
+    "format_table": "html_parser",
+    "safe_html_parse": "html_parser",
     # 从notification.py导出
-    "NotificationHandler",
-    "GotifyNotification",
-    "ServerChanNotification",
-    "NotificationManager",
-    "notification_manager",
-    "setup_notifications",
-]
+    "NotificationHandler": "notification",
+    "GotifyNotification": "notification",
+    "ServerChanNotification": "notification",
+    "NotificationManager": "notification",
+    "notification_manager": "notification",
+    "setup_notifications": "notification",
+    "create_http_session": "notification",
+    # 从outbox.py导出
+    "NotificationOutbox": "outbox",
+    # 从log.py导出
+    "configure_logger": "log",
+    # 从tracing.py导出
+    "Tracer": "tracing",
+    "Histogram": "tracing",
+    "tracer": "tracing",
+    "span": "tracing",
+    # 从metrics.py导出
+    "MetricsRegistry": "metrics",
+    "metrics": "metrics",
+    # 从leakcheck.py导出
+    "LeakDetector": "leakcheck",
+    "leak_detector": "leakcheck",
+    # 从profiler.py导出
+    "SamplingProfiler": "profiler",
+    # 从scheduler.py导出
+    "IntervalScheduler": "scheduler",
+    # 从taskgraph.py导出
+    "Task": "taskgraph",
+    "TaskGraph": "taskgraph",
+    # 从checkpoint.py导出
+    "RunCheckpoint": "checkpoint",
+    # 从timebudget.py导出
+    "TimeBudget": "timebudget",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    按需导入子模块并返回导出对象(PEP 562)
+
+    Args:
+        name: 导出名称
+
+    Returns:
+        Any: 导出对象
+    """
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """列出包括延迟导出名称在内的模块属性"""
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+断点续跑模块
+
+在每个阶段和每个主题完成后把运行进度写入磁盘，
+浏览器崩溃或进程被终止后，在有效期内重新运行时从最后的检查点继续，
+不再重复已完成的登录、签到前连接信息获取和主题浏览
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Union
+from loguru import logger
+
+from config import CHECKPOINT_WINDOW
+
+
+class RunCheckpoint:
+    """单个账号一次运行的检查点"""
+
+    def __init__(
+        self, path: Union[str, Path], window: float = CHECKPOINT_WINDOW
+    ):
+        """
+        初始化检查点
+
+        Args:
+            path: 检查点文件路径
+            window: 检查点有效期(秒)，距最后一次保存超过该时长的检查点被丢弃，
+                0表示不从检查点恢复
+        """
+        self.path = Path(path)
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """清空进度，从头开始运行"""
+        self.started_at = time.time()
+        self.updated_at = self.started_at
+        self.phases: Dict[str, Any] = {}  # 已完成的阶段 -> 阶段结果
+        self.topics_done: List[str] = []  # 已处理的主题链接
+        self.visited_topics = 0  # 成功浏览的主题数量
+        self.likes_used = 0  # 已点赞次数
+        self.resumed = False
+
+    def load(self) -> bool:
+        """
+        读取有效期内的检查点
+
+        Returns:
+            bool: 是否从检查点恢复了进度
+        """
+        self.reset()
+        if not self.window or not self.path.exists():
+            return False
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取检查点失败，将从头运行: {str(e)}")
+            return False
+
+        age = time.time() - state.get("updated_at", 0)
+        if age > self.window:
+            logger.info(f"检查点已保存 {age:.0f} 秒，超过有效期，将从头运行")
+            self.clear()
+            return False
+
+        self.started_at = state["started_at"]
+        self.updated_at = state["updated_at"]
+        self.phases = state.get("phases", {})
+        self.topics_done = state.get("topics_done", [])
+        self.visited_topics = state.get("visited_topics", 0)
+        self.likes_used = state.get("likes_used", 0)
+        self.resumed = True
+        logger.info(
+            f"从 {age:.0f} 秒前的检查点恢复: 已完成阶段 {list(self.phases) or '无'}，"
+            f"已处理 {len(self.topics_done)} 个主题"
+        )
+        return True
+
+    def save(self) -> None:
+        """将当前进度写入磁盘，先写临时文件再替换，中途被终止也不会损坏检查点"""
+        if not self.window:
+            return
+
+        with self._lock:
+            self.updated_at = time.time()
+            state = {
+                "started_at": self.started_at,
+                "updated_at": self.updated_at,
+                "phases": self.phases,
+                "topics_done": self.topics_done,
+                "visited_topics": self.visited_topics,
+                "likes_used": self.likes_used,
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self.path.with_suffix(".tmp")
+                # 检查点中包含登录Cookie，只允许当前用户读写
+                fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                logger.warning(f"保存检查点失败: {str(e)}")
+
+    def clear(self) -> None:
+        """删除检查点文件，运行成功结束后调用"""
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"删除检查点失败: {str(e)}")
+
+    def done(self, phase: str) -> bool:
+        """
+        判断阶段是否已完成
+
+        Args:
+            phase: 阶段名称
+
+        Returns:
+            bool: 是否已完成
+        """
+        return phase in self.phases
+
+    def result(self, phase: str) -> Any:
+        """
+        获取已完成阶段的结果
+
+        Args:
+            phase: 阶段名称
+
+        Returns:
+            Any: 阶段结果，未完成时为None
+        """
+        return self.phases.get(phase)
+
+    def complete_phase(self, phase: str, result: Any = None) -> None:
+        """
+        记录阶段完成并保存
+
+        Args:
+            phase: 阶段名称
+            result: 阶段结果，必须可以序列化为JSON
+        """
+        with self._lock:
+            self.phases[phase] = result
+        self.save()
+
+    def complete_topic(self, href: str, visited: bool, liked: bool) -> None:
+        """
+        记录一个主题处理完毕并保存
+
+        Args:
+            href: 主题链接
+            visited: 是否成功浏览
+            liked: 是否点了赞
+        """
+        with self._lock:
+            self.topics_done.append(href)
+            self.visited_topics += int(visited)
+            self.likes_used += int(liked)
+        self.save()
+
+    def is_topic_done(self, href: str) -> bool:
+        """
+        判断主题是否已处理
+
+        Args:
+            href: 主题链接
+
+        Returns:
+            bool: 是否已处理
+        """
+        return href in self.topics_done
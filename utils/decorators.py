@@ -7,30 +7,200 @@
 """
 
 import time
+import random
 import functools
-from typing import Callable, Any, TypeVar, Optional
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Any, TypeVar, Optional, Dict, Iterator
 from loguru import logger
 
-from config import DEFAULT_RETRY_TIMES, DEFAULT_RETRY_DELAY
+from config import (
+    DEFAULT_RETRY_TIMES,
+    DEFAULT_RETRY_DELAY,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_RETRY_MAX_DELAY,
+    DEFAULT_RETRY_JITTER,
+)
+from utils.tracing import tracer
+from utils.metrics import retries_total
 
 # 定义类型变量
 F = TypeVar("F", bound=Callable[..., Any])
 
 
+class RetryBudget:
+    """
+    重试预算，在同一调用链上的所有retry装饰器之间共享
+
+    嵌套的装饰器每次重试前都需要向预算申请，次数用尽或截止时间已过时
+    内层重试立即放弃，避免外层和内层的重试次数相乘
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        parent: Optional["RetryBudget"] = None,
+    ):
+        """
+        初始化重试预算
+
+        Args:
+            max_retries: 允许的重试总次数，None表示不限制
+            timeout: 允许重试的时长(秒)，None表示不限制
+            parent: 外层预算，申请时同时受外层预算约束
+        """
+        self.max_retries = max_retries
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+        self.used = 0
+        self.denied = 0
+        self.exhausted_reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def remaining_time(self) -> Optional[float]:
+        """
+        获取距离截止时间的剩余秒数(考虑外层预算)
+
+        Returns:
+            Optional[float]: 剩余秒数，不限制时为None
+        """
+        candidates = []
+        if self.deadline is not None:
+            candidates.append(self.deadline - time.monotonic())
+        if self.parent is not None:
+            parent_remaining = self.parent.remaining_time()
+            if parent_remaining is not None:
+                candidates.append(parent_remaining)
+        return max(min(candidates), 0.0) if candidates else None
+
+    def acquire(self, delay: float = 0.0) -> bool:
+        """
+        申请一次重试机会
+
+        Args:
+            delay: 本次重试前需要等待的秒数
+
+        Returns:
+            bool: 是否允许重试
+        """
+        with self._lock:
+            reason = None
+            if self.max_retries is not None and self.used >= self.max_retries:
+                reason = f"重试次数已用尽({self.max_retries})"
+            else:
+                remaining = self.remaining_time()
+                if remaining is not None and remaining <= delay:
+                    reason = "已到达重试截止时间"
+
+            if reason is None and self.parent is not None:
+                if not self.parent.acquire(delay):
+                    reason = f"外层预算已耗尽({self.parent.exhausted_reason})"
+
+            if reason is not None:
+                self.denied += 1
+                if self.exhausted_reason is None:
+                    self.exhausted_reason = reason
+                return False
+
+            self.used += 1
+            return True
+
+    @property
+    def exhausted(self) -> bool:
+        """预算是否曾经拒绝过重试"""
+        return self.exhausted_reason is not None
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        获取预算使用情况
+
+        Returns:
+            Dict[str, Any]: 已用次数、上限、被拒绝次数和耗尽原因
+        """
+        return {
+            "used": self.used,
+            "max_retries": self.max_retries,
+            "denied": self.denied,
+            "remaining_time": self.remaining_time(),
+            "exhausted_reason": self.exhausted_reason,
+        }
+
+
+# 当前调用链上生效的重试预算(上下文局部变量，线程和协程之间互不影响)
+_current_budget: ContextVar[Optional[RetryBudget]] = ContextVar(
+    "retry_budget", default=None
+)
+
+
+def get_retry_budget() -> Optional[RetryBudget]:
+    """
+    获取当前上下文中生效的重试预算
+
+    Returns:
+        Optional[RetryBudget]: 当前预算，未设置时为None
+    """
+    return _current_budget.get()
+
+
+@contextmanager
+def retry_budget(
+    max_retries: Optional[int] = None,
+    timeout: Optional[float] = None,
+    name: str = "run",
+) -> Iterator[RetryBudget]:
+    """
+    在当前上下文中设置重试预算，退出时报告预算使用情况
+
+    可以嵌套使用，内层预算同时受外层预算的次数和截止时间约束
+
+    Args:
+        max_retries: 允许的重试总次数，None表示不限制
+        timeout: 允许重试的时长(秒)，None表示不限制
+        name: 预算名称，用于日志
+
+    Yields:
+        RetryBudget: 生效的重试预算
+    """
+    budget = RetryBudget(max_retries, timeout, parent=_current_budget.get())
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+        if budget.exhausted:
+            logger.warning(
+                f"重试预算 {name} 已耗尽: {budget.exhausted_reason}，"
+                f"已重试 {budget.used} 次，放弃 {budget.denied} 次重试"
+            )
+        else:
+            logger.debug(f"重试预算 {name} 使用情况: 已重试 {budget.used} 次")
+
+
 def retry(
     retries: int = DEFAULT_RETRY_TIMES,
     delay: float = DEFAULT_RETRY_DELAY,
     exceptions: tuple = (Exception,),
     logger_func: Optional[Callable] = None,
+    backoff: float = DEFAULT_RETRY_BACKOFF,
+    max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+    jitter: float = DEFAULT_RETRY_JITTER,
 ) -> Callable[[F], F]:
     """
     通用重试装饰器
 
+    重试间隔按指数退避增长并加入随机抖动；每次重试前向当前上下文的
+    重试预算申请，预算耗尽或截止时间已过时直接抛出最后一次的异常
+
     Args:
-        retries: 最大重试次数
-        delay: 重试间隔(秒)
+        retries: 最大尝试次数
+        delay: 首次重试间隔(秒)
         exceptions: 需要捕获的异常类型
         logger_func: 自定义日志函数，如果不指定则使用loguru.logger
+        backoff: 每次重试后间隔的放大倍数
+        max_delay: 重试间隔上限(秒)
+        jitter: 随机抖动比例，如0.2表示在±20%范围内浮动
 
     Returns:
         装饰器函数
@@ -49,11 +219,24 @@ def retry(
                             f"函数 {func.__name__} 在 {retries} 次尝试后最终执行失败: {str(e)}"
                         )
                         raise
-                    else:
-                        log.warning(
-                            f"函数 {func.__name__} 第 {attempt + 1}/{retries} 次尝试失败: {str(e)}"
+
+                    sleep_time = min(delay * (backoff**attempt), max_delay)
+                    sleep_time *= 1 + random.uniform(-jitter, jitter)
+
+                    budget = _current_budget.get()
+                    if budget is not None and not budget.acquire(sleep_time):
+                        log.error(
+                            f"函数 {func.__name__} 第 {attempt + 1}/{retries} 次尝试失败，"
+                            f"重试预算已耗尽({budget.exhausted_reason})，不再重试: {str(e)}"
                         )
-                        time.sleep(delay)
+                        raise
+
+                    log.warning(
+                        f"函数 {func.__name__} 第 {attempt + 1}/{retries} 次尝试失败: {str(e)}，"
+                        f"{sleep_time:.2f} 秒后重试"
+                    )
+                    retries_total.inc(function=func.__name__)
+                    time.sleep(sleep_time)
 
             # 理论上永远不会执行到这里，但为了类型安全
             return func(*args, **kwargs)
@@ -63,12 +246,18 @@ def retry(
     return decorator
 
 
-def timeit(logger_func: Optional[Callable] = None) -> Callable[[F], F]:
+def timeit(
+    logger_func: Optional[Callable] = None, name: Optional[str] = None
+) -> Callable[[F], F]:
     """
     计时装饰器
 
+    使用单调时钟计时，并作为span记录到全局追踪器中，
+    嵌套调用会形成span层级，同名span汇总到同一个延迟直方图
+
     Args:
         logger_func: 自定义日志函数，如果不指定则使用loguru.logger
+        name: span名称，默认为函数名
 
     Returns:
         装饰器函数
@@ -76,13 +265,13 @@ def timeit(logger_func: Optional[Callable] = None) -> Callable[[F], F]:
     log = logger_func or logger
 
     def decorator(func: F) -> F:
+        span_name = name or func.__name__
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = time.time()
-            result = func(*args, **kwargs)
-            end_time = time.time()
-            execution_time = end_time - start_time
-            log.debug(f"函数 {func.__name__} 执行耗时: {execution_time:.4f} 秒")
+            with tracer.span(span_name) as record:
+                result = func(*args, **kwargs)
+            log.debug(f"函数 {func.__name__} 执行耗时: {record['duration']:.4f} 秒")
             return result
 
         return wrapper  # type: ignore
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存泄漏诊断模块
+
+常驻进程的诊断模式: 用tracemalloc在每个阶段结束时拍摄Python堆快照，
+与上一轮同一阶段的快照对比，找出连续多轮持续增长的分配位置，
+并报告浏览器管理器持有的页面数量，用于发现跨运行积累的Python侧状态
+
+拍摄快照会遍历所有被追踪的内存块，只应在诊断时启用
+"""
+
+import gc
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from config import LEAK_CHECK_FRAMES, LEAK_CHECK_TOP_N, LEAK_CHECK_MIN_CYCLES
+
+# 不计入统计的分配位置(包括诊断器自身保存的快照和增长记录)
+_IGNORED_FILES = (
+    tracemalloc.__file__,
+    __file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+)
+
+
+class LeakDetector:
+    """跨运行对比阶段快照，找出持续增长的分配位置"""
+
+    def __init__(
+        self,
+        top: int = LEAK_CHECK_TOP_N,
+        min_cycles: int = LEAK_CHECK_MIN_CYCLES,
+    ):
+        """
+        初始化诊断器
+
+        Args:
+            top: 报告的分配位置数量
+            min_cycles: 连续增长多少轮后才报告
+        """
+        self.top = top
+        self.min_cycles = min_cycles
+        self.cycles = 0
+        # 阶段 -> 上一轮该阶段结束时的快照
+        self._snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        # (阶段, 分配位置) -> {"streak": 连续增长轮数, "growth": 累计增长, "size": 当前大小}
+        self._growth: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否处于诊断模式"""
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = LEAK_CHECK_FRAMES) -> None:
+        """
+        开始追踪内存分配
+
+        Args:
+            frames: 每次分配保留的调用栈深度
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"已启用内存泄漏诊断，调用栈深度 {frames}")
+
+    def phase_boundary(self, phase: str) -> None:
+        """
+        在阶段结束时拍摄快照，与上一轮同一阶段的快照对比
+
+        Args:
+            phase: 阶段名称
+        """
+        if not self.enabled:
+            return
+
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, name) for name in _IGNORED_FILES]
+        )
+        with self._lock:
+            previous = self._snapshots.get(phase)
+            self._snapshots[phase] = snapshot
+            if previous is None:
+                return
+
+            for stat in snapshot.compare_to(previous, "lineno"):
+                key = (phase, str(stat.traceback[0]))
+                entry = self._growth.setdefault(
+                    key, {"streak": 0, "growth": 0, "size": 0}
+                )
+                entry["size"] = stat.size
+                if stat.size_diff > 0:
+                    entry["streak"] += 1
+                    entry["growth"] += stat.size_diff
+                else:
+                    entry["streak"] = 0
+                    entry["growth"] = 0
+
+    def growing_sites(self) -> List[Dict[str, Any]]:
+        """
+        获取连续多轮增长的分配位置
+
+        Returns:
+            List[Dict[str, Any]]: 按累计增长降序排列的阶段、位置、连续增长轮数、累计增长和当前大小
+        """
+        with self._lock:
+            rows = [
+                dict(entry, phase=phase, site=site)
+                for (phase, site), entry in self._growth.items()
+                if entry["streak"] >= self.min_cycles
+            ]
+        return sorted(rows, key=lambda row: row["growth"], reverse=True)[: self.top]
+
+    def end_cycle(self, page_counts: Optional[Dict[str, int]] = None) -> None:
+        """
+        一轮运行结束，在日志中输出诊断结果
+
+        Args:
+            page_counts: 浏览器管理器持有的页面数量(BrowserManager.page_counts())
+        """
+        if not self.enabled:
+            return
+
+        self.cycles += 1
+        current, peak = tracemalloc.get_traced_memory()
+        message = (
+            f"内存诊断(第 {self.cycles} 轮): Python堆 {current / 1024 / 1024:.1f} MB，"
+            f"峰值 {peak / 1024 / 1024:.1f} MB"
+        )
+        if page_counts:
+            message += (
+                f"，打开的页面 {page_counts['open']} 个，"
+                f"存活的页面对象 {page_counts['live']} 个"
+            )
+        logger.info(message)
+
+        rows = self.growing_sites()
+        if not rows:
+            return
+        logger.warning(f"以下分配位置已连续 {self.min_cycles} 轮以上增长:")
+        for row in rows:
+            logger.warning(
+                f"  [{row['phase']}] {row['site']}: 连续 {row['streak']} 轮增长 "
+                f"{row['growth'] / 1024:.1f} KB，当前 {row['size'] / 1024:.1f} KB"
+            )
+
+
+# 创建全局诊断器实例
+leak_detector = LeakDetector()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置模块
+
+所有输出(控制台和日志文件)都通过队列异步写入，调用logger的线程只负责生成记录，
+不会被终端或磁盘I/O阻塞；日志文件轮转后压缩保存，可选写入JSON格式的结构化记录；
+各模块可以单独设置日志级别
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Union
+from loguru import logger
+
+from config import (
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_FILE,
+    LOG_ROTATION,
+    LOG_RETENTION,
+    LOG_COMPRESSION,
+    LOG_JSON,
+    LOG_MODULE_LEVELS,
+)
+
+
+def configure_logger(
+    level: str = LOG_LEVEL,
+    log_file: Union[str, Path, None] = LOG_FILE,
+    module_levels: Optional[Dict[str, str]] = None,
+    json_logs: bool = LOG_JSON,
+    enqueue: bool = True,
+) -> None:
+    """
+    配置日志记录器
+
+    Args:
+        level: 默认日志级别
+        log_file: 日志文件路径，None表示只输出到控制台
+        module_levels: 各模块的日志级别，None表示使用LOG_MODULE_LEVELS
+        json_logs: 日志文件是否写入JSON格式的结构化记录
+        enqueue: 是否通过队列异步写入
+    """
+    # 移除默认处理程序
+    logger.remove()
+
+    levels = {"": level.upper()}
+    for module, module_level in (
+        LOG_MODULE_LEVELS if module_levels is None else module_levels
+    ).items():
+        levels[module] = module_level.upper()
+    # 处理程序的级别取各模块中最低的，低于该级别的日志在调用处直接丢弃，不会进入队列
+    min_level = min(logger.level(name).no for name in levels.values())
+
+    # 添加控制台处理程序
+    logger.add(
+        sys.stderr,
+        level=min_level,
+        format=LOG_FORMAT,
+        filter=levels,
+        enqueue=enqueue,
+    )
+
+    # 添加文件处理程序
+    if log_file:
+        logger.add(
+            str(log_file),
+            level=min_level,
+            format=LOG_FORMAT,
+            filter=levels,
+            rotation=LOG_ROTATION,
+            retention=LOG_RETENTION,
+            compression=LOG_COMPRESSION,
+            serialize=json_logs,
+            enqueue=enqueue,
+        )
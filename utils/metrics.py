@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标模块
+
+提供计数器、仪表和直方图组成的指标注册表，覆盖运行次数、浏览的主题、点赞、重试、
+各通知渠道的投递延迟和浏览器重启等，与追踪器的阶段耗时直方图一起:
+- 单次运行(cron)在程序退出时写入node-exporter的textfile
+- 常驻模式下通过本地HTTP端点供Prometheus抓取
+
+更新指标只是在锁内修改字典中的数值，不涉及任何I/O，格式化只在导出和抓取时进行
+"""
+
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+from loguru import logger
+
+from config import (
+    METRICS_PROM_PATH,
+    METRICS_STATE_PATH,
+    METRICS_HOST,
+    METRICS_PORT,
+    TRACE_HISTOGRAM_BUCKETS,
+)
+from utils.tracing import Histogram, tracer, format_prometheus, _atomic_write
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+LabelKey = Tuple[str, ...]
+
+
+class Metric:
+    """指标基类，按标签值分别保存数值"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        """
+        初始化指标
+
+        Args:
+            name: 指标名称
+            documentation: 指标说明，导出为HELP
+            labelnames: 标签名称
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        """
+        将标签转换为字典键
+
+        Args:
+            labels: 标签名称到标签值的映射
+
+        Returns:
+            LabelKey: 按labelnames顺序排列的标签值
+        """
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def values(self) -> Dict[LabelKey, Any]:
+        """
+        获取各标签值的当前数值的副本
+
+        Returns:
+            Dict[LabelKey, Any]: 标签值到数值的映射
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[LabelKey, Any]) -> None:
+        """
+        合并另一个进程中同名指标的values()，数值直接覆盖
+
+        Args:
+            values: 标签值到数值的映射
+        """
+        with self._lock:
+            self._values.update(values)
+
+
+class Counter(Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """
+        增加计数
+
+        Args:
+            amount: 增加的数量
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, values: Dict[LabelKey, Any]) -> None:
+        """
+        累加另一个进程中同名计数器的values()
+
+        Args:
+            values: 标签值到计数的映射
+        """
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    """可任意设置的仪表"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        """
+        设置数值
+
+        Args:
+            value: 新的数值
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class HistogramMetric(Metric):
+    """按标签值分别统计的直方图"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = TRACE_HISTOGRAM_BUCKETS,
+    ):
+        """
+        初始化直方图指标
+
+        Args:
+            name: 指标名称
+            documentation: 指标说明
+            labelnames: 标签名称
+            buckets: 桶的上边界，按升序排列，不含+Inf
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def values(self) -> Dict[LabelKey, Any]:
+        """
+        获取各标签值的直方图数据
+
+        Returns:
+            Dict[LabelKey, Any]: 标签值到Histogram.to_dict()数据的映射
+        """
+        with self._lock:
+            return {key: h.to_dict() for key, h in self._values.items()}
+
+    def merge(self, values: Dict[LabelKey, Any]) -> None:
+        """
+        合并另一个进程中同名直方图的values()
+
+        Args:
+            values: 标签值到Histogram.to_dict()数据的映射
+        """
+        with self._lock:
+            for key, data in values.items():
+                histogram = self._values.get(key)
+                if histogram is None:
+                    histogram = self._values[key] = Histogram(self.buckets)
+                histogram.merge(data)
+
+
+class MetricsRegistry:
+    """指标注册表，负责导出textfile和提供HTTP抓取端点"""
+
+    def __init__(self):
+        """初始化指标注册表"""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+        self._baseline: Optional[Dict[str, Any]] = None
+        self._export_registered = False
+        self._server: Optional["ThreadingHTTPServer"] = None
+
+    def _register(self, metric: Metric) -> Metric:
+        """
+        注册指标，同名指标已存在时返回已有的指标
+
+        Args:
+            metric: 指标实例
+
+        Returns:
+            Metric: 注册表中的指标
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()
+    ) -> Counter:
+        """注册计数器，参数同Metric"""
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()
+    ) -> Gauge:
+        """注册仪表，参数同Metric"""
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()
+    ) -> HistogramMetric:
+        """注册直方图，参数同Metric"""
+        return self._register(  # type: ignore
+            HistogramMetric(name, documentation, labelnames)
+        )
+
+    def snapshot(self) -> Dict[str, Dict[LabelKey, Any]]:
+        """
+        导出本进程的指标数值，供父进程通过absorb()合并
+
+        Returns:
+            Dict[str, Dict[LabelKey, Any]]: 指标名称到values()的映射
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.values() for metric in metrics}
+
+    def absorb(self, data: Dict[str, Dict[LabelKey, Any]]) -> None:
+        """
+        合并子进程snapshot()导出的数据，未在本进程注册的指标忽略
+
+        多账号模式的子进程不自行导出，而是由父进程合并后统一导出，
+        避免多个进程同时读写同一个累计文件时互相覆盖
+
+        Args:
+            data: snapshot()导出的数据
+        """
+        for name, values in data.items():
+            with self._lock:
+                metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def _merged(self, state_path: Path) -> Dict[str, Dict[str, Any]]:
+        """
+        将本进程的指标与之前运行导出的累计指标合并
+
+        计数器和直方图累加，仪表以本进程设置的数值为准
+
+        Args:
+            state_path: 之前导出的JSON文件路径
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 指标名称到{type, help, labels, values}的映射
+        """
+        if self._baseline is None:
+            self._baseline = {}
+            try:
+                if state_path.exists():
+                    with open(state_path, "r", encoding="utf-8") as f:
+                        self._baseline = json.load(f).get("metrics", {})
+            except Exception as e:
+                logger.warning(f"读取历史指标数据失败，将重新累计: {str(e)}")
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for metric in metrics:
+            values: Dict[LabelKey, Any] = {}
+            baseline = self._baseline.get(metric.name, {})
+            if baseline.get("type") == metric.kind:
+                for item in baseline.get("values", []):
+                    values[tuple(item["labels"])] = item["value"]
+
+            for key, value in metric.values().items():
+                if metric.kind == "counter":
+                    values[key] = values.get(key, 0) + value
+                elif metric.kind == "histogram":
+                    histogram = Histogram(tuple(value["buckets"]))
+                    if key in values:
+                        histogram.merge(values[key])
+                    histogram.merge(value)
+                    values[key] = histogram.to_dict()
+                else:
+                    values[key] = value
+            # 没有标签的计数器从0开始导出，便于用rate()计算
+            if metric.kind == "counter" and not metric.labelnames:
+                values.setdefault((), 0)
+
+            merged[metric.name] = {
+                "type": metric.kind,
+                "help": metric.documentation,
+                "labels": list(metric.labelnames),
+                "values": values,
+            }
+        return merged
+
+    def render(self, state_path: Union[str, Path] = METRICS_STATE_PATH) -> str:
+        """
+        将累计指标格式化为Prometheus文本格式
+
+        Args:
+            state_path: 之前导出的JSON文件路径
+
+        Returns:
+            str: Prometheus文本格式内容
+        """
+        return format_metrics(self._merged(Path(state_path)))
+
+    def export(
+        self,
+        state_path: Union[str, Path] = METRICS_STATE_PATH,
+        prom_path: Union[str, Path, None] = METRICS_PROM_PATH,
+    ) -> None:
+        """
+        导出累计指标
+
+        Args:
+            state_path: JSON文件路径，下次运行从这里继续累计
+            prom_path: Prometheus textfile路径，None表示不导出
+        """
+        state_path = Path(state_path)
+        merged = self._merged(state_path)
+
+        payload = {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "metrics": {
+                name: dict(
+                    data,
+                    values=[
+                        {"labels": list(key), "value": value}
+                        for key, value in sorted(data["values"].items())
+                    ],
+                )
+                for name, data in sorted(merged.items())
+            },
+        }
+        _atomic_write(state_path, json.dumps(payload, ensure_ascii=False, indent=2))
+
+        if prom_path:
+            _atomic_write(Path(prom_path), format_metrics(merged))
+
+        logger.debug(f"已导出指标数据: {state_path}")
+
+    def export_at_exit(
+        self,
+        state_path: Union[str, Path] = METRICS_STATE_PATH,
+        prom_path: Union[str, Path, None] = METRICS_PROM_PATH,
+    ) -> None:
+        """
+        注册在程序退出时导出指标
+
+        Args:
+            state_path: JSON文件路径
+            prom_path: Prometheus textfile路径
+        """
+        if self._export_registered:
+            return
+        self._export_registered = True
+
+        def _export() -> None:
+            try:
+                self.export(state_path, prom_path)
+            except Exception as e:
+                logger.error(f"导出指标数据失败: {str(e)}")
+
+        atexit.register(_export)
+
+    def serve(self, host: str = METRICS_HOST, port: int = METRICS_PORT) -> None:
+        """
+        在后台线程中启动HTTP指标端点，GET /metrics返回本注册表和追踪器的累计指标
+
+        Args:
+            host: 监听地址
+            port: 监听端口
+        """
+        if self._server is not None:
+            return
+
+        # 只有常驻模式才需要HTTP服务器，避免拖慢单次运行的启动
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = (
+                    registry.render() + format_prometheus(tracer.merged_histograms())
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        ).start()
+        logger.info(f"指标端点: http://{host}:{self._server.server_port}/metrics")
+
+    def stop_server(self) -> None:
+        """停止HTTP指标端点"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def format_metrics(merged: Dict[str, Dict[str, Any]]) -> str:
+    """
+    将指标格式化为Prometheus文本格式
+
+    Args:
+        merged: MetricsRegistry._merged()返回的指标数据
+
+    Returns:
+        str: Prometheus文本格式内容
+    """
+
+    def label_text(names: List[str], key: LabelKey, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(names, key)
+        ] + ([extra] if extra else [])
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    lines: List[str] = []
+    for name, data in sorted(merged.items()):
+        names = data["labels"]
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        for key, value in sorted(data["values"].items()):
+            if data["type"] != "histogram":
+                lines.append(f"{name}{label_text(names, key)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(value["buckets"], value["counts"]):
+                cumulative += count
+                le = label_text(names, key, f'le="{bound}"')
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            le = label_text(names, key, 'le="+Inf"')
+            lines.append(f"{name}_bucket{le} {value['count']}")
+            lines.append(f"{name}_sum{label_text(names, key)} {value['sum']:.6f}")
+            lines.append(f"{name}_count{label_text(names, key)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """
+    转义标签值中的特殊字符
+
+    Args:
+        value: 标签值
+
+    Returns:
+        str: 转义后的标签值
+    """
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+# 创建全局指标注册表
+metrics = MetricsRegistry()
+
+# 各模块使用的指标，更新时直接调用inc()/set()/observe()
+runs_started_total = metrics.counter(
+    "linuxdo_autoread_runs_started_total", "Check-in runs started."
+)
+runs_finished_total = metrics.counter(
+    "linuxdo_autoread_runs_finished_total",
+    "Check-in runs finished, by result.",
+    ("result",),
+)
+last_run_timestamp = metrics.gauge(
+    "linuxdo_autoread_last_run_timestamp_seconds",
+    "Unix time the last run finished, by result.",
+    ("result",),
+)
+topics_read_total = metrics.counter(
+    "linuxdo_autoread_topics_read_total", "Topics read."
+)
+likes_total = metrics.counter("linuxdo_autoread_likes_total", "Posts liked.")
+retries_total = metrics.counter(
+    "linuxdo_autoread_retries_total",
+    "Retries performed by the retry decorator, by function.",
+    ("function",),
+)
+notification_latency = metrics.histogram(
+    "linuxdo_autoread_notification_latency_seconds",
+    "Notification send latency in seconds, by channel and result.",
+    ("channel", "result"),
+)
+network_requests_total = metrics.counter(
+    "linuxdo_autoread_network_requests_total",
+    "Completed browser network requests, by phase and resource type.",
+    ("phase", "type"),
+)
+network_bytes_total = metrics.counter(
+    "linuxdo_autoread_network_bytes_total",
+    "Bytes transferred by the browser, by phase and resource type.",
+    ("phase", "type"),
+)
+browser_restarts_total = metrics.counter(
+    "linuxdo_autoread_browser_restarts_total", "Browser restarts."
+)
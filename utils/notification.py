@@ -8,10 +8,11 @@
 
 import re
 import time
+import hashlib
 import random
-import requests
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Tuple, TYPE_CHECKING
 from loguru import logger
 
 from config import (
@@ -19,14 +20,93 @@ from config import (
     SERVER_PUSH_RETRY_TIMES,
     SERVER_PUSH_RETRY_INTERVAL_MIN,
     SERVER_PUSH_RETRY_INTERVAL_MAX,
+    NOTIFICATION_CHANNEL_TIMEOUT,
+    NOTIFICATION_TOTAL_TIMEOUT,
+    NOTIFICATION_FLUSH_TIMEOUT,
+    HTTP_POOL_MAXSIZE,
+    HTTP_RETRY_TIMES,
+    HTTP_RETRY_BACKOFF,
+    OUTBOX_PATH,
+    OUTBOX_POLL_INTERVAL,
+    NOTIFICATION_DIGEST_PREFIX,
     REGEX_SC3_UID,
 )
-from utils.decorators import retry
+from utils.outbox import NotificationOutbox
+from utils.metrics import notification_latency
+
+if TYPE_CHECKING:
+    import requests
+
+
+def create_http_session(
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    retries: int = HTTP_RETRY_TIMES,
+    backoff: float = HTTP_RETRY_BACKOFF,
+) -> "requests.Session":
+    """
+    创建带连接池和传输层重试的HTTP会话
+
+    推送请求(包括Server酱的GET)都有副作用，服务器可能已经接受了推送才返回读取超时
+    或5xx，因此传输层只重试请求尚未发出的连接错误，其余失败交给发件箱的退避重试
+
+    Args:
+        pool_maxsize: 连接池最大连接数
+        retries: 传输层重试次数
+        backoff: 重试退避系数(秒)
+
+    Returns:
+        requests.Session: HTTP会话
+    """
+    # requests只在实际创建通知处理器时才导入
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry_policy = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=backoff,
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry_policy,
+        pool_block=True,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 class NotificationHandler(ABC):
     """通知处理器抽象基类"""
 
+    # 渠道名称，用于日志和发送结果
+    name = "base"
+
+    @property
+    def key(self) -> Tuple[Any, ...]:
+        """
+        处理器的配置标识，配置相同的处理器可以跨运行复用
+
+        Returns:
+            Tuple[Any, ...]: 配置标识
+        """
+        return (self.name, id(self))
+
+    def close(self) -> None:
+        """释放处理器持有的资源(如HTTP连接池)"""
+        session = getattr(self, "session", None)
+        if session is not None:
+            session.close()
+
     @abstractmethod
     def send(self, message: str, **kwargs: Any) -> bool:
         """
@@ -45,6 +125,8 @@ class NotificationHandler(ABC):
 class GotifyNotification(NotificationHandler):
     """Gotify通知处理器"""
 
+    name = "gotify"
+
     def __init__(self, url: str, token: str):
         """
         初始化Gotify通知处理器
@@ -55,8 +137,14 @@ class GotifyNotification(NotificationHandler):
         """
         self.url = url
         self.token = token
+        # 长连接会话，在重试、多条消息和多次运行之间复用连接
+        self.session = create_http_session()
+
+    @property
+    def key(self) -> Tuple[Any, ...]:
+        """Gotify处理器按服务器地址和Token区分"""
+        return (self.name, self.url, self.token)
 
-    @retry(retries=3, delay=2)
     def send(self, message: str, **kwargs: Any) -> bool:
         """
         发送Gotify通知
@@ -74,7 +162,7 @@ class GotifyNotification(NotificationHandler):
         priority = kwargs.get("priority", 1)
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.url}/message",
                 params={"token": self.token},
                 json={"title": title, "message": message, "priority": priority},
@@ -91,16 +179,27 @@ class GotifyNotification(NotificationHandler):
 class ServerChanNotification(NotificationHandler):
     """Server酱通知处理器"""
 
-    def __init__(self, push_key: str):
+    name = "server_chan"
+
+    def __init__(self, push_key: str, retry_times: int = SERVER_PUSH_RETRY_TIMES):
         """
         初始化Server酱通知处理器
 
         Args:
             push_key: Server酱推送密钥
+            retry_times: 单次发送内的重试次数，使用发件箱时由发件箱负责重试
         """
         self.push_key = push_key
+        self.retry_times = max(1, retry_times)
         # 预编译正则表达式
         self.re_sc3_uid = re.compile(REGEX_SC3_UID, re.I)
+        # 长连接会话，在重试、多条消息和多次运行之间复用连接
+        self.session = create_http_session()
+
+    @property
+    def key(self) -> Tuple[Any, ...]:
+        """Server酱处理器按推送密钥和重试次数区分"""
+        return (self.name, self.push_key, self.retry_times)
 
     def send(self, message: str, **kwargs: Any) -> bool:
         """
@@ -126,15 +225,15 @@ class ServerChanNotification(NotificationHandler):
         params = {"title": title, "desp": message}
 
         # 重试发送
-        for attempt in range(SERVER_PUSH_RETRY_TIMES):
+        for attempt in range(self.retry_times):
             try:
-                response = requests.get(url, params=params, timeout=10)
+                response = self.session.get(url, params=params, timeout=10)
                 response.raise_for_status()
                 logger.success(f"Server酱³推送成功: {response.text}")
                 return True
             except Exception as e:
                 logger.error(f"Server酱³推送失败: {str(e)}")
-                if attempt < SERVER_PUSH_RETRY_TIMES - 1:
+                if attempt < self.retry_times - 1:
                     sleep_time = random.randint(
                         SERVER_PUSH_RETRY_INTERVAL_MIN, SERVER_PUSH_RETRY_INTERVAL_MAX
                     )
@@ -147,9 +246,20 @@ class ServerChanNotification(NotificationHandler):
 class NotificationManager:
     """通知管理器，统一管理多种通知方式"""
 
-    def __init__(self):
-        """初始化通知管理器"""
+    def __init__(self, outbox: Optional[NotificationOutbox] = None):
+        """
+        初始化通知管理器
+
+        Args:
+            outbox: 持久化发件箱，为None时enqueue将直接发送
+        """
         self.handlers: List[NotificationHandler] = []
+        self.outbox = outbox
+        # 成功通知的汇总窗口(秒)，0表示不汇总
+        self.digest_window = 0
+        self._worker: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
 
     def add_handler(self, handler: NotificationHandler) -> None:
         """
@@ -160,43 +270,408 @@ class NotificationManager:
         """
         self.handlers.append(handler)
 
-    def send_all(self, message: str, **kwargs: Any) -> Dict[int, bool]:
+    def _channels(self) -> Dict[str, NotificationHandler]:
+        """
+        获取渠道名称到处理器的映射
+
+        渠道名称由处理器名称和配置标识的摘要组成，多个会话共用同一个发件箱时，
+        每个会话只会领取与自己配置相同的处理器写入的消息；配置相同的处理器会追加序号
+
+        Returns:
+            Dict[str, NotificationHandler]: 渠道名称和处理器的字典
+        """
+        channels: Dict[str, NotificationHandler] = {}
+        for i, handler in enumerate(self.handlers):
+            digest = hashlib.sha1(repr(handler.key).encode("utf-8")).hexdigest()
+            channel = f"{handler.name}:{digest[:12]}"
+            if channel in channels:
+                channel = f"{channel}_{i}"
+            channels[channel] = handler
+        return channels
+
+    def _digest_scope(self) -> str:
+        """
+        获取汇总范围，只有通知渠道完全相同的管理器暂存的结果才会合并在一起
+
+        Returns:
+            str: 所有渠道名称的摘要
+        """
+        payload = "\n".join(sorted(self._channels()))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+    def send_all(
+        self,
+        message: str,
+        channel_timeout: float = NOTIFICATION_CHANNEL_TIMEOUT,
+        total_timeout: float = NOTIFICATION_TOTAL_TIMEOUT,
+        **kwargs: Any,
+    ) -> Dict[str, bool]:
         """
-        发送通知到所有处理器
+        并发发送通知到所有处理器
+
+        每个处理器在独立的守护线程中执行，超过单渠道超时或总超时的渠道
+        将被放弃等待并记为失败，慢速渠道不会阻塞主流程
 
         Args:
             message: 通知消息
+            channel_timeout: 单个渠道的最长等待时间(秒)
+            total_timeout: 所有渠道的总等待时间(秒)
             **kwargs: 其他参数
 
         Returns:
-            Dict[int, bool]: 处理器索引和发送结果的字典
+            Dict[str, bool]: 渠道名称和发送结果的字典
         """
+        deadline = time.monotonic() + total_timeout
+        jobs = []
+
+        for channel, handler in self._channels().items():
+            slot: Dict[str, bool] = {}
+            thread = threading.Thread(
+                target=self._send_one,
+                args=(handler, channel, message, kwargs, slot),
+                name=f"notify-{channel}",
+                daemon=True,
+            )
+            thread.start()
+            jobs.append((channel, thread, slot, time.monotonic()))
+
         results = {}
-        for i, handler in enumerate(self.handlers):
-            results[i] = handler.send(message, **kwargs)
+        for channel, thread, slot, started_at in jobs:
+            remaining = min(started_at + channel_timeout, deadline) - time.monotonic()
+            thread.join(max(remaining, 0))
+            if thread.is_alive():
+                logger.warning(f"通知渠道 {channel} 超时，已放弃等待")
+                results[channel] = False
+            else:
+                results[channel] = slot.get("result", False)
+
+        return results
+
+    @staticmethod
+    def _send_one(
+        handler: NotificationHandler,
+        channel: str,
+        message: str,
+        kwargs: Dict[str, Any],
+        slot: Dict[str, bool],
+    ) -> None:
+        """
+        在线程中执行单个处理器的发送，并将结果写入slot
+
+        Args:
+            handler: 通知处理器实例
+            channel: 渠道名称
+            message: 通知消息
+            kwargs: 其他参数
+            slot: 存放发送结果的字典
+        """
+        started = time.monotonic()
+        try:
+            slot["result"] = bool(handler.send(message, **kwargs))
+        except Exception as e:
+            logger.error(f"通知渠道 {channel} 发送出错: {str(e)}")
+            slot["result"] = False
+        notification_latency.observe(
+            time.monotonic() - started,
+            channel=handler.name,
+            result="sent" if slot["result"] else "failed",
+        )
+
+    def enqueue(
+        self, message: str, dedup_key: Optional[str] = None, **kwargs: Any
+    ) -> int:
+        """
+        将通知写入发件箱后立即返回，由投递线程异步发送
+
+        Args:
+            message: 通知消息
+            dedup_key: 去重键，相同去重键的待发送消息只保留一条
+            **kwargs: 其他参数，需可JSON序列化
+
+        Returns:
+            int: 写入发件箱的消息条数
+        """
+        if self.outbox is None:
+            return sum(self.send_all(message, **kwargs).values())
+
+        count = 0
+        for channel in self._channels():
+            try:
+                if self.outbox.put(channel, message, kwargs, dedup_key):
+                    count += 1
+            except Exception as e:
+                logger.error(f"写入通知发件箱失败，改为直接发送: {str(e)}")
+                return sum(self.send_all(message, **kwargs).values())
+
+        self._wakeup.set()
+        return count
+
+    def report(
+        self, message: str, success: bool = True, account: Optional[str] = None
+    ) -> int:
+        """
+        上报一次运行结果
+
+        失败结果立即写入发件箱；成功结果在启用汇总窗口时先暂存，
+        窗口到期后与其他运行、其他账号的结果合并为一条消息发送
+
+        Args:
+            message: 通知消息
+            success: 是否为成功结果
+            account: 产生该结果的账号
+
+        Returns:
+            int: 本次写入发件箱的消息条数
+        """
+        if (
+            not success
+            or self.digest_window <= 0
+            or self.outbox is None
+            or not self.handlers
+        ):
+            if account and self.digest_window > 0:
+                message = f"[{account}] {message}"
+            return self.enqueue(message)
+
+        try:
+            self.outbox.add_digest_entry(message, account, self._digest_scope())
+        except Exception as e:
+            logger.error(f"写入通知汇总失败，改为直接发送: {str(e)}")
+            return self.enqueue(message)
+
+        logger.info(f"已暂存通知，将在 {self.digest_window} 秒汇总窗口到期后合并发送")
+        return self.flush_digest()
+
+    def flush_digest(self, force: bool = False) -> int:
+        """
+        汇总窗口到期时，将暂存的结果合并为一条消息写入发件箱
+
+        Args:
+            force: 是否忽略窗口立即合并
+
+        Returns:
+            int: 写入发件箱的消息条数
+        """
+        # 没有可用渠道时保留暂存结果，避免合并后无处发送
+        if self.outbox is None or not self.handlers:
+            return 0
+
+        channels = list(self._channels())
+        try:
+            merged = self.outbox.take_digest(
+                self.digest_window,
+                channels,
+                format_digest,
+                scope=self._digest_scope(),
+                force=force,
+            )
+        except Exception as e:
+            logger.error(f"合并通知汇总失败，暂存结果将在下次合并时重试: {str(e)}")
+            return 0
+        if not merged:
+            return 0
+
+        logger.info(f"汇总窗口到期，已合并 {merged} 条通知")
+        self._wakeup.set()
+        return len(channels)
+
+    def deliver_pending(
+        self, total_timeout: float = NOTIFICATION_TOTAL_TIMEOUT
+    ) -> Dict[str, int]:
+        """
+        投递发件箱中所有到期的消息，各渠道并发投递
+
+        Args:
+            total_timeout: 本轮投递的总等待时间(秒)
+
+        Returns:
+            Dict[str, int]: 渠道名称和成功投递条数的字典
+        """
+        if self.outbox is None:
+            return {}
+
+        deadline = time.monotonic() + total_timeout
+        channels = self._channels()
+
+        self.outbox.purge_expired()
+        messages = self.outbox.claim_due(list(channels))
+        if not messages:
+            return {}
+
+        jobs = []
+        for channel, handler in channels.items():
+            queue = [m for m in messages if m["channel"] == channel]
+            if not queue:
+                continue
+
+            slot: Dict[str, int] = {}
+            thread = threading.Thread(
+                target=self._deliver_channel,
+                args=(handler, channel, queue, deadline, slot),
+                name=f"outbox-{channel}",
+                daemon=True,
+            )
+            thread.start()
+            jobs.append((channel, thread, slot))
+
+        results = {}
+        for channel, thread, slot in jobs:
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                logger.warning(f"发件箱渠道 {channel} 投递超时，剩余消息将稍后重试")
+            results[channel] = slot.get("sent", 0)
+
         return results
 
+    def _deliver_channel(
+        self,
+        handler: NotificationHandler,
+        channel: str,
+        queue: List[Dict[str, Any]],
+        deadline: float,
+        slot: Dict[str, int],
+    ) -> None:
+        """
+        在线程中按顺序投递单个渠道的消息
+
+        Args:
+            handler: 通知处理器实例
+            channel: 渠道名称
+            queue: 待投递的消息记录
+            deadline: 投递截止时间(monotonic)
+            slot: 存放成功投递条数的字典
+        """
+        slot["sent"] = 0
+        for item in queue:
+            # 超过截止时间的消息保持领取状态，租约到期后再次投递
+            if time.monotonic() >= deadline:
+                break
+
+            error = ""
+            started = time.monotonic()
+            try:
+                ok = bool(handler.send(item["message"], **item["options"]))
+            except Exception as e:
+                ok = False
+                error = str(e)
+            notification_latency.observe(
+                time.monotonic() - started,
+                channel=handler.name,
+                result="sent" if ok else "failed",
+            )
+
+            if ok:
+                self.outbox.mark_sent(item["id"])
+                slot["sent"] += 1
+            else:
+                backoff = self.outbox.mark_failed(
+                    item["id"], item["attempts"] + 1, error
+                )
+                logger.warning(
+                    f"通知渠道 {channel} 投递失败，将在 {backoff:.0f} 秒后重试"
+                )
+
+    def start_worker(self, interval: float = OUTBOX_POLL_INTERVAL) -> None:
+        """
+        启动后台投递线程，持续投递发件箱中的消息(包括之前运行遗留的消息)
+
+        Args:
+            interval: 轮询间隔(秒)
+        """
+        if self.outbox is None or (self._worker and self._worker.is_alive()):
+            return
+
+        self._stopping.clear()
+        self._worker = threading.Thread(
+            target=self._worker_loop,
+            args=(interval,),
+            name="outbox-worker",
+            daemon=True,
+        )
+        self._worker.start()
+        logger.debug("通知发件箱投递线程已启动")
+
+    def _worker_loop(self, interval: float) -> None:
+        """
+        后台投递线程主循环
+
+        Args:
+            interval: 轮询间隔(秒)
+        """
+        while not self._stopping.is_set():
+            try:
+                self.flush_digest()
+                self.deliver_pending()
+            except Exception as e:
+                logger.error(f"投递通知发件箱时出错: {str(e)}")
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+
+    def stop_worker(self, timeout: float = NOTIFICATION_FLUSH_TIMEOUT) -> None:
+        """
+        停止后台投递线程，最多等待timeout秒让其完成当前投递
+
+        未投递完成的消息保留在发件箱中，由下一次运行继续投递
+
+        Args:
+            timeout: 最长等待时间(秒)
+        """
+        if self._worker is None:
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.info("通知发件箱仍有投递未完成，将在下次运行时继续")
+        self._worker = None
+
     def clear_handlers(self) -> None:
-        """清除所有通知处理器"""
+        """清除所有通知处理器并释放其连接池"""
+        for handler in self.handlers:
+            handler.close()
         self.handlers.clear()
 
 
+def format_digest(entries: List[Dict[str, Any]]) -> str:
+    """
+    将多条暂存结果合并为一条汇总消息
+
+    Args:
+        entries: 汇总条目列表
+
+    Returns:
+        str: 汇总消息
+    """
+    lines = [f"{NOTIFICATION_DIGEST_PREFIX}（共 {len(entries)} 条）", ""]
+    for entry in entries:
+        timestamp = time.strftime("%m-%d %H:%M", time.localtime(entry["created_at"]))
+        account = f"[{entry['account']}] " if entry["account"] else ""
+        lines.append(f"- {timestamp} {account}{entry['message']}")
+    return "\n".join(lines)
+
+
 # 创建一个全局通知管理器实例
-notification_manager = NotificationManager()
+notification_manager = NotificationManager(NotificationOutbox(OUTBOX_PATH))
 
 
-def setup_notifications(config: Dict[str, Any]) -> NotificationManager:
+def setup_notifications(
+    config: Dict[str, Any], manager: Optional[NotificationManager] = None
+) -> NotificationManager:
     """
     根据配置设置通知处理器
 
     Args:
         config: 配置字典
+        manager: 要设置的通知管理器，默认为全局通知管理器
 
     Returns:
         NotificationManager: 设置好的通知管理器
     """
-    # 清除旧的处理器
-    notification_manager.clear_handlers()
+    if manager is None:
+        manager = notification_manager
+
+    handlers: List[NotificationHandler] = []
 
     # 设置Gotify
     gotify_config = config.get("notifications", {}).get("gotify", {})
@@ -204,13 +679,35 @@ def setup_notifications(config: Dict[str, Any]) -> NotificationManager:
     gotify_token = gotify_config.get("token")
 
     if gotify_url and gotify_token:
-        notification_manager.add_handler(GotifyNotification(gotify_url, gotify_token))
+        handlers.append(GotifyNotification(gotify_url, gotify_token))
 
     # 设置Server酱
     server_chan_config = config.get("notifications", {}).get("server_chan", {})
     server_chan_key = server_chan_config.get("push_key")
 
     if server_chan_key:
-        notification_manager.add_handler(ServerChanNotification(server_chan_key))
-
-    return notification_manager
+        # 使用发件箱时由发件箱负责退避重试，处理器只需尝试一次
+        retry_times = 1 if manager.outbox else SERVER_PUSH_RETRY_TIMES
+        handlers.append(ServerChanNotification(server_chan_key, retry_times=retry_times))
+
+    # 复用配置未变化的旧处理器，保留其已建立的连接
+    existing = {handler.key: handler for handler in manager.handlers}
+    reused = []
+    for i, handler in enumerate(handlers):
+        if handler.key in existing:
+            handler.close()
+            handlers[i] = existing.pop(handler.key)
+            reused.append(handlers[i].name)
+
+    # 释放不再使用的处理器
+    for handler in existing.values():
+        handler.close()
+
+    manager.handlers = handlers
+    manager.digest_window = int(
+        config.get("notifications", {}).get("digest_window") or 0
+    )
+    if reused:
+        logger.debug(f"复用通知处理器: {', '.join(reused)}")
+
+    return manager
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通知发件箱模块
+
+基于SQLite的持久化通知队列，消息先落盘再由投递线程异步发送，
+失败的消息按指数退避重试，进程退出后由下一次运行继续投递；
+同时保存待汇总的通知条目，供多次运行、多个账号合并发送
+"""
+
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Union
+from loguru import logger
+
+from config import (
+    OUTBOX_RETRY_BASE,
+    OUTBOX_RETRY_MAX,
+    OUTBOX_MAX_AGE,
+    OUTBOX_CLAIM_LEASE,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    message TEXT NOT NULL,
+    options TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    UNIQUE (channel, dedup_key)
+);
+CREATE TABLE IF NOT EXISTS digest (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    scope TEXT
+);
+"""
+
+
+class NotificationOutbox:
+    """持久化通知发件箱，每条记录对应一个渠道的一条待发送消息"""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        retry_base: float = OUTBOX_RETRY_BASE,
+        retry_max: float = OUTBOX_RETRY_MAX,
+        max_age: float = OUTBOX_MAX_AGE,
+    ):
+        """
+        初始化发件箱，数据库文件在首次使用时才会创建
+
+        Args:
+            path: SQLite数据库文件路径
+            retry_base: 退避重试的基础间隔(秒)
+            retry_max: 退避重试的最大间隔(秒)
+            max_age: 消息的最长保留时间(秒)，超过后丢弃
+        """
+        self.path = Path(path)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        打开数据库连接，首次调用时建表
+
+        Returns:
+            sqlite3.Connection: 数据库连接
+        """
+        conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # 旧版本创建的汇总表没有scope列，其中的条目可由任一通知管理器合并
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(digest)")]
+            if "scope" not in columns:
+                conn.execute("ALTER TABLE digest ADD COLUMN scope TEXT")
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def make_dedup_key(channel: str, message: str, options: Dict[str, Any]) -> str:
+        """
+        根据渠道、消息和参数生成去重键
+
+        Args:
+            channel: 渠道名称
+            message: 通知消息
+            options: 发送参数
+
+        Returns:
+            str: 去重键
+        """
+        payload = json.dumps([channel, message, options], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def put(
+        self,
+        channel: str,
+        message: str,
+        options: Optional[Dict[str, Any]] = None,
+        dedup_key: Optional[str] = None,
+    ) -> bool:
+        """
+        写入一条待发送消息，已存在相同去重键的待发送消息时忽略
+
+        Args:
+            channel: 渠道名称
+            message: 通知消息
+            options: 发送参数
+            dedup_key: 去重键，默认根据消息内容生成
+
+        Returns:
+            bool: 是否新写入了消息
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                inserted = self._insert(conn, channel, message, options, dedup_key)
+            finally:
+                conn.close()
+
+        if not inserted:
+            logger.debug(f"发件箱中已存在相同的待发送消息，跳过: {channel}")
+        return inserted
+
+    def _insert(
+        self,
+        conn: sqlite3.Connection,
+        channel: str,
+        message: str,
+        options: Optional[Dict[str, Any]] = None,
+        dedup_key: Optional[str] = None,
+    ) -> bool:
+        """
+        在给定连接上写入一条待发送消息，参数同put
+
+        Returns:
+            bool: 是否新写入了消息
+        """
+        options = options or {}
+        dedup_key = dedup_key or self.make_dedup_key(channel, message, options)
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO outbox "
+            "(channel, dedup_key, message, options, created_at, next_attempt_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (channel, dedup_key, message, json.dumps(options), now, now),
+        )
+        return cursor.rowcount > 0
+
+    def claim_due(
+        self, channels: List[str], lease: float = OUTBOX_CLAIM_LEASE
+    ) -> List[Dict[str, Any]]:
+        """
+        领取到期的待发送消息，领取后的消息在租约期内不会被再次领取
+
+        Args:
+            channels: 当前可用的渠道名称列表
+            lease: 租约时长(秒)
+
+        Returns:
+            List[Dict[str, Any]]: 消息记录列表
+        """
+        if not channels:
+            return []
+
+        now = time.time()
+        placeholders = ",".join("?" * len(channels))
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    f"SELECT * FROM outbox WHERE next_attempt_at <= ? "
+                    f"AND channel IN ({placeholders}) ORDER BY id",
+                    (now, *channels),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now + lease, row["id"]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+        return [
+            {
+                "id": row["id"],
+                "channel": row["channel"],
+                "message": row["message"],
+                "options": json.loads(row["options"]),
+                "attempts": row["attempts"],
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    def mark_sent(self, message_id: int) -> None:
+        """
+        标记消息发送成功并从发件箱中移除
+
+        Args:
+            message_id: 消息ID
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+            finally:
+                conn.close()
+
+    def mark_failed(self, message_id: int, attempts: int, error: str = "") -> float:
+        """
+        标记消息发送失败，并按指数退避安排下一次重试
+
+        Args:
+            message_id: 消息ID
+            attempts: 本次失败后的累计尝试次数
+            error: 失败原因
+
+        Returns:
+            float: 距离下一次重试的秒数
+        """
+        backoff = min(self.retry_base * (2 ** (attempts - 1)), self.retry_max)
+        backoff *= random.uniform(0.8, 1.2)
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? "
+                    "WHERE id = ?",
+                    (attempts, time.time() + backoff, error[:500], message_id),
+                )
+            finally:
+                conn.close()
+
+        return backoff
+
+    def purge_expired(self) -> int:
+        """
+        丢弃超过最长保留时间的消息
+
+        Returns:
+            int: 丢弃的消息数量
+        """
+        cutoff = time.time() - self.max_age
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                expired = conn.execute(
+                    "SELECT channel, attempts, last_error FROM outbox WHERE created_at < ?",
+                    (cutoff,),
+                ).fetchall()
+                conn.execute("DELETE FROM outbox WHERE created_at < ?", (cutoff,))
+            finally:
+                conn.close()
+
+        for row in expired:
+            logger.warning(
+                f"通知消息已超过最长保留时间，放弃投递: {row['channel']} "
+                f"(尝试 {row['attempts']} 次，最后错误: {row['last_error']})"
+            )
+        return len(expired)
+
+    def pending_count(self) -> int:
+        """
+        获取发件箱中待发送消息的数量
+
+        Returns:
+            int: 待发送消息数量
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                return conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+            finally:
+                conn.close()
+
+    def add_digest_entry(
+        self, message: str, account: Optional[str] = None, scope: Optional[str] = None
+    ) -> None:
+        """
+        写入一条待汇总的通知条目
+
+        Args:
+            message: 通知消息
+            account: 产生该消息的账号
+            scope: 汇总范围，只有相同范围的条目才会合并在一起
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT INTO digest (account, message, created_at, scope) "
+                    "VALUES (?, ?, ?, ?)",
+                    (account, message, time.time(), scope),
+                )
+            finally:
+                conn.close()
+
+    def take_digest(
+        self,
+        window: float,
+        channels: List[str],
+        render: Callable[[List[Dict[str, Any]]], str],
+        scope: Optional[str] = None,
+        force: bool = False,
+    ) -> int:
+        """
+        当最早的条目已等待超过汇总窗口时，将所有待汇总条目合并为一条消息写入发件箱
+
+        写入合并消息和删除条目在同一个事务中完成，任一步失败时条目保留，
+        下一次合并会重新取出同一批条目
+
+        Args:
+            window: 汇总窗口(秒)
+            channels: 写入合并消息的渠道名称列表
+            render: 将待汇总条目格式化为消息的函数
+            scope: 汇总范围，None表示合并所有条目
+            force: 是否忽略窗口立即合并
+
+        Returns:
+            int: 合并的条目数量，窗口未到期时为0
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                if scope is None:
+                    where, params = "1", ()
+                else:
+                    where, params = "(scope = ? OR scope IS NULL)", (scope,)
+                oldest = conn.execute(
+                    f"SELECT MIN(created_at) FROM digest WHERE {where}", params
+                ).fetchone()[0]
+                if oldest is None or (not force and time.time() - oldest < window):
+                    conn.execute("COMMIT")
+                    return 0
+
+                rows = conn.execute(
+                    f"SELECT * FROM digest WHERE {where} ORDER BY id", params
+                ).fetchall()
+                entries = [
+                    {
+                        "id": row["id"],
+                        "account": row["account"],
+                        "message": row["message"],
+                        "created_at": row["created_at"],
+                    }
+                    for row in rows
+                ]
+                message = render(entries)
+                # 以条目ID范围作为去重键，重复合并同一批结果时只发送一次
+                dedup_key = f"digest:{entries[0]['id']}-{entries[-1]['id']}"
+                for channel in channels:
+                    self._insert(conn, channel, message, dedup_key=dedup_key)
+                conn.executemany(
+                    "DELETE FROM digest WHERE id = ?", [(row["id"],) for row in rows]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+        return len(entries)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采样性能分析模块
+
+在后台线程中定时采样主线程和任务图工作线程的调用栈，同时统计墙钟时间和各线程的CPU时间，
+输出可直接用于flamegraph.pl / speedscope的折叠栈文件，以及按模块汇总的耗时排行
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Union
+from loguru import logger
+
+from config import (
+    PROFILE_INTERVAL,
+    PROFILE_MAX_DEPTH,
+    PROFILE_TOP_N,
+    PROFILE_THREAD_PREFIXES,
+)
+
+
+class SamplingProfiler:
+    """
+    低开销的采样分析器
+
+    墙钟采样包含睡眠和等待CDP响应的时间，CPU采样只统计被采样线程真正
+    占用CPU的时间，两者对比即可区分Python计算、网络往返和主动等待；
+    多个线程同时运行时，墙钟时间按线程分别累计
+    """
+
+    def __init__(
+        self,
+        interval: float = PROFILE_INTERVAL,
+        thread_id: Optional[int] = None,
+        max_depth: int = PROFILE_MAX_DEPTH,
+        thread_prefixes: Tuple[str, ...] = PROFILE_THREAD_PREFIXES,
+    ):
+        """
+        初始化采样分析器
+
+        Args:
+            interval: 采样间隔(秒)
+            thread_id: 只采样该线程，默认采样主线程和名称匹配thread_prefixes的线程
+            max_depth: 调用栈的最大采样深度
+            thread_prefixes: 除主线程外被采样的线程名前缀
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.thread_prefixes = tuple(thread_prefixes)
+        # 折叠栈 -> 累计时间(秒)
+        self.wall_stacks: Dict[str, float] = defaultdict(float)
+        self.cpu_stacks: Dict[str, float] = defaultdict(float)
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 线程ID -> CPU时钟ID，平台不支持时为None
+        self._cpu_clocks: Dict[int, Optional[int]] = {}
+        # 线程ID -> 上一次采样时的(墙钟时间, CPU时间)
+        self._last: Dict[int, Tuple[float, float]] = {}
+
+    def _thread_cpu_time(self, thread_id: int) -> float:
+        """
+        获取线程已消耗的CPU时间
+
+        Args:
+            thread_id: 线程ID
+
+        Returns:
+            float: CPU时间(秒)，不支持时为0
+        """
+        if thread_id not in self._cpu_clocks:
+            try:
+                self._cpu_clocks[thread_id] = time.pthread_getcpuclockid(thread_id)
+            except (AttributeError, OSError):
+                self._cpu_clocks[thread_id] = None
+
+        clock = self._cpu_clocks[thread_id]
+        if clock is None:
+            return 0.0
+        try:
+            return time.clock_gettime(clock)
+        except OSError:
+            return 0.0
+
+    def _targets(self) -> List[int]:
+        """
+        获取本次要采样的线程
+
+        Returns:
+            List[int]: 线程ID列表，不包括采样线程自身
+        """
+        if self.thread_id is not None:
+            return [self.thread_id]
+
+        main_thread = threading.main_thread()
+        return [
+            thread.ident
+            for thread in threading.enumerate()
+            if thread.ident is not None
+            and thread is not self._thread
+            and (
+                thread is main_thread or thread.name.startswith(self.thread_prefixes)
+            )
+        ]
+
+    def start(self) -> None:
+        """开始采样"""
+        if self._thread is not None:
+            return
+
+        if not hasattr(time, "pthread_getcpuclockid"):
+            logger.warning("当前平台不支持线程CPU时钟，仅进行墙钟采样")
+
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"采样分析器已启动，采样间隔 {self.interval * 1000:.0f} 毫秒")
+
+    def stop(self) -> None:
+        """停止采样"""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        logger.info(f"采样分析器已停止，共采样 {self.samples} 次")
+
+    def _sample_loop(self) -> None:
+        """采样线程主循环"""
+        last_tick = time.perf_counter()
+
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            targets = self._targets()
+            now_wall = time.perf_counter()
+
+            for thread_id in targets:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                now_cpu = self._thread_cpu_time(thread_id)
+                # 新出现的线程从上一次采样(或开始采样)时算起，CPU时间从本次采样算起
+                last_wall, last_cpu = self._last.get(
+                    thread_id, (last_tick, now_cpu)
+                )
+                stack = self._collapse(frame)
+
+                # 按两次采样之间实际经过的时间加权，避免采样线程被延迟时产生偏差
+                self.wall_stacks[stack] += now_wall - last_wall
+                if now_cpu > last_cpu:
+                    self.cpu_stacks[stack] += now_cpu - last_cpu
+                self._last[thread_id] = (now_wall, now_cpu)
+            del frames
+
+            # 已退出的线程不再保留，线程ID可能被新线程复用
+            for thread_id in set(self._last) - set(targets):
+                del self._last[thread_id]
+                self._cpu_clocks.pop(thread_id, None)
+            last_tick = now_wall
+            self.samples += 1
+
+    def _collapse(self, frame) -> str:
+        """
+        将调用栈折叠为"根;...;叶"格式的字符串
+
+        Args:
+            frame: 栈顶帧
+
+        Returns:
+            str: 折叠后的调用栈
+        """
+        names: List[str] = []
+        while frame is not None and len(names) < self.max_depth:
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}:{frame.f_code.co_name}")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def write_collapsed(self, path_prefix: Union[str, Path]) -> List[Path]:
+        """
+        写出折叠栈文件，计数单位为毫秒
+
+        Args:
+            path_prefix: 文件路径前缀，将生成<prefix>-wall.collapsed和<prefix>-cpu.collapsed
+
+        Returns:
+            List[Path]: 写出的文件路径
+        """
+        path_prefix = Path(path_prefix)
+        path_prefix.parent.mkdir(parents=True, exist_ok=True)
+
+        written = []
+        for kind, stacks in (("wall", self.wall_stacks), ("cpu", self.cpu_stacks)):
+            if not stacks:
+                continue
+            path = path_prefix.with_name(f"{path_prefix.name}-{kind}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, seconds in sorted(stacks.items()):
+                    millis = int(round(seconds * 1000))
+                    if millis > 0:
+                        f.write(f"{stack} {millis}\n")
+            written.append(path)
+        return written
+
+    def module_summary(self) -> List[Tuple[str, float, float, float, float]]:
+        """
+        按模块汇总耗时
+
+        自身时间(self)只计入栈顶帧所属模块，累计时间(total)计入栈上出现的每个模块
+
+        Returns:
+            List[Tuple[str, float, float, float, float]]:
+                (模块, 墙钟self, 墙钟total, CPU self, CPU total)，按墙钟total降序
+        """
+        table: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0])
+
+        for column, stacks in ((0, self.wall_stacks), (2, self.cpu_stacks)):
+            for stack, seconds in stacks.items():
+                modules = [frame.split(":", 1)[0] for frame in stack.split(";")]
+                table[modules[-1]][column] += seconds
+                for module in set(modules):
+                    table[module][column + 1] += seconds
+
+        rows = [(module, *values) for module, values in table.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def log_summary(self, top_n: int = PROFILE_TOP_N) -> None:
+        """
+        在日志中输出按模块汇总的耗时排行
+
+        Args:
+            top_n: 输出的模块数量
+        """
+        rows = self.module_summary()[:top_n]
+        if not rows:
+            logger.info("采样分析器没有采集到数据")
+            return
+
+        logger.info(
+            f"采样分析结果(共 {self.duration:.1f} 秒，{self.samples} 次采样)，"
+            f"按模块累计墙钟时间排序:"
+        )
+        logger.info(
+            f"{'模块':<40} {'墙钟self':>9} {'墙钟total':>10} {'CPU self':>9} {'CPU total':>10}"
+        )
+        for module, wall_self, wall_total, cpu_self, cpu_total in rows:
+            logger.info(
+                f"{module:<40} {wall_self:>9.2f} {wall_total:>10.2f} "
+                f"{cpu_self:>9.2f} {cpu_total:>10.2f}"
+            )
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调度模块
+
+为常驻进程提供固定间隔调度，支持随机抖动、错过执行后的补偿执行，
+并将上次执行时间持久化，进程重启后仍能按原计划继续
+"""
+
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Union
+from loguru import logger
+
+
+class IntervalScheduler:
+    """固定间隔调度器"""
+
+    def __init__(
+        self,
+        interval: float,
+        jitter: float = 0.0,
+        state_path: Union[str, Path, None] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            interval: 执行间隔(秒)
+            jitter: 每次计划执行时间的随机延后上限(秒)
+            state_path: 保存上次执行时间的文件，None表示不持久化
+        """
+        self.interval = interval
+        self.jitter = jitter
+        self.state_path = Path(state_path) if state_path else None
+        self.stop_event = threading.Event()
+        self.cycles = 0
+        self.last_run_at: Optional[float] = self._load_last_run()
+
+    def _load_last_run(self) -> Optional[float]:
+        """
+        读取持久化的上次执行时间
+
+        Returns:
+            Optional[float]: 上次执行的Unix时间戳
+        """
+        if not self.state_path or not self.state_path.exists():
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return float(json.load(f)["last_run_at"])
+        except Exception as e:
+            logger.warning(f"读取调度状态失败，将立即执行: {str(e)}")
+            return None
+
+    def _save_last_run(self) -> None:
+        """持久化上次执行时间"""
+        if not self.state_path:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                json.dump({"last_run_at": self.last_run_at}, f)
+        except Exception as e:
+            logger.warning(f"保存调度状态失败: {str(e)}")
+
+    def next_run_at(self) -> float:
+        """
+        计算下一次执行时间
+
+        从未执行过或已错过计划时间时返回当前时间(立即补偿执行)，
+        错过多次也只补偿一次
+
+        Returns:
+            float: 下一次执行的Unix时间戳
+        """
+        now = time.time()
+        if self.last_run_at is None:
+            return now
+
+        scheduled = self.last_run_at + self.interval + random.uniform(0, self.jitter)
+        if scheduled <= now:
+            missed = int((now - self.last_run_at) // self.interval)
+            logger.info(f"已错过 {missed} 次计划执行，立即补偿执行一次")
+            return now
+        return scheduled
+
+    def stop(self) -> None:
+        """请求停止调度，正在执行的任务会执行完毕"""
+        self.stop_event.set()
+
+    def run_forever(self, job: Callable[[], None]) -> None:
+        """
+        按计划循环执行任务，直到调用stop()
+
+        任务抛出的异常会被记录，不会中断调度
+
+        Args:
+            job: 要执行的任务
+        """
+        while not self.stop_event.is_set():
+            run_at = self.next_run_at()
+            delay = max(run_at - time.time(), 0)
+            if delay > 0:
+                logger.info(
+                    f"下一次执行时间: "
+                    f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run_at))}"
+                )
+                if self.stop_event.wait(delay):
+                    break
+
+            self.cycles += 1
+            logger.info(f"开始第 {self.cycles} 轮调度执行")
+            # 按开始时间记录，任务耗时不会推迟后续计划
+            self.last_run_at = time.time()
+            self._save_last_run()
+
+            try:
+                job()
+            except (Exception, SystemExit) as e:
+                # 任务内部调用sys.exit()也只结束本轮执行
+                logger.error(f"第 {self.cycles} 轮执行出错: {str(e) or type(e).__name__}")
+
+        logger.info("调度器已停止")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务图模块
+
+将一次运行表示为声明了依赖关系的任务图，由线程池并发执行互不依赖的任务，
+记录每个任务的开始和结束时间，并计算关键路径
+"""
+
+import time
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from config import TASK_GRAPH_WORKERS
+
+
+class Task:
+    """任务图中的单个任务"""
+
+    def __init__(self, name: str, func: Callable[[], Any], deps: Tuple[str, ...]):
+        """
+        初始化任务
+
+        Args:
+            name: 任务名称
+            func: 任务函数，无参数
+            deps: 依赖的任务名称
+        """
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.result: Any = None
+        # 相对于任务图开始执行时刻的秒数，未执行时为None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """任务耗时(秒)，未完成时为0"""
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class TaskGraph:
+    """
+    有依赖关系的任务图
+
+    任务只能依赖已添加的任务，因此添加顺序即为一个拓扑序，不会出现环；
+    任一任务失败后不再启动新任务，等待已启动的任务结束后抛出第一个异常
+    """
+
+    def __init__(self, max_workers: int = TASK_GRAPH_WORKERS):
+        """
+        初始化任务图
+
+        Args:
+            max_workers: 同时执行的最大任务数
+        """
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Task] = {}
+        self.elapsed = 0.0
+
+    def add(
+        self, name: str, func: Callable[[], Any], deps: Iterable[str] = ()
+    ) -> Task:
+        """
+        添加任务
+
+        Args:
+            name: 任务名称
+            func: 任务函数，无参数
+            deps: 依赖的任务名称，必须已经添加
+
+        Returns:
+            Task: 添加的任务
+
+        Raises:
+            ValueError: 任务重名或依赖不存在
+        """
+        if name in self.tasks:
+            raise ValueError(f"任务 {name} 已存在")
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"任务 {name} 依赖的任务 {dep} 不存在")
+
+        task = Task(name, func, deps)
+        self.tasks[name] = task
+        return task
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行所有任务，依赖都已完成的任务立即并发执行
+
+        每个任务都在提交时复制的上下文中执行，追踪span和重试预算照常生效
+
+        Returns:
+            Dict[str, Any]: 任务名称 -> 任务返回值
+        """
+        origin = time.perf_counter()
+        done: set = set()
+        failure: Optional[BaseException] = None
+        running: Dict[Future, Task] = {}
+
+        def execute(task: Task) -> Any:
+            task.started = time.perf_counter() - origin
+            try:
+                return task.func()
+            finally:
+                task.finished = time.perf_counter() - origin
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="task"
+        ) as executor:
+            while True:
+                if failure is None:
+                    submitted = {task.name for task in running.values()}
+                    for task in self.tasks.values():
+                        if (
+                            task.name not in done
+                            and task.name not in submitted
+                            and all(dep in done for dep in task.deps)
+                        ):
+                            context = contextvars.copy_context()
+                            future = executor.submit(context.run, execute, task)
+                            running[future] = task
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        task.result = future.result()
+                        done.add(task.name)
+                    elif failure is None:
+                        failure = error
+
+        self.elapsed = time.perf_counter() - origin
+        if failure is not None:
+            raise failure
+        return {name: task.result for name, task in self.tasks.items()}
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        计算关键路径，即按任务耗时累加最长的依赖链
+
+        Returns:
+            Tuple[List[str], float]: 关键路径上的任务名称和总耗时(秒)
+        """
+        # 添加顺序即拓扑序，按顺序递推到每个任务为止的最长路径
+        longest: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name, task in self.tasks.items():
+            best = max(task.deps, key=lambda dep: longest[dep], default=None)
+            longest[name] = task.duration + (longest[best] if best else 0.0)
+            previous[name] = best
+
+        if not longest:
+            return [], 0.0
+
+        end = max(longest, key=longest.get)
+        path = []
+        node: Optional[str] = end
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        path.reverse()
+        return path, longest[end]
+
+    def timings(self) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """
+        获取各任务的开始和结束时间
+
+        Returns:
+            Dict[str, Tuple[Optional[float], Optional[float]]]: 任务名称 -> (开始, 结束)
+        """
+        return {
+            name: (task.started, task.finished) for name, task in self.tasks.items()
+        }
+
+    def log_summary(self) -> None:
+        """在日志中输出各任务的时间线和关键路径"""
+        logger.info(f"{'任务':<16} {'开始':>8} {'结束':>8} {'耗时':>8}")
+        for task in self.tasks.values():
+            if task.started is None:
+                logger.info(f"{task.name:<16} {'未执行':>8}")
+                continue
+            logger.info(
+                f"{task.name:<16} {task.started:>8.2f} {task.finished:>8.2f} "
+                f"{task.duration:>8.2f}"
+            )
+
+        path, length = self.critical_path()
+        serial = sum(task.duration for task in self.tasks.values())
+        logger.info(
+            f"关键路径: {' → '.join(path)}，共 {length:.2f} 秒；"
+            f"实际耗时 {self.elapsed:.2f} 秒，串行执行约需 {serial:.2f} 秒"
+        )
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间预算模块
+
+为一次运行设置墙钟时间上限，并在各阶段之间分配:
+浏览前的各阶段按比例获得重试截止时间，签到后的连接信息和通知始终保留固定的时间，
+其余时间留给浏览，浏览时根据剩余时间决定是否开始下一个主题以及是否缩短停留时间
+"""
+
+import time
+from typing import Dict, Optional
+from loguru import logger
+
+from config import (
+    TIME_BUDGET_RESERVE,
+    TIME_BUDGET_SHARES,
+    TIME_BUDGET_TOPIC_ESTIMATE,
+    TIME_BUDGET_MIN_DWELL_SCALE,
+)
+
+
+class TimeBudget:
+    """一次运行的墙钟时间预算"""
+
+    def __init__(
+        self,
+        total: float,
+        reserve: float = TIME_BUDGET_RESERVE,
+        shares: Optional[Dict[str, float]] = None,
+        topic_estimate: float = TIME_BUDGET_TOPIC_ESTIMATE,
+        min_dwell_scale: float = TIME_BUDGET_MIN_DWELL_SCALE,
+    ):
+        """
+        初始化时间预算
+
+        Args:
+            total: 总时长(秒)
+            reserve: 为签到后连接信息和通知保留的时长(秒)，最多为总时长的一半
+            shares: 浏览前各阶段的重试截止时间占总时长的比例
+            topic_estimate: 浏览一个主题的初始估计耗时(秒)，之后按实际耗时修正
+            min_dwell_scale: 停留时间最多缩短到原来的比例
+        """
+        self.total = total
+        self.reserve = min(reserve, total / 2)
+        self.shares = TIME_BUDGET_SHARES if shares is None else shares
+        self.topic_estimate = topic_estimate
+        self.min_dwell_scale = min_dwell_scale
+        self.started = time.monotonic()
+        self.skipped_topics = 0  # 因时间不足未浏览的主题数量
+
+    def elapsed(self) -> float:
+        """
+        获取已用时长
+
+        Returns:
+            float: 已用秒数
+        """
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """
+        获取剩余时长
+
+        Returns:
+            float: 剩余秒数，已超时时为0
+        """
+        return max(self.total - self.elapsed(), 0.0)
+
+    def browse_remaining(self) -> float:
+        """
+        获取可用于浏览的剩余时长，即扣除保留时长后的剩余时长
+
+        Returns:
+            float: 剩余秒数
+        """
+        return max(self.remaining() - self.reserve, 0.0)
+
+    def phase_timeout(self, phase: str) -> float:
+        """
+        获取阶段的重试截止时长
+
+        有分配比例的阶段不超过其份额，也不占用保留时长；
+        其他阶段(签到后的连接信息、通知等)可以使用全部剩余时长
+
+        Args:
+            phase: 阶段名称
+
+        Returns:
+            float: 截止时长(秒)
+        """
+        share = self.shares.get(phase)
+        if share is None:
+            return self.remaining()
+        return min(self.total * share, self.browse_remaining())
+
+    def dwell_scale(self, topics_left: int) -> Optional[float]:
+        """
+        计算浏览下一个主题时停留时间的缩放比例
+
+        Args:
+            topics_left: 包括下一个主题在内还要浏览的主题数量
+
+        Returns:
+            Optional[float]: 缩放比例，剩余时间即使缩短停留也不够浏览一个主题时返回None
+        """
+        available = self.browse_remaining()
+        if available < self.topic_estimate * self.min_dwell_scale:
+            return None
+        scale = available / (self.topic_estimate * max(topics_left, 1))
+        return max(min(scale, 1.0), self.min_dwell_scale)
+
+    def record_topic(self, duration: float, scale: float) -> None:
+        """
+        记录一个主题的实际耗时，修正按原停留时间浏览一个主题的估计耗时
+
+        Args:
+            duration: 实际耗时(秒)
+            scale: 浏览时使用的停留时间缩放比例
+        """
+        observed = duration / scale
+        # 指数滑动平均，避免个别慢页面使估计值大幅波动
+        self.topic_estimate = 0.5 * self.topic_estimate + 0.5 * observed
+
+    def log_summary(self) -> None:
+        """在日志中输出预算使用情况"""
+        message = f"时间预算 {self.total:.0f} 秒，已用 {self.elapsed():.0f} 秒"
+        if self.skipped_topics:
+            message += f"，因时间不足跳过 {self.skipped_topics} 个主题"
+        if self.elapsed() > self.total:
+            logger.warning(message + "，已超出预算")
+        else:
+            logger.info(message)
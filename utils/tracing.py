@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+链路追踪模块
+
+提供嵌套的阶段计时(span)，按span名称汇总延迟直方图，
+并在程序退出时导出为JSON和Prometheus textfile格式
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Union
+from loguru import logger
+
+from config import (
+    TRACE_HISTOGRAM_BUCKETS,
+    TRACE_MAX_RECORDS,
+    TRACE_JSON_PATH,
+    TRACE_PROM_PATH,
+)
+
+
+class Histogram:
+    """固定桶边界的延迟直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = TRACE_HISTOGRAM_BUCKETS):
+        """
+        初始化直方图
+
+        Args:
+            buckets: 桶的上边界(秒)，按升序排列，不含+Inf
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为+Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值(秒)
+        """
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """
+        合并另一个直方图的导出数据(桶边界必须一致)
+
+        Args:
+            data: to_dict()导出的数据
+        """
+        if tuple(data.get("buckets", ())) != self.buckets:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, data["counts"])]
+        self.count += data["count"]
+        self.sum += data["sum"]
+        self.max = max(self.max, data["max"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出直方图数据
+
+        Returns:
+            Dict[str, Any]: 直方图数据
+        """
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+        }
+
+
+class Tracer:
+    """追踪器，负责记录span并汇总每个span名称的延迟直方图"""
+
+    def __init__(self, max_records: int = TRACE_MAX_RECORDS):
+        """
+        初始化追踪器
+
+        Args:
+            max_records: 保留的span明细记录上限
+        """
+        self.histograms: Dict[str, Histogram] = {}
+        self.records: List[Dict[str, Any]] = []
+        self.max_records = max_records
+        self._current: ContextVar[Optional[str]] = ContextVar(
+            "trace_span", default=None
+        )
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._baseline: Optional[Dict[str, Any]] = None
+        self._export_registered = False
+
+    def current_span(self) -> Optional[str]:
+        """
+        获取当前上下文中的span路径
+
+        Returns:
+            Optional[str]: 形如"run/browse/topic"的路径，不在span中时为None
+        """
+        return self._current.get()
+
+    def current_phase(self) -> str:
+        """
+        获取当前上下文所在的运行阶段，即span路径中run之下的第一层
+
+        Returns:
+            str: 阶段名称，如"login"、"browse"，不在任何阶段中时为"other"
+        """
+        path = self._current.get()
+        if path:
+            for name in path.split("/"):
+                if name not in ("run", "accounts"):
+                    return name
+        return "other"
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        记录一个span，支持嵌套
+
+        Args:
+            name: span名称，同名span汇总到同一个直方图
+            **attributes: 附加到明细记录上的属性
+
+        Yields:
+            Dict[str, Any]: span记录，可在span内补充属性
+        """
+        parent = self._current.get()
+        path = f"{parent}/{name}" if parent else name
+        record: Dict[str, Any] = {"name": name, "path": path, **attributes}
+
+        token = self._current.set(path)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record["error"] = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self._current.reset(token)
+            record["start"] = round(start - self._origin, 6)
+            record["duration"] = round(duration, 6)
+            self._record(name, duration, record)
+
+    def _record(self, name: str, duration: float, record: Dict[str, Any]) -> None:
+        """
+        保存span结果
+
+        Args:
+            name: span名称
+            duration: 耗时(秒)
+            record: span明细记录
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(duration)
+
+            if len(self.records) < self.max_records:
+                self.records.append(record)
+
+    def reset_records(self) -> None:
+        """清空span明细记录(直方图保留)，用于长驻进程的每轮运行之间"""
+        with self._lock:
+            self.records.clear()
+            self._origin = time.perf_counter()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        导出本进程的直方图和span明细，供父进程通过absorb()合并
+
+        Returns:
+            Dict[str, Any]: 直方图数据和span明细
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in self.histograms.items()
+                },
+                "spans": list(self.records),
+            }
+
+    def absorb(self, data: Dict[str, Any]) -> None:
+        """
+        合并子进程snapshot()导出的数据
+
+        多账号模式的子进程不自行导出，而是由父进程合并后统一导出，
+        避免多个进程同时读写同一个累计文件时互相覆盖
+
+        Args:
+            data: snapshot()导出的数据
+        """
+        with self._lock:
+            for name, histogram_data in data.get("histograms", {}).items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram(
+                        tuple(histogram_data["buckets"])
+                    )
+                histogram.merge(histogram_data)
+            room = self.max_records - len(self.records)
+            self.records.extend(data.get("spans", [])[: max(room, 0)])
+
+    def merged_histograms(
+        self, json_path: Union[str, Path] = TRACE_JSON_PATH
+    ) -> Dict[str, Histogram]:
+        """
+        将本进程的直方图与之前运行导出的累计直方图合并
+
+        Args:
+            json_path: 之前导出的JSON文件路径
+
+        Returns:
+            Dict[str, Histogram]: 合并后的直方图
+        """
+        json_path = Path(json_path)
+        if self._baseline is None:
+            self._baseline = {}
+            try:
+                if json_path.exists():
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        self._baseline = json.load(f).get("histograms", {})
+            except Exception as e:
+                logger.warning(f"读取历史追踪数据失败，将重新累计: {str(e)}")
+
+        merged: Dict[str, Histogram] = {}
+        with self._lock:
+            names = set(self.histograms) | set(self._baseline)
+            for name in names:
+                histogram = Histogram()
+                if name in self._baseline:
+                    histogram.merge(self._baseline[name])
+                if name in self.histograms:
+                    histogram.merge(self.histograms[name].to_dict())
+                merged[name] = histogram
+        return merged
+
+    def export(
+        self,
+        json_path: Union[str, Path] = TRACE_JSON_PATH,
+        prom_path: Union[str, Path, None] = TRACE_PROM_PATH,
+    ) -> None:
+        """
+        导出累计直方图和本次运行的span明细
+
+        Args:
+            json_path: JSON文件路径
+            prom_path: Prometheus textfile路径，None表示不导出
+        """
+        json_path = Path(json_path)
+        histograms = self.merged_histograms(json_path)
+
+        with self._lock:
+            records = list(self.records)
+
+        payload = {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "histograms": {
+                name: histogram.to_dict() for name, histogram in sorted(histograms.items())
+            },
+            "spans": records,
+        }
+        _atomic_write(json_path, json.dumps(payload, ensure_ascii=False, indent=2))
+
+        if prom_path:
+            _atomic_write(Path(prom_path), format_prometheus(histograms))
+
+        logger.debug(f"已导出追踪数据: {json_path}")
+
+    def export_at_exit(
+        self,
+        json_path: Union[str, Path] = TRACE_JSON_PATH,
+        prom_path: Union[str, Path, None] = TRACE_PROM_PATH,
+    ) -> None:
+        """
+        注册在程序退出时导出追踪数据
+
+        Args:
+            json_path: JSON文件路径
+            prom_path: Prometheus textfile路径
+        """
+        if self._export_registered:
+            return
+        self._export_registered = True
+
+        def _export() -> None:
+            try:
+                self.export(json_path, prom_path)
+            except Exception as e:
+                logger.error(f"导出追踪数据失败: {str(e)}")
+
+        atexit.register(_export)
+
+    def summary(self) -> List[Tuple[str, int, float, float]]:
+        """
+        获取本进程各span的耗时汇总
+
+        Returns:
+            List[Tuple[str, int, float, float]]: (名称, 次数, 总耗时, 最大耗时)，按总耗时降序
+        """
+        with self._lock:
+            rows = [
+                (name, h.count, h.sum, h.max) for name, h in self.histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def format_prometheus(histograms: Dict[str, Histogram]) -> str:
+    """
+    将直方图格式化为Prometheus文本格式
+
+    Args:
+        histograms: span名称到直方图的映射
+
+    Returns:
+        str: Prometheus文本格式内容
+    """
+    metric = "linuxdo_autoread_span_duration_seconds"
+    lines = [
+        f"# HELP {metric} Duration of traced phases in seconds.",
+        f"# TYPE {metric} histogram",
+    ]
+    for name, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{metric}_sum{{span="{name}"}} {histogram.sum:.6f}')
+        lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+    return "\n".join(lines) + "\n"
+
+
+def _atomic_write(path: Path, content: str) -> None:
+    """
+    原子地写入文件，避免读取方(如node-exporter)读到写了一半的内容
+
+    Args:
+        path: 目标文件路径
+        content: 文件内容
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# 创建全局追踪器实例
+tracer = Tracer()
+
+
+def span(name: str, **attributes: Any):
+    """
+    在全局追踪器上记录一个span，等价于tracer.span()
+
+    Args:
+        name: span名称
+        **attributes: 附加属性
+
+    Returns:
+        span上下文管理器
+    """
+    return tracer.span(name, **attributes)